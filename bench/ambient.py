@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Adaptive brightness against a fake IIO light sensor (see harness.py).
+
+Replays a lux trace while the daemon runs in-process: noisy indoor light
+(+-20 % jitter around 80 lux), a step to daylight (3000 lux), then dusk and
+night (2 lux). Sensor samples and brightness writes are counted with the
+configured hysteresis and without it (--hysteresis 0 baseline), then the
+display is left to sleep to verify that no samples are taken while asleep.
+
+Usage: python3 bench/ambient.py [--interval 0.05] [--hysteresis 5] [--json out.json]
+"""
+
+import argparse, json, random
+
+from harness import FakeLightSensor, Rig
+
+def trace(steps, rng):
+    """Lux per sample slot: indoor noise, daylight step, dusk ramp, night."""
+    q = steps // 4
+    out = [80 * rng.uniform(0.8, 1.2) for _ in range(q)]
+    out += [3000 * rng.uniform(0.9, 1.1) for _ in range(q)]
+    out += [3000 * (2 / 3000) ** (i / q) for i in range(q)]
+    out += [2 * rng.uniform(0.8, 1.2) for _ in range(steps - 3 * q)]
+    return out
+
+def run(args, hysteresis):
+    rig = Rig(devices=1, prefer_uinput=False, idle_seconds=3600, fade_in_ms=0, fade_out_ms=0,
+              adaptive_brightness=True, ambient_interval=args.interval, ambient_hysteresis=hysteresis,
+              ambient_fade_ms=0)
+    sensor = FakeLightSensor(rig.root)
+    rig.config.light_sensor = sensor.path
+    try:
+        rig.start()
+        daemon, bl = rig.daemon, rig.daemon.primary.backlight
+        writes0 = bl.writes
+        for lux in trace(args.steps, random.Random(1)):
+            sensor.set(lux)
+            rig.run_for(args.interval)
+        awake = {"samples": daemon.ambient.samples, "writes": bl.writes - writes0,
+                 "final_percent": round(daemon.ambient.percent, 1)}
+        daemon.primary.idle.sleep_now()
+        samples = daemon.ambient.samples
+        rig.run_for(20 * args.interval)
+        awake["samples_while_asleep"] = daemon.ambient.samples - samples
+        return awake
+    finally:
+        rig.close()
+
+def main():
+    ap = argparse.ArgumentParser(description="Adaptive brightness: samples and writes over a lux trace")
+    ap.add_argument("--interval", type=float, default=0.05, help="ambient_interval (seconds)")
+    ap.add_argument("--steps", type=int, default=200, help="sample slots in the trace")
+    ap.add_argument("--hysteresis", type=float, default=5.0)
+    ap.add_argument("--json", help="write results to this file")
+    args = ap.parse_args()
+    results = {}
+    for label, hyst in (("no_hysteresis", 0.0), ("hysteresis", args.hysteresis)):
+        results[label] = res = run(args, hyst)
+        print(f"{label:>13}: samples={res['samples']:<4} brightness_writes={res['writes']:<4} "
+              f"final={res['final_percent']}% samples_while_asleep={res['samples_while_asleep']}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Backlight (touchwake/backlight.py) against a fake sysfs tree (harness.FakeBacklight):
+checks that unchanged writes are skipped, that the kept descriptors are
+reopened after a rebind and that every change after it still reaches on_level
+(energy accounting), then times a cached write against open/write/close.
+
+A rebind is simulated by removing the attribute directory and recreating it
+(with a different max_brightness); the descriptors still point at the removed
+files, which answer ENODEV like a real unbound device's attributes.
+Exits 1 if a check fails.
+
+Usage: python3 bench/backlight_io.py [--writes 20000] [--json out.json]
+"""
+
+import argparse, errno, json, os, shutil, tempfile, time
+
+from harness import Backlight, FakeBacklight
+
+class FakeSysfsBacklight(Backlight):
+    """Backlight whose I/O on descriptors of removed files fails with ENODEV."""
+    reopens = 0
+
+    def open(self):
+        self.reopens += 1
+        super().open()
+
+    def _pwrite(self, fd, data):
+        self._check_bound(fd)
+        super()._pwrite(fd, data)
+
+    def _pread_int(self, fd):
+        self._check_bound(fd)
+        return Backlight._pread_int(fd)
+
+    @staticmethod
+    def _check_bound(fd):
+        if os.fstat(fd).st_nlink == 0:
+            raise OSError(errno.ENODEV, os.strerror(errno.ENODEV))
+
+def rebind(root, fake, **attrs):
+    shutil.rmtree(fake.path)
+    return FakeBacklight(root, **attrs)
+
+def run_checks(root):
+    results, failed = {}, []
+    def check(name, ok):
+        results[name] = ok
+        print(f"{'ok' if ok else 'FAIL':<6}{name}")
+        if not ok:
+            failed.append(name)
+
+    fake = FakeBacklight(root, max_brightness=255, brightness=255)
+    bl = FakeSysfsBacklight(fake.path, truncate=True)
+    check("initial open reads max_brightness", bl.max == 255 and bl.reopens == 1)
+
+    bl.set_brightness(100)
+    writes = bl.writes
+    same = [bl.set_brightness(100) for _ in range(10)]
+    check("repeated writes of the same value skipped",
+          not any(same) and bl.writes == writes and bl.writes_skipped == 10 and fake.read() == 100)
+    bl.set_power(False)
+    writes = bl.writes
+    check("unchanged bl_power skipped", not bl.set_power(False) and bl.writes == writes)
+    check("changed value written", bl.set_brightness(101) and fake.read() == 101)
+
+    fake = rebind(root, fake, max_brightness=1023, brightness=0)
+    written = bl.set_brightness(200)
+    check("write after rebind reopens and lands in the new attribute",
+          written and bl.reopens == 2 and fake.read() == 200 and bl.max == 1023)
+    check("same value after the reopen skipped", not bl.set_brightness(200) and bl.reopens == 2)
+
+    fake = rebind(root, fake, max_brightness=1023, brightness=512)
+    check("read after rebind reopens", bl.read_brightness() == 512 and bl.reopens == 3)
+    check("bl_power after rebind written", bl.set_power(True) and fake.read("bl_power") == 0 and bl.reopens == 3)
+
+    # Every power transition reaches on_level (energy accounting), also with no cached level
+    levels = []
+    bl.on_level = lambda level, powered: levels.append((level, powered))
+    fake = rebind(root, fake, max_brightness=1023, brightness=300)
+    bl.set_power(False)
+    check("bl_power after rebind reported with the level read back", levels == [(300, False)] and bl.reopens == 4)
+    bl.invalidate()
+    bl.set_power(True)
+    check("bl_power after invalidate() reported", levels[-1:] == [(300, True)])
+    bl.close()
+    return results, failed
+
+def cost_ns(root, writes):
+    """ns per brightness write: kept descriptor (alternating values) vs open/write/close."""
+    fake = FakeBacklight(root, name="timing")
+    bl = Backlight(fake.path, truncate=True)
+    t0 = time.perf_counter()
+    for i in range(writes):
+        bl.set_brightness(100 + (i & 1))
+    cached = (time.perf_counter() - t0) / writes * 1e9
+    path = os.path.join(fake.path, "brightness")
+    t0 = time.perf_counter()
+    for i in range(writes):
+        with open(path, "w") as f:
+            f.write(f"{100 + (i & 1)}\n")
+    naive = (time.perf_counter() - t0) / writes * 1e9
+    bl.close()
+    return cached, naive
+
+def main():
+    ap = argparse.ArgumentParser(description="Backlight skip-unchanged and rebind checks on a fake sysfs tree")
+    ap.add_argument("--writes", type=int, default=20000, help="writes per variant for the cost measurement")
+    ap.add_argument("--json", help="write results to this file")
+    args = ap.parse_args()
+
+    root = tempfile.mkdtemp(prefix="touchwake-backlight-")
+    try:
+        results, failed = run_checks(root)
+        cached, naive = cost_ns(root, args.writes)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    print(f"cost: {cached:.0f} ns/write kept descriptor, {naive:.0f} ns/write open/write/close")
+    results.update(ns_per_write_cached=cached, ns_per_write_open_close=naive, failed=len(failed))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if failed:
+        raise SystemExit(f"FAIL: {len(failed)} backlight check(s) failed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Drives the pure idle/wake state machine (touchwake/core.py) with a synthetic
+input stream and reports steps per second.
+
+The stream is bursts of activity separated by random gaps, with a tick at every
+deadline the core reports (as the daemon's single timer would) and at fixed
+polling intervals (as a polling driver would). Every decision is checked
+against a reference model of the original polling logic ("asleep once
+now - last_event_ts >= idle_seconds, wake on any activity"), sampled at the same
+instants, so a change to the core that alters a decision fails the run.
+With --dim the core also runs idle dim stages (offsets in seconds); the reference
+then dims to the last stage whose offset has passed and undims on activity.
+
+Usage: python3 bench/core_steps.py [--steps 2000000] [--idle 30] [--dim 10,20] [--seed 1] [--json out.json]
+"""
+
+import argparse, json, os, random, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from touchwake.core import DIM, SLEEP, UNDIM, WAKE, IdleCore
+
+def make_stream(steps, idle, seed):
+    """[(is_activity, t)], times increasing; about half the gaps exceed the idle timeout."""
+    rng = random.Random(seed)
+    stream, t = [], 0.0
+    while len(stream) < steps:
+        for _ in range(rng.randint(1, 20)):
+            t += rng.expovariate(1 / 0.5)
+            stream.append((True, t))
+        gap = rng.uniform(0, 2 * idle)
+        for k in range(1, 4):
+            stream.append((False, t + gap * k / 3))  # polls / timer ticks inside the gap
+        t += gap
+    return stream[:steps]
+
+def run_core(stream, idle, stages=()):
+    core = IdleCore(idle, 0.0, stages)
+    activity, tick = core.activity, core.tick
+    out = []
+    for is_activity, t in stream:
+        out.append(activity(t) if is_activity else tick(t))
+    return out
+
+def run_reference(stream, idle, stages=()):
+    asleep, last, stage = False, 0.0, 0
+    out = []
+    for is_activity, t in stream:
+        if is_activity:
+            out.append(WAKE if asleep else UNDIM if stage else 0)
+            asleep, last, stage = False, t, 0
+        elif not asleep and t - last >= idle:
+            asleep, stage = True, 0
+            out.append(SLEEP)
+        elif not asleep and sum(1 for s in stages if s <= t - last) > stage:
+            stage = sum(1 for s in stages if s <= t - last)
+            out.append(DIM)
+        else:
+            out.append(0)
+    return out
+
+def main():
+    ap = argparse.ArgumentParser(description="Steps per second of the pure idle/wake core")
+    ap.add_argument("--steps", type=int, default=2000000)
+    ap.add_argument("--idle", type=float, default=30.0)
+    ap.add_argument("--dim", default="", help="comma-separated dim stage offsets in seconds (below --idle)")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--json", help="write results to this file")
+    args = ap.parse_args()
+
+    stages = tuple(float(s) for s in args.dim.split(",") if s.strip())
+    stream = make_stream(args.steps, args.idle, args.seed)
+    t0 = time.perf_counter()
+    decisions = run_core(stream, args.idle, stages)
+    elapsed = time.perf_counter() - t0
+    reference = run_reference(stream, args.idle, stages)
+    mismatch = next((i for i, (a, b) in enumerate(zip(decisions, reference)) if a != b), None)
+    results = {"steps": len(stream), "seconds": elapsed, "steps_per_second": len(stream) / elapsed,
+               "sleeps": decisions.count(SLEEP), "wakes": decisions.count(WAKE),
+               "dims": decisions.count(DIM), "undims": decisions.count(UNDIM),
+               "matches_reference": mismatch is None}
+    for key, value in results.items():
+        print(f"{key:>18}: {value:,.3f}" if isinstance(value, float) else f"{key:>18}: {value}")
+    if mismatch is not None:
+        print(f"first mismatch at step {mismatch}: {stream[mismatch]} core={decisions[mismatch]} "
+              f"reference={reference[mismatch]}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    sys.exit(0 if mismatch is None else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Measure reader wakeups and delivered events during a synthetic multi-touch
+swipe with and without a kernel-side event mask (EVIOCSMASK). Each contact
+moves for 70 frames and then rests with only pressure/size jitter.
+
+A uinput touchscreen (Goodix-like: MT slots, tracking id, position, pressure,
+touch major, BTN_TOUCH, MSC_TIMESTAMP) replays a swipe from a child process
+while the parent counts poll() wakeups and records read from the event node.
+Kernel masking cannot be emulated with pipes, so this needs /dev/uinput and
+python-evdev (run as root or a member of the 'input' group).
+
+Usage: python3 bench/event_mask.py [--frames 600] [--hz 120] [--json out.json]
+"""
+
+import argparse, json, os, select, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from touchwake.evio import MASK_ACTIVITY, MASK_RELEVANT, apply_event_mask
+from touchwake.reader import EVENT
+
+def make_touchscreen():
+    from evdev import UInput, AbsInfo, ecodes as e  # type: ignore
+    caps = {
+        e.EV_KEY: [e.BTN_TOUCH],
+        e.EV_ABS: [
+            (e.ABS_X, AbsInfo(0, 0, 1279, 0, 0, 0)), (e.ABS_Y, AbsInfo(0, 0, 799, 0, 0, 0)),
+            (e.ABS_MT_SLOT, AbsInfo(0, 0, 9, 0, 0, 0)), (e.ABS_MT_TRACKING_ID, AbsInfo(0, 0, 65535, 0, 0, 0)),
+            (e.ABS_MT_POSITION_X, AbsInfo(0, 0, 1279, 0, 0, 0)), (e.ABS_MT_POSITION_Y, AbsInfo(0, 0, 799, 0, 0, 0)),
+            (e.ABS_MT_TOUCH_MAJOR, AbsInfo(0, 0, 255, 0, 0, 0)), (e.ABS_MT_PRESSURE, AbsInfo(0, 0, 255, 0, 0, 0)),
+        ],
+        e.EV_MSC: [e.MSC_TIMESTAMP],
+    }
+    return UInput(caps, name="bench-goodix-ts", input_props=[e.INPUT_PROP_DIRECT]), e
+
+def swipe(ui, e, frames, hz):
+    interval = 1.0 / hz
+    for i in range(frames):
+        if i % 100 == 0:  # new contact every 100 frames
+            ui.write(e.EV_ABS, e.ABS_MT_SLOT, 0)
+            ui.write(e.EV_ABS, e.ABS_MT_TRACKING_ID, i)
+            ui.write(e.EV_KEY, e.BTN_TOUCH, 1)
+        # Move for 70 frames, then rest the finger (only pressure/size jitter)
+        step = min(i % 100, 69) + (i // 100) * 100
+        x = 100 + (step * 7) % 1000
+        y = 300 + (step * 3) % 200
+        ui.write(e.EV_ABS, e.ABS_MT_POSITION_X, x)
+        ui.write(e.EV_ABS, e.ABS_MT_POSITION_Y, y)
+        ui.write(e.EV_ABS, e.ABS_MT_TOUCH_MAJOR, 20 + i % 5)
+        ui.write(e.EV_ABS, e.ABS_MT_PRESSURE, 40 + i % 9)
+        ui.write(e.EV_ABS, e.ABS_X, x)
+        ui.write(e.EV_ABS, e.ABS_Y, y)
+        ui.write(e.EV_MSC, e.MSC_TIMESTAMP, i * 8000)
+        ui.syn()
+        if i % 100 == 99:
+            ui.write(e.EV_ABS, e.ABS_MT_TRACKING_ID, -1)
+            ui.write(e.EV_KEY, e.BTN_TOUCH, 0)
+            ui.syn()
+        time.sleep(interval)
+
+def measure(path, mask, frames, hz, ui, e):
+    fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK | os.O_CLOEXEC)
+    masked = apply_event_mask(fd, mask) if mask is not None else False
+    poller = select.poll()
+    poller.register(fd, select.POLLIN)
+    pid = os.fork()
+    if pid == 0:
+        try:
+            swipe(ui, e, frames, hz)
+        finally:
+            os._exit(0)
+    wakeups = records = 0
+    done = False
+    while True:
+        if not poller.poll(200):
+            if done:
+                break
+            if os.waitpid(pid, os.WNOHANG)[0]:
+                done = True
+            continue
+        wakeups += 1
+        try:
+            records += len(os.read(fd, EVENT.size * 256)) // EVENT.size
+        except BlockingIOError:
+            pass
+    os.close(fd)
+    return {"wakeups": wakeups, "records": records, "mask_applied": masked}
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--frames", type=int, default=600)
+    ap.add_argument("--hz", type=float, default=120.0)
+    ap.add_argument("--json", help="write results to this file")
+    args = ap.parse_args()
+    try:
+        ui, e = make_touchscreen()
+    except Exception as ex:
+        raise SystemExit(f"uinput touchscreen unavailable ({ex}); needs /dev/uinput and python3-evdev.")
+    time.sleep(0.5)  # let udev create the node
+    results = {}
+    with ui:
+        for label, mask in (("unmasked", None), ("relevant", MASK_RELEVANT), ("activity", MASK_ACTIVITY)):
+            results[label] = measure(ui.device.path, mask, args.frames, args.hz, ui, e)
+    base = results["unmasked"]["wakeups"] or 1
+    for label, res in results.items():
+        res["wakeup_reduction_pct"] = round(100.0 * (1 - res["wakeups"] / base), 1)
+        print(f"{label:>9}: wakeups={res['wakeups']:<5} records={res['records']:<6} "
+              f"reduction={res['wakeup_reduction_pct']}% mask_applied={res['mask_applied']}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+Hardware-free rig for driving the daemon in-process.
+- FakeBacklight: temp tree imitating /sys/class/backlight/<dev>
+- PipeInputs: FIFOs named eventN in a temp input dir carrying raw input_event records
+- UinputInputs: real virtual devices through /dev/uinput (needs python-evdev + access)
+- BrightnessRecorder: timestamps every brightness write the daemon completes
+- FakeLightSensor: temp IIO device directory with a settable in_illuminance_raw
+"""
+
+import functools, os, shutil, struct, sys, tempfile, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from touchwake.backlight import Backlight
+from touchwake.config import Config
+from touchwake.daemon import Daemon
+from touchwake.devices import open_evdev_device
+
+EVENT = struct.Struct("llHHi")
+EV_SYN, EV_KEY, EV_ABS = 0x00, 0x01, 0x03
+ABS_X, ABS_MT_POSITION_X = 0x00, 0x35
+NAME_PREFIX = "bench-"
+
+class FakeBacklight:
+    def __init__(self, root, name="11-0045", max_brightness=255, brightness=255):
+        self.path = os.path.join(root, "sys", "class", "backlight", name)
+        os.makedirs(self.path)
+        for attr, value in (("max_brightness", max_brightness), ("brightness", brightness),
+                            ("actual_brightness", brightness), ("bl_power", 0)):
+            with open(os.path.join(self.path, attr), "w") as f:
+                f.write(f"{value}\n")
+        with open(os.path.join(self.path, "type"), "w") as f:
+            f.write("raw\n")
+
+    def read(self, attr="brightness"):
+        with open(os.path.join(self.path, attr)) as f:
+            return int(f.read().strip())
+
+class FakeLightSensor:
+    def __init__(self, root, name="iio:device0", lux=100.0, scale=0.5):
+        self.path = os.path.join(root, "sys", "bus", "iio", "devices", name)
+        self.scale = scale
+        os.makedirs(self.path)
+        with open(os.path.join(self.path, "in_illuminance_scale"), "w") as f:
+            f.write(f"{scale}\n")
+        self.set(lux)
+
+    def set(self, lux):
+        with open(os.path.join(self.path, "in_illuminance_raw"), "w") as f:
+            f.write(f"{round(lux / self.scale)}\n")
+
+class _PipeDevice:
+    """Duck-types the bits of evdev.InputDevice the daemon uses."""
+    def __init__(self, path):
+        self.path = path
+        # O_RDWR keeps the FIFO open without a writer (no EOF/HUP storms)
+        self.fd = os.open(path, os.O_RDWR | os.O_NONBLOCK | os.O_CLOEXEC)
+        self.name = NAME_PREFIX + os.path.basename(path)
+
+    def close(self):
+        os.close(self.fd)
+
+class PipeInputs:
+    kind = "pipe"
+
+    def __init__(self, root, count):
+        self.input_dir = os.path.join(root, "input")
+        os.makedirs(self.input_dir)
+        self.paths = []
+        for i in range(count):
+            path = os.path.join(self.input_dir, f"event{i}")
+            os.mkfifo(path)
+            self.paths.append(path)
+        self._writers = {}
+
+    @staticmethod
+    def open_device(path):
+        return _PipeDevice(path)
+
+    def inject(self, index=0, ev_type=EV_ABS, code=ABS_X, value=100):
+        """Write one event + SYN_REPORT; returns the monotonic injection time."""
+        fd = self._writers.get(index)
+        if fd is None:
+            fd = self._writers[index] = os.open(self.paths[index], os.O_WRONLY | os.O_NONBLOCK | os.O_CLOEXEC)
+        now = time.monotonic()
+        sec = int(now)
+        usec = int((now - sec) * 1e6)
+        try:
+            os.write(fd, EVENT.pack(sec, usec, ev_type, code, value) + EVENT.pack(sec, usec, EV_SYN, 0, 0))
+        except BlockingIOError:
+            pass  # reader quiesced and FIFO full; a kernel evdev buffer would drop too
+        return now
+
+    def close(self):
+        for fd in self._writers.values():
+            os.close(fd)
+        self._writers.clear()
+
+class UinputInputs:
+    kind = "uinput"
+    input_dir = "/dev/input"
+
+    def __init__(self, root, count):
+        from evdev import UInput, AbsInfo, ecodes  # type: ignore
+        caps = {ecodes.EV_KEY: [ecodes.BTN_TOUCH],
+                ecodes.EV_ABS: [(ecodes.ABS_X, AbsInfo(0, 0, 4095, 0, 0, 0))]}
+        self.devices = [UInput(caps, name=f"{NAME_PREFIX}touch-{i}", input_props=[ecodes.INPUT_PROP_DIRECT])
+                        for i in range(count)]
+        time.sleep(0.5)  # let udev create the nodes and fix permissions
+
+    @staticmethod
+    def open_device(path):
+        dev = open_evdev_device(path)
+        if dev is not None and not (dev.name or "").startswith(NAME_PREFIX):
+            dev.close()  # ignore the host's real input devices
+            return None
+        return dev
+
+    def inject(self, index=0, ev_type=EV_ABS, code=ABS_X, value=100):
+        ui = self.devices[index]
+        now = time.monotonic()
+        ui.write(ev_type, code, value)
+        ui.syn()
+        return now
+
+    def close(self):
+        for ui in self.devices:
+            ui.close()
+
+class BrightnessRecorder:
+    """Wraps Backlight.set_brightness to log (completion time, value) of real writes."""
+    def __init__(self, backlight, clock=time.monotonic):
+        self.writes = []
+        original = backlight.set_brightness
+        def set_brightness(val):
+            written = original(val)
+            if written:
+                self.writes.append((clock(), int(val)))
+            return written
+        backlight.set_brightness = set_brightness
+
+class Rig:
+    """Temp tree + fake backlight + virtual inputs + configured (not yet started) Daemon."""
+
+    def __init__(self, devices=1, prefer_uinput=True, **config):
+        self.root = tempfile.mkdtemp(prefix="touchwake-bench-")
+        self.backlight = FakeBacklight(self.root)
+        self.inputs = None
+        if prefer_uinput and os.access("/dev/uinput", os.W_OK):
+            try:
+                self.inputs = UinputInputs(self.root, devices)
+            except Exception as e:
+                print(f"uinput unavailable ({e}); using FIFOs", file=sys.stderr)
+        if self.inputs is None:
+            self.inputs = PipeInputs(self.root, devices)
+        values = {"bl_base": self.backlight.path, "input_dir": self.inputs.input_dir,
+                  "metrics_file": os.path.join(self.root, "metrics.prom"),
+                  "control_socket": os.path.join(self.root, "control.sock"),
+                  "energy_file": os.path.join(self.root, "energy.bin"),
+                  "inhibit_dir": os.path.join(self.root, "inhibit")}
+        values.update(config)
+        self.config = Config(**values)
+        self.daemon = Daemon(self.config, open_device=self.inputs.open_device,
+                             open_backlight=functools.partial(Backlight, truncate=True))
+        self.recorder = None
+
+    def start(self):
+        self.daemon.start()
+        self.recorder = BrightnessRecorder(self.daemon.primary.backlight)
+
+    def run_for(self, seconds):
+        loop = self.daemon.loop
+        loop.call_later(seconds, loop.stop)
+        loop.run()
+
+    def close(self):
+        self.daemon.close()
+        self.inputs.close()
+        shutil.rmtree(self.root, ignore_errors=True)
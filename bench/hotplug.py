@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hotplug check: creates and removes event nodes in the FIFO input dir
+(harness.PipeInputs, standing in for /dev/input) while the daemon runs and
+asserts which devices end up registered.
+
+Checked with inotify (event-driven) and then in the glob-rescan fallback (the
+input dir is moved away, which drops the watch, and moved back):
+  - a new node is registered, a removed one unregistered
+  - a node the opener rejects is negative-cached: not reopened on IN_ATTRIB or
+    rescans, only once it is replaced by a new node
+Also reported: node created -> registered latency per mode. Exits 1 if a check fails.
+
+Usage: python3 bench/hotplug.py [--rescan-interval 0.2] [--json out.json]
+"""
+
+import argparse, json, os, time
+
+from harness import PipeInputs, Rig
+
+IRRELEVANT = "event7"  # the opener treats this node like a non-input device
+
+class CountingOpener:
+    """PipeInputs.open_device that counts opens per node and rejects IRRELEVANT."""
+    def __init__(self):
+        self.opens = {}
+
+    def __call__(self, path):
+        self.opens[path] = self.opens.get(path, 0) + 1
+        if os.path.basename(path) == IRRELEVANT:
+            return None
+        return PipeInputs.open_device(path)
+
+def report(results, failed, name, ok):
+    results[name] = ok
+    print(f"{'ok' if ok else 'FAIL':<6}{name}")
+    if not ok:
+        failed.append(name)
+
+def run_until(rig, predicate, timeout):
+    """Run the daemon's loop until predicate() holds; (held, seconds waited)."""
+    t0 = time.monotonic()
+    while not predicate() and time.monotonic() - t0 < timeout:
+        rig.run_for(0.005)
+    return predicate(), time.monotonic() - t0
+
+def check_mode(rig, opener, mode, timeout, results, failed):
+    """Add/remove/negative-cache checks in the current hotplug mode."""
+    daemon, input_dir = rig.daemon, rig.inputs.input_dir
+    node = os.path.join(input_dir, "event3")
+    junk = os.path.join(input_dir, IRRELEVANT)
+    check = lambda name, ok: report(results, failed, f"{mode}: {name}", ok)
+    opener.opens.clear()
+
+    os.mkfifo(node)
+    ok, waited = run_until(rig, lambda: node in daemon.devices, timeout)
+    results[f"{mode}_register_ms"] = round(waited * 1000.0, 3)
+    check("new node registered", ok)
+    print(f"      {mode}: node created -> registered in {waited * 1000.0:.1f} ms")
+    os.unlink(node)
+    ok, _ = run_until(rig, lambda: node not in daemon.devices, timeout)
+    check("removed node unregistered", ok and node not in daemon.watcher.registered)
+
+    os.mkfifo(junk)
+    ok, _ = run_until(rig, lambda: junk in daemon.watcher.ignored, timeout)
+    check("rejected node negative-cached", ok and junk not in daemon.devices and opener.opens.get(junk) == 1)
+    os.chmod(junk, 0o600)  # IN_ATTRIB, as udev fixing permissions would
+    run_until(rig, lambda: False, 0.05)
+    daemon.watcher.rescan()
+    check("negative-cached node not reopened on IN_ATTRIB/rescan", opener.opens.get(junk) == 1)
+    os.mkfifo(junk + ".new")
+    os.replace(junk + ".new", junk)  # a new node (new inode) under the same name
+    ok, _ = run_until(rig, lambda: opener.opens.get(junk) == 2, timeout)
+    check("replaced node examined again", ok and junk in daemon.watcher.ignored)
+    os.unlink(junk)
+    ok, _ = run_until(rig, lambda: junk not in daemon.watcher.ignored, timeout)
+    check("removed node leaves the negative cache", ok)
+
+    check("initial node still registered", rig.inputs.paths[0] in daemon.devices)
+
+def main():
+    ap = argparse.ArgumentParser(description="Register/unregister checks for input hotplug (inotify and rescan fallback)")
+    ap.add_argument("--rescan-interval", type=float, default=0.2, help="fallback rescan period in seconds")
+    ap.add_argument("--json", help="write results to this file")
+    args = ap.parse_args()
+
+    rig = Rig(devices=1, prefer_uinput=False, rescan_interval=args.rescan_interval)
+    opener = CountingOpener()
+    rig.daemon.open_device = opener
+    results = {}
+    failed = []
+    try:
+        rig.start()
+        daemon, input_dir = rig.daemon, rig.inputs.input_dir
+        timeout = max(1.0, 5 * args.rescan_interval)
+        print(f"hotplug={'inotify' if daemon.watcher.event_driven else 'rescan'}, input dir {input_dir}")
+        if not daemon.watcher.event_driven:
+            raise SystemExit("ERROR: inotify unavailable; the event-driven path cannot be checked.")
+        check_mode(rig, opener, "inotify", timeout, results, failed)
+
+        # Moving the directory drops the watch (IN_MOVE_SELF): the daemon falls back to rescans
+        moved = input_dir + ".moved"
+        os.rename(input_dir, moved)
+        ok, _ = run_until(rig, lambda: daemon._watch_fd is None and not daemon.devices, timeout)
+        report(results, failed, "watch lost: rescan fallback, devices dropped", ok)
+        os.rename(moved, input_dir)
+        ok, _ = run_until(rig, lambda: rig.inputs.paths[0] in daemon.devices, timeout)
+        report(results, failed, "rescan: nodes back once the dir returns", ok)
+        check_mode(rig, opener, "rescan", timeout, results, failed)
+    finally:
+        rig.close()
+    results["failed"] = len(failed)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if failed:
+        raise SystemExit(f"FAIL: {len(failed)} hotplug check(s) failed")
+
+if __name__ == "__main__":
+    main()
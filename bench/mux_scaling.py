@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compare the poll and epoll input backends with N attached input devices.
+A few "noisy" devices emit a sustained touch storm from a child process while
+the rest stay silent; for each backend and N the loop process reports CPU per
+second of wall time and event latency (event timestamp -> handler). With
++quiesce the latency includes the deliberate deferral of already-active devices.
+
+Devices are created through /dev/uinput when python-evdev and uinput are
+available, otherwise pipes carrying raw struct input_event records stand in.
+
+Usage: python3 bench/mux_scaling.py [--max-devices 512] [--duration 2] [--rate 250] [--json out.json]
+"""
+
+import argparse, json, os, resource, signal, struct, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from touchwake.eventloop import EventLoop
+from touchwake.evio import set_clock_monotonic
+from touchwake.mux import make_mux
+
+EVENT = struct.Struct("llHHi")
+EV_SYN, EV_ABS, ABS_X = 0, 3, 0
+
+def _raise_fd_limit():
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+class PipeDevices:
+    kind = "pipe"
+
+    def __init__(self, n):
+        self.read_fds, self.write_fds = [], []
+        for _ in range(n):
+            r, w = os.pipe2(os.O_NONBLOCK | os.O_CLOEXEC)
+            self.read_fds.append(r)
+            self.write_fds.append(w)
+
+    def emit(self, i, value):
+        now = time.monotonic()
+        sec = int(now)
+        usec = int((now - sec) * 1e6)
+        try:
+            os.write(self.write_fds[i], EVENT.pack(sec, usec, EV_ABS, ABS_X, value) + EVENT.pack(sec, usec, EV_SYN, 0, 0))
+        except BlockingIOError:
+            pass  # reader quiesced and pipe full; the kernel evdev buffer would drop as well
+
+    def close(self):
+        for fd in self.read_fds + self.write_fds:
+            os.close(fd)
+
+class UinputDevices:
+    kind = "uinput"
+
+    def __init__(self, n):
+        from evdev import UInput, AbsInfo, ecodes  # type: ignore
+        caps = {ecodes.EV_ABS: [(ecodes.ABS_X, AbsInfo(0, 0, 4095, 0, 0, 0))]}
+        self.devices = [UInput(caps, name=f"bench-touch-{i}") for i in range(n)]
+        time.sleep(0.5)  # let udev create the nodes
+        self.read_fds = []
+        for ui in self.devices:
+            fd = os.open(ui.device.path, os.O_RDONLY | os.O_NONBLOCK | os.O_CLOEXEC)
+            set_clock_monotonic(fd)
+            self.read_fds.append(fd)
+
+    def emit(self, i, value):
+        ui = self.devices[i]
+        ui.write(EV_ABS, ABS_X, value)
+        ui.syn()
+
+    def close(self):
+        for fd in self.read_fds:
+            os.close(fd)
+        for ui in self.devices:
+            ui.close()
+
+def open_devices(n, force_pipes):
+    if not force_pipes and os.access("/dev/uinput", os.W_OK):
+        try:
+            return UinputDevices(n)
+        except Exception as e:
+            print(f"uinput unavailable ({e}); using pipes", file=sys.stderr)
+    return PipeDevices(n)
+
+def _storm(devs, noisy, rate, duration):
+    interval = 1.0 / rate
+    end = time.monotonic() + duration
+    value = 0
+    while time.monotonic() < end:
+        value = (value + 7) % 4096
+        for i in range(noisy):
+            devs.emit(i, value)
+        time.sleep(interval)
+
+def run_case(backend, n, noisy, rate, duration, quiesce, force_pipes):
+    devs = open_devices(n, force_pipes)
+    loop = EventLoop(mux=make_mux(backend))
+    latencies = []
+    buf_size = EVENT.size * 64
+
+    def make_reader(fd):
+        def on_readable():
+            now = time.monotonic()
+            try:
+                data = os.read(fd, buf_size)
+            except BlockingIOError:
+                return
+            if data:
+                sec, usec = EVENT.unpack_from(data, 0)[:2]
+                latencies.append(now - (sec + usec * 1e-6))
+                if quiesce:
+                    loop.disarm_reader(fd)
+        return on_readable
+
+    for fd in devs.read_fds:
+        loop.add_reader(fd, make_reader(fd))
+    if quiesce:
+        def rearm():
+            for fd in devs.read_fds:
+                loop.arm_reader(fd)
+            loop.call_later(1.0, rearm)
+        loop.call_later(1.0, rearm)
+
+    pid = os.fork()
+    if pid == 0:
+        try:
+            _storm(devs, noisy, rate, duration)
+        finally:
+            os._exit(0)
+    loop.call_later(duration, loop.stop)
+    ru0 = resource.getrusage(resource.RUSAGE_SELF)
+    t0 = time.monotonic()
+    loop.run()
+    wall = time.monotonic() - t0
+    ru1 = resource.getrusage(resource.RUSAGE_SELF)
+    os.waitpid(pid, 0)
+    devs.close()
+    loop.mux.close()
+
+    cpu = (ru1.ru_utime - ru0.ru_utime) + (ru1.ru_stime - ru0.ru_stime)
+    latencies.sort()
+    pct = lambda p: round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1e6, 1) if latencies else None
+    return {"backend": backend + ("+quiesce" if quiesce else ""), "devices": n, "source": devs.kind,
+            "cpu_per_s": round(cpu / wall, 4), "iterations_per_s": round(loop.iterations / wall, 1),
+            "reads": len(latencies), "latency_p50_us": pct(0.50), "latency_p99_us": pct(0.99)}
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--max-devices", type=int, default=512)
+    ap.add_argument("--noisy", type=int, default=4, help="devices emitting the storm")
+    ap.add_argument("--rate", type=float, default=250.0, help="events per second per noisy device")
+    ap.add_argument("--duration", type=float, default=2.0)
+    ap.add_argument("--pipes", action="store_true", help="force the pipe stand-in instead of uinput")
+    ap.add_argument("--json", help="write results to this file")
+    args = ap.parse_args()
+
+    _raise_fd_limit()
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+    results = []
+    n = 1
+    while n <= args.max_devices:
+        for backend, quiesce in (("poll", False), ("epoll", False), ("epoll", True)):
+            res = run_case(backend, n, min(args.noisy, n), args.rate, args.duration, quiesce, args.pipes)
+            results.append(res)
+            print(f"{res['backend']:>14} n={n:<4} cpu/s={res['cpu_per_s']:<7} it/s={res['iterations_per_s']:<8} "
+                  f"p50={res['latency_p50_us']}us p99={res['latency_p99_us']}us ({res['source']})", flush=True)
+        n *= 2
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
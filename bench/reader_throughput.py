@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark: raw batch reader (touchwake.reader.EventReader) vs. the
+previous per-event path (python-evdev style: one InputEvent per record, then
+is_relevant_event on each).
+
+Input traces are raw `struct input_event` buffers. Built-in synthetic traces
+imitate a Goodix multi-touch swipe, keyboard typing and non-relevant noise;
+real recordings can be added with --trace FILE (e.g. captured via
+`cat /dev/input/eventN > swipe.bin`). Each buffer is pushed through a pipe in
+64 KiB chunks and only the reading side is timed.
+
+Usage: python3 bench/reader_throughput.py [--rounds 200] [--trace FILE ...] [--json out.json]
+"""
+
+import argparse, json, os, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from touchwake.reader import EVENT, EV_ABS, EV_KEY, EV_REL, EventReader
+
+EV_SYN, EV_MSC = 0x00, 0x04
+ABS_X, ABS_Y, ABS_MT_SLOT, ABS_MT_POSITION_X, ABS_MT_POSITION_Y, ABS_MT_TRACKING_ID = 0x00, 0x01, 0x2f, 0x35, 0x36, 0x39
+MSC_SCAN = 0x04
+CHUNK = (65536 // EVENT.size) * EVENT.size
+
+try:
+    from evdev import InputEvent  # type: ignore
+except Exception:
+    class InputEvent:
+        """Stand-in with python-evdev's constructor cost profile."""
+        __slots__ = ("sec", "usec", "type", "code", "value")
+        def __init__(self, sec, usec, type, code, value):
+            self.sec, self.usec, self.type, self.code, self.value = sec, usec, type, code, value
+
+def _pack(records):
+    return b"".join(EVENT.pack(*r) for r in records)
+
+def trace_swipe(frames=2000):
+    recs, t = [], 1_000_000
+    for i in range(frames):
+        sec, usec = divmod(t + i * 8000, 1_000_000)
+        recs += [(sec, usec, EV_ABS, ABS_MT_SLOT, 0)]
+        if i == 0:
+            recs += [(sec, usec, EV_ABS, ABS_MT_TRACKING_ID, 17), (sec, usec, EV_KEY, 0x14a, 1)]
+        recs += [(sec, usec, EV_ABS, ABS_MT_POSITION_X, 100 + i % 600), (sec, usec, EV_ABS, ABS_MT_POSITION_Y, 300),
+                 (sec, usec, EV_ABS, ABS_X, 100 + i % 600), (sec, usec, EV_ABS, ABS_Y, 300), (sec, usec, EV_SYN, 0, 0)]
+    return _pack(recs)
+
+def trace_typing(keys=2000):
+    recs = []
+    for i in range(keys):
+        sec, usec = divmod(i * 90000, 1_000_000)
+        for value in (1, 0):
+            recs += [(sec, usec, EV_MSC, MSC_SCAN, 0x70004 + i % 26), (sec, usec, EV_KEY, 30 + i % 26, value), (sec, usec, EV_SYN, 0, 0)]
+    return _pack(recs)
+
+def trace_noise(count=10000):
+    recs = []
+    for i in range(count):
+        sec, usec = divmod(i * 1000, 1_000_000)
+        recs += [(sec, usec, EV_MSC, MSC_SCAN, i), (sec, usec, EV_SYN, 0, 0)]
+    return _pack(recs)
+
+def is_relevant_event(e):
+    if e.type == EV_KEY:
+        return e.value in (1, 2)
+    if e.type == EV_REL:
+        return True
+    if e.type == EV_ABS:
+        return True
+    return False
+
+RELEVANT_TYPES = {EV_KEY, EV_REL, EV_ABS}
+
+def read_legacy(fd):
+    """Previous hot path: build every event object, test each one."""
+    any_relevant = False
+    while True:
+        try:
+            data = os.read(fd, 24 * 1024)
+        except BlockingIOError:
+            break
+        if not data:
+            break
+        for rec in EVENT.iter_unpack(data):
+            e = InputEvent(*rec)
+            if e.type in RELEVANT_TYPES and is_relevant_event(e):
+                any_relevant = True
+    return any_relevant
+
+def run(name, buf, rounds):
+    r, w = os.pipe2(os.O_NONBLOCK | os.O_CLOEXEC)
+    reader = EventReader(r)
+    chunks = [buf[i:i + CHUNK] for i in range(0, len(buf), CHUNK)]
+    events = len(buf) // EVENT.size
+    results = {"trace": name, "events": events}
+    for label, fn in (("legacy", lambda: read_legacy(r)), ("raw", reader.read_activity)):
+        elapsed = 0.0
+        for _ in range(rounds):
+            for chunk in chunks:
+                os.write(w, chunk)
+                t0 = time.perf_counter()
+                fn()
+                elapsed += time.perf_counter() - t0
+        results[f"{label}_ns_per_event"] = round(elapsed / (events * rounds) * 1e9, 1)
+    results["speedup"] = round(results["legacy_ns_per_event"] / results["raw_ns_per_event"], 1)
+    os.close(r)
+    os.close(w)
+    return results
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--rounds", type=int, default=200)
+    ap.add_argument("--trace", action="append", default=[], help="raw input_event recording (repeatable)")
+    ap.add_argument("--json", help="write results to this file")
+    args = ap.parse_args()
+    traces = [("swipe", trace_swipe()), ("typing", trace_typing()), ("noise", trace_noise())]
+    for path in args.trace:
+        with open(path, "rb") as f:
+            data = f.read()
+        traces.append((os.path.basename(path), data[:len(data) - len(data) % EVENT.size]))
+    results = [run(name, buf, args.rounds) for name, buf in traces]
+    for res in results:
+        print(f"{res['trace']:>10}: {res['events']:>6} events  legacy={res['legacy_ns_per_event']:>7} ns/ev  "
+              f"raw={res['raw_ns_per_event']:>6} ns/ev  x{res['speedup']}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Replays a synthetic week of activity through the idle/wake logic
+(touchwake/replay.py) and reports the replay speed.
+
+The log is written with the daemon's Recorder under a fake clock: office-hour
+sessions of bursty touches and typing on two devices, quiet nights and one
+stray touch at 03:00 per night. It is replayed twice with the default config
+(plus --idle); the two decision lists must be identical (determinism).
+
+Usage: python3 bench/replay_week.py [--days 7] [--idle 30] [--seed 1] [--json out.json]
+"""
+
+import argparse, json, os, random, sys, tempfile, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from touchwake.config import Config
+from touchwake.record import Recorder
+from touchwake.replay import replay
+
+class FakeDev:
+    def __init__(self, name, phys):
+        self.name, self.phys = name, phys
+
+def write_week(path, days, seed):
+    """Returns the number of activity records written."""
+    rng = random.Random(seed)
+    start = time.mktime(time.strptime("2026-01-05 00:00:00", "%Y-%m-%d %H:%M:%S"))  # a Monday
+    now = [start]
+    rec = Recorder(path, clock=lambda: now[0])
+    rec.device("/dev/input/event0", FakeDev("Goodix Capacitive TouchScreen", ""))
+    rec.device("/dev/input/event1", FakeDev("USB Keyboard", "usb-0000:01:00.0-1.2/input0"))
+    events = 0
+    for day in range(days):
+        midnight = start + day * 86400
+        # Stray touch (cleaning, cat, EMI) at 03:00
+        rec.activity("/dev/input/event0", midnight + 3 * 3600 + rng.uniform(0, 60), 2)
+        events += 1
+        if day % 7 >= 5:
+            continue  # weekend
+        t = midnight + 8 * 3600 + rng.uniform(0, 1800)
+        while t < midnight + 18 * 3600:
+            # A session of bursts, then a pause long enough to sleep most of the time
+            for _ in range(rng.randint(5, 60)):
+                dev = "/dev/input/event0" if rng.random() < 0.7 else "/dev/input/event1"
+                rec.activity(dev, t, rng.randint(1, 40))
+                events += 1
+                t += rng.expovariate(1 / 4.0)
+            t += rng.expovariate(1 / 600.0)
+    rec.close()
+    return events
+
+def main():
+    ap = argparse.ArgumentParser(description="Replay a synthetic week of activity under a simulated clock")
+    ap.add_argument("--days", type=int, default=7)
+    ap.add_argument("--idle", type=int, default=30, help="idle_seconds for the replay")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--json", help="write results to this file")
+    args = ap.parse_args()
+
+    config = Config(idle_seconds=args.idle, fade_in_ms=80, fade_out_ms=300)
+    with tempfile.TemporaryDirectory(prefix="touchwake-replay-") as root:
+        path = os.path.join(root, "activity.log")
+        events = write_week(path, args.days, args.seed)
+        runs = []
+        for _ in range(2):
+            lines = []
+            summary = replay(config, [path], out=lines.append)
+            runs.append((summary, lines))
+        size = os.path.getsize(path)
+    summary, lines = runs[0]
+    sleeps = sum(" SLEEP " in line for line in lines)
+    night_wakes = sum(" WAKE " in line and line[11:13] in ("00", "01", "02", "03", "04", "05") for line in lines)
+    results = {"days": args.days, "activity_records": events, "log_bytes": size,
+               "decisions": summary["decisions"], "sleeps": sleeps, "night_wakes": night_wakes,
+               "replay_seconds": summary["replay_seconds"],
+               "speedup": summary["simulated_seconds"] / max(summary["replay_seconds"], 1e-9),
+               "deterministic": runs[0][1] == runs[1][1]}
+    for key, value in results.items():
+        print(f"{key:>18}: {value:.3f}" if isinstance(value, float) else f"{key:>18}: {value}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
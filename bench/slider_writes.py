@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Brightness writes issued per GUI slider drag: synchronous write per Tk motion
+callback (previous GUI) vs CoalescedWriter (touchwake/coalesce.py).
+
+A drag is replayed as motion callbacks at --motion-hz for --drag-ms, sweeping
+the slider from 0 to 100 % (then back to 50 %), followed by the release. Both
+variants use the GUI's percent -> raw mapping. Reported per variant: sysfs writes, time spent on
+the calling (Tk) thread and whether the final value landed. By default the
+target is a temp file; pass a real attribute (--path
+/sys/class/backlight/<dev>/brightness, group 'video') to include controller latency.
+
+Usage: python3 bench/slider_writes.py [--drag-ms 1500] [--motion-hz 125] [--hz 60] [--max 255] [--json out.json]
+"""
+
+import argparse, json, os, sys, tempfile, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from touchwake.coalesce import CoalescedWriter
+
+MIN_USER_BRIGHTNESS = 4  # as in gui/touch-wake-settings.py
+
+def percent_to_raw(percent, max_raw):
+    if percent <= 0:
+        return MIN_USER_BRIGHTNESS
+    return MIN_USER_BRIGHTNESS + round((percent / 100.0) * (max_raw - MIN_USER_BRIGHTNESS))
+
+def drag_values(drag_ms, motion_hz):
+    """Full sweep up, then back to 50 % (the final value is shorter than the maximum)."""
+    n = max(2, int(drag_ms / 1000.0 * motion_hz))
+    up = [100.0 * i / (n - 1) for i in range(n)]
+    return up + [100.0 - 50.0 * i / (n // 4) for i in range(1, n // 4 + 1)]
+
+def replay(values, motion_hz, on_motion, on_release):
+    """Call on_motion per value at motion_hz, then on_release; returns seconds spent inside the callbacks."""
+    period = 1.0 / motion_hz
+    busy = 0.0
+    t_next = time.monotonic()
+    for v in values:
+        t0 = time.monotonic()
+        on_motion(v)
+        busy += time.monotonic() - t0
+        t_next += period
+        time.sleep(max(0.0, t_next - time.monotonic()))
+    t0 = time.monotonic()
+    on_release(values[-1])
+    return busy + time.monotonic() - t0
+
+def run_sync(path, values, args):
+    writes = 0
+    def write(v):
+        nonlocal writes
+        with open(path, "w") as f:
+            f.write(str(percent_to_raw(v, args.max)))
+        writes += 1
+    busy = replay(values, args.motion_hz, write, write)
+    return {"writes": writes, "ui_thread_ms": busy * 1000.0}
+
+def run_coalesced(path, values, args):
+    writer = CoalescedWriter(path, max_hz=args.hz, truncate=True)
+    try:
+        busy = replay(values, args.motion_hz, lambda v: writer.set(percent_to_raw(v, args.max)),
+                      lambda v: writer.commit(percent_to_raw(v, args.max)))
+        return {"writes": writer.writes, "skipped": writer.skipped, "ui_thread_ms": busy * 1000.0}
+    finally:
+        writer.close()
+
+def main():
+    ap = argparse.ArgumentParser(description="Brightness writes per slider drag (sync vs coalesced)")
+    ap.add_argument("--drag-ms", type=float, default=1500.0)
+    ap.add_argument("--motion-hz", type=float, default=125.0, help="Tk motion callbacks per second")
+    ap.add_argument("--hz", type=float, default=60.0, help="coalesced write rate limit")
+    ap.add_argument("--max", type=int, default=255, help="max_brightness of the emulated backlight")
+    ap.add_argument("--path", help="brightness attribute to write (default: temp file)")
+    ap.add_argument("--json", help="write results to this file")
+    args = ap.parse_args()
+
+    values = drag_values(args.drag_ms, args.motion_hz)
+    final = str(percent_to_raw(values[-1], args.max))
+    results = {"motion_callbacks": len(values)}
+    with tempfile.TemporaryDirectory(prefix="touchwake-slider-") as root:
+        path = args.path or os.path.join(root, "brightness")
+        for label, fn in (("sync", run_sync), ("coalesced", run_coalesced)):
+            with open(path, "w") as f:
+                f.write("0")
+            res = fn(path, values, args)
+            with open(path) as f:
+                res["final_ok"] = f.read().strip() == final
+            results[label] = res
+            print(f"{label:>9}: writes/drag={res['writes']:<4} ui_thread={res['ui_thread_ms']:.2f} ms "
+                  f"final_ok={res['final_ok']}")
+    print(f"motion callbacks/drag: {len(values)}; writes reduced "
+          f"{results['sync']['writes']} -> {results['coalesced']['writes']}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
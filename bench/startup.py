@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Time from process spawn to systemd READY=1, the moment the daemon has its
+devices registered and the idle timer armed.
+
+The daemon runs in a fresh interpreter with NOTIFY_SOCKET pointing at a
+datagram socket owned by this script, against a fake sysfs backlight and
+FIFO input nodes (see harness.py).
+  cold: empty bytecode cache (PYTHONPYCACHEPREFIX = new temp dir), i.e. first start after install/upgrade
+  warm: bytecode cached, i.e. a normal (re)start
+With python-evdev and a writable /dev/uinput, --launcher runs the real service
+entry point against uinput devices instead of the FIFO stand-in.
+
+Usage: python3 bench/startup.py [--runs 10] [--devices 4] [--target-ms 100] [--json out.json]
+"""
+
+import argparse, json, os, socket, subprocess, sys, tempfile, time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+LAUNCHER = os.path.join(REPO_DIR, "daemon", "touch-wake-display.py")
+
+# Child for the FIFO stand-in: main() minus argparse, with a plain-fd opener
+CHILD = r"""
+import functools, os, sys
+sys.path.insert(0, sys.argv[1])
+from touchwake.backlight import Backlight
+from touchwake.config import Config
+from touchwake.daemon import Daemon, install_signal_handlers
+from touchwake.sdnotify import Notifier
+
+class PipeDevice:
+    def __init__(self, path):
+        self.path, self.name = path, "bench-" + os.path.basename(path)
+        self.fd = os.open(path, os.O_RDWR | os.O_NONBLOCK | os.O_CLOEXEC)
+    def close(self):
+        os.close(self.fd)
+
+notifier = Notifier()
+daemon = Daemon(Config.from_file(sys.argv[2]), open_device=PipeDevice, conf_path=sys.argv[2], notifier=notifier,
+                open_backlight=functools.partial(Backlight, truncate=True))
+daemon.start()
+install_signal_handlers(daemon)
+notifier.notify("READY=1")
+try:
+    daemon.run()
+finally:
+    daemon.close()
+"""
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(pct / 100.0 * (len(ordered) - 1)))]
+
+def make_tree(root, devices, uinput):
+    bl = os.path.join(root, "backlight")
+    os.makedirs(bl)
+    for attr, value in (("max_brightness", 255), ("brightness", 255), ("actual_brightness", 255), ("bl_power", 0)):
+        with open(os.path.join(bl, attr), "w") as f:
+            f.write(f"{value}\n")
+    input_dir = "/dev/input" if uinput else os.path.join(root, "input")
+    if not uinput:
+        os.makedirs(input_dir)
+        for i in range(devices):
+            os.mkfifo(os.path.join(input_dir, f"event{i}"))
+    conf = os.path.join(root, "touch-wake-display.conf")
+    with open(conf, "w") as f:
+        f.write("[touchwake]\n"
+                f"bl_base = {bl}\ninput_dir = {input_dir}\n"
+                f"metrics_file = {os.path.join(root, 'metrics.prom')}\n"
+                f"control_socket = {os.path.join(root, 'control.sock')}\n"
+                f"energy_file = {os.path.join(root, 'energy.bin')}\n"
+                f"inhibit_dir = {os.path.join(root, 'inhibit')}\n"
+                f"device_cache = {os.path.join(root, 'devices.json')}\n")
+    return conf
+
+def time_to_ready(cmd, env, notify_sock, timeout=10.0):
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    try:
+        notify_sock.settimeout(timeout)
+        while True:
+            try:
+                msg = notify_sock.recv(4096)
+            except socket.timeout:
+                raise SystemExit(f"ERROR: no READY=1 within {timeout}s: {proc.stderr.read1(4096).decode()}")
+            if b"READY=1" in msg.split(b"\n"):
+                return (time.perf_counter() - t0) * 1000.0
+    finally:
+        proc.terminate()
+        proc.wait(timeout=5)
+        proc.stderr.close()
+
+def run(mode, args, conf, notify_path, notify_sock, launcher):
+    samples = []
+    for _ in range(args.runs):
+        env = dict(os.environ, NOTIFY_SOCKET=notify_path)
+        env.pop("PYTHONDONTWRITEBYTECODE", None)
+        with tempfile.TemporaryDirectory(prefix="touchwake-pyc-") as pyc:
+            if mode == "cold":
+                env["PYTHONPYCACHEPREFIX"] = pyc  # nothing cached yet; compiled files land here
+            if launcher:
+                cmd = [sys.executable, LAUNCHER, "--config", conf]
+            else:
+                cmd = [sys.executable, "-c", CHILD, REPO_DIR, conf]
+            samples.append(time_to_ready(cmd, env, notify_sock))
+    return {"p50_ms": percentile(samples, 50), "p95_ms": percentile(samples, 95), "min_ms": min(samples)}
+
+def main():
+    ap = argparse.ArgumentParser(description="Spawn-to-READY startup benchmark (cold/warm bytecode cache)")
+    ap.add_argument("--runs", type=int, default=10)
+    ap.add_argument("--devices", type=int, default=4, help="FIFO input nodes (ignored with --launcher)")
+    ap.add_argument("--launcher", action="store_true", help="real entry point + uinput devices (needs evdev)")
+    ap.add_argument("--target-ms", type=float, default=100.0, help="fail if warm p50 exceeds this")
+    ap.add_argument("--json", help="write results to this file")
+    args = ap.parse_args()
+
+    uinputs = []
+    if args.launcher:
+        from evdev import UInput, AbsInfo, ecodes  # type: ignore
+        caps = {ecodes.EV_KEY: [ecodes.BTN_TOUCH], ecodes.EV_ABS: [(ecodes.ABS_X, AbsInfo(0, 0, 4095, 0, 0, 0))]}
+        uinputs = [UInput(caps, name=f"bench-touch-{i}", input_props=[ecodes.INPUT_PROP_DIRECT])
+                   for i in range(args.devices)]
+        time.sleep(0.5)
+    try:
+        with tempfile.TemporaryDirectory(prefix="touchwake-startup-") as root:
+            conf = make_tree(root, args.devices, bool(uinputs))
+            notify_path = os.path.join(root, "notify.sock")
+            with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as notify_sock:
+                notify_sock.bind(notify_path)
+                results = {"launcher": bool(uinputs), "devices": args.devices, "runs": args.runs}
+                for mode in ("cold", "warm"):
+                    results[mode] = run(mode, args, conf, notify_path, notify_sock, bool(uinputs))
+                    r = results[mode]
+                    print(f"{mode}: p50={r['p50_ms']:.1f} ms  p95={r['p95_ms']:.1f} ms  min={r['min_ms']:.1f} ms")
+    finally:
+        for ui in uinputs:
+            ui.close()
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if results["warm"]["p50_ms"] > args.target_ms:
+        print(f"FAIL: warm start p50 {results['warm']['p50_ms']:.1f} ms > target {args.target_ms:.0f} ms")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
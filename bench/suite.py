@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hardware-free regression suite for the idle/wake daemon.
+
+Runs the real Daemon in-process against a fake sysfs backlight and virtual
+input devices (uinput when writable, FIFO stand-ins otherwise; see harness.py).
+Events are injected from a forked child so the parent's CPU accounting only
+covers the daemon.
+
+Metrics (lower is better):
+  wake_latency_ms      event injected -> first non-zero brightness write (p50/p95/max)
+  sleep_error_ms       |sleep write - (last event + idle_seconds)| (mean/max)
+  idle_cpu_s_per_hour  CPU seconds while asleep, extrapolated to one hour
+  idle_wakeups_per_hour  event loop iterations while asleep, extrapolated
+  storm_cpu_pct        daemon CPU during a sustained multi-device touch storm
+  startup_ms           Daemon.start() wall time with all devices present (median)
+  import_ms            cold `import touchwake.daemon` in a fresh interpreter
+
+Results are written to bench/results/<commit>.json (or --json PATH);
+--compare OLD.json prints deltas and exits 1 if a metric regressed.
+
+Usage: python3 bench/suite.py [--devices 4] [--cycles 5] [--compare OLD.json]
+"""
+
+import argparse, json, os, platform, resource, subprocess, sys, time
+
+from harness import ABS_X, EV_ABS, Rig
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+def cpu_seconds():
+    ru = resource.getrusage(resource.RUSAGE_SELF)
+    return ru.ru_utime + ru.ru_stime
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[idx]
+
+def spawn_injector(inject_fn):
+    """Run inject_fn() in a child; it returns a list that is sent back as JSON."""
+    r, w = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(r)
+        try:
+            payload = json.dumps(inject_fn()).encode()
+            os.write(w, payload)
+        finally:
+            os._exit(0)
+    os.close(w)
+    def collect():
+        chunks = []
+        while True:
+            chunk = os.read(r, 65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        os.close(r)
+        os.waitpid(pid, 0)
+        return json.loads(b"".join(chunks) or b"[]")
+    return collect
+
+def sleep_until(deadline):
+    delay = deadline - time.monotonic()
+    if delay > 0:
+        time.sleep(delay)
+
+def bench_wake_sleep(args):
+    """Alternate single touches with full idle periods; pair each with its wake and sleep write."""
+    idle = args.idle_seconds
+    rig = Rig(devices=1, prefer_uinput=not args.no_uinput, idle_seconds=idle,
+              fade_in_ms=0, fade_out_ms=0, force_max_on_wake=True)
+    try:
+        rig.start()
+        period = idle + 0.5
+        first = time.monotonic() + idle + 0.5  # daemon is asleep before the first touch
+        def inject():
+            times = []
+            for k in range(args.cycles):
+                sleep_until(first + k * period)
+                times.append(rig.inputs.inject(0, EV_ABS, ABS_X, 100 + k))
+            return times
+        collect = spawn_injector(inject)
+        rig.run_for(first + args.cycles * period + 0.2 - time.monotonic())
+        injected = collect()
+        writes = rig.recorder.writes
+        latencies, errors = [], []
+        for t_inj in injected:
+            wake = next(((t, v) for t, v in writes if t >= t_inj and v > 0), None)
+            if wake is None:
+                continue
+            latencies.append((wake[0] - t_inj) * 1000.0)
+            sleep = next(((t, v) for t, v in writes if t > wake[0] and v == 0), None)
+            if sleep is not None:
+                errors.append(abs(sleep[0] - (t_inj + idle)) * 1000.0)
+        return rig.inputs.kind, {
+            "wake_latency_ms_p50": percentile(latencies, 50),
+            "wake_latency_ms_p95": percentile(latencies, 95),
+            "wake_latency_ms_max": max(latencies) if latencies else None,
+            "sleep_error_ms_mean": sum(errors) / len(errors) if errors else None,
+            "sleep_error_ms_max": max(errors) if errors else None,
+            "wake_cycles": len(latencies),
+        }
+    finally:
+        rig.close()
+
+def bench_idle_cpu(args):
+    rig = Rig(devices=args.devices, prefer_uinput=not args.no_uinput, idle_seconds=1, fade_out_ms=0)
+    try:
+        rig.start()
+        rig.run_for(1.3)
+        if not rig.daemon.primary.idle.asleep:
+            raise SystemExit("ERROR: daemon did not go to sleep; idle CPU cannot be measured.")
+        loop = rig.daemon.loop
+        cpu0, it0, t0 = cpu_seconds(), loop.iterations, time.monotonic()
+        rig.run_for(args.idle_cpu_seconds)
+        elapsed = time.monotonic() - t0
+        scale = 3600.0 / elapsed
+        return {
+            "idle_cpu_s_per_hour": (cpu_seconds() - cpu0) * scale,
+            "idle_wakeups_per_hour": (loop.iterations - it0 - 1) * scale,  # -1: the run_for stop timer
+        }
+    finally:
+        rig.close()
+
+def bench_storm(args):
+    rig = Rig(devices=args.devices, prefer_uinput=not args.no_uinput, idle_seconds=30)
+    try:
+        rig.start()
+        interval = 1.0 / args.storm_hz
+        def inject():
+            end = time.monotonic() + args.storm_seconds
+            n = 0
+            nxt = time.monotonic()
+            while nxt < end:
+                rig.inputs.inject(n % args.devices, EV_ABS, ABS_X, n & 0xFFF)
+                n += 1
+                nxt += interval
+                sleep_until(nxt)
+            return [n]
+        cpu0, t0 = cpu_seconds(), time.monotonic()
+        collect = spawn_injector(inject)
+        rig.run_for(args.storm_seconds)
+        cpu = cpu_seconds() - cpu0
+        elapsed = time.monotonic() - t0
+        injected = collect()[0]
+        return {
+            "storm_cpu_pct": 100.0 * cpu / elapsed,
+            "storm_events": injected,
+            "storm_loop_iterations": rig.daemon.loop.iterations,
+        }
+    finally:
+        rig.close()
+
+def bench_startup(args):
+    samples = []
+    for _ in range(args.startup_repeats):
+        rig = Rig(devices=args.devices, prefer_uinput=not args.no_uinput)
+        try:
+            t0 = time.perf_counter()
+            rig.daemon.start()
+            samples.append((time.perf_counter() - t0) * 1000.0)
+        finally:
+            rig.close()
+    code = "import time; t = time.perf_counter(); import touchwake.daemon; print(time.perf_counter() - t)"
+    imports = []
+    for _ in range(args.startup_repeats):
+        out = subprocess.run([sys.executable, "-c", code], cwd=REPO_DIR, capture_output=True, text=True, check=True)
+        imports.append(float(out.stdout) * 1000.0)
+    return {"startup_ms": percentile(samples, 50), "import_ms": percentile(imports, 50)}
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                             capture_output=True, text=True, check=True)
+        sha = out.stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_DIR,
+                               capture_output=True, text=True).stdout.strip()
+        return f"{sha}-dirty" if dirty else sha
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def compare(old, new, tolerance_pct, floor):
+    """Print old -> new per metric; returns the names of regressed metrics."""
+    regressed = []
+    for key, value in new["metrics"].items():
+        before = old.get("metrics", {}).get(key)
+        if not isinstance(value, (int, float)) or not isinstance(before, (int, float)):
+            continue
+        if key in ("wake_cycles", "storm_events", "storm_loop_iterations"):
+            continue  # counts, not costs
+        delta = value - before
+        pct = 100.0 * delta / before if before else 0.0
+        flag = ""
+        if delta > floor and pct > tolerance_pct:
+            flag = "  REGRESSION"
+            regressed.append(key)
+        print(f"{key:>24}: {before:12.3f} -> {value:12.3f} ({pct:+6.1f}%){flag}")
+    return regressed
+
+def main():
+    ap = argparse.ArgumentParser(description="Hardware-free daemon benchmark/regression suite")
+    ap.add_argument("--devices", type=int, default=4, help="virtual input devices (idle, storm, startup)")
+    ap.add_argument("--cycles", type=int, default=5, help="wake/sleep cycles for latency + accuracy")
+    ap.add_argument("--idle-seconds", type=int, default=1)
+    ap.add_argument("--idle-cpu-seconds", type=float, default=5.0)
+    ap.add_argument("--storm-seconds", type=float, default=3.0)
+    ap.add_argument("--storm-hz", type=float, default=500.0)
+    ap.add_argument("--startup-repeats", type=int, default=5)
+    ap.add_argument("--no-uinput", action="store_true", help="always use FIFO stand-ins")
+    ap.add_argument("--json", help=f"output file (default: {RESULTS_DIR}/<commit>.json)")
+    ap.add_argument("--compare", metavar="OLD.json", help="compare against a previous result")
+    ap.add_argument("--tolerance", type=float, default=25.0, help="regression threshold in percent")
+    ap.add_argument("--floor", type=float, default=0.5, help="ignore absolute changes below this")
+    args = ap.parse_args()
+
+    kind, metrics = bench_wake_sleep(args)
+    metrics.update(bench_idle_cpu(args))
+    metrics.update(bench_storm(args))
+    metrics.update(bench_startup(args))
+    result = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "kernel": platform.release(),
+        "input": kind,
+        "devices": args.devices,
+        "metrics": metrics,
+    }
+    for key, value in metrics.items():
+        print(f"{key:>24}: {value:.3f}" if isinstance(value, float) else f"{key:>24}: {value}")
+
+    path = args.json
+    if not path:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{result['commit']}.json")
+    with open(path, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"results: {path}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            old = json.load(f)
+        print(f"compare {old.get('commit', '?')} -> {result['commit']}")
+        if compare(old, result, args.tolerance, args.floor):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Replays the noisy-trace corpus (bench/corpus/*.evemu) through the evdev reader
+with and without the wake filter (touchwake/wakefilter.py) and reports which
+traces would wake a sleeping display, plus the filter's cost per event.
+
+Traces use the evemu-record text format ("E: <sec.usec> <type> <code> <value>",
+type/code in hex); each carries "# expect: wake" or "# expect: ignore". A
+capture from a real panel (evemu-record /dev/input/eventN > trace.evemu, then
+add the expect line) can be dropped into the corpus as is. Events are written
+as struct input_event to a file and drained by EventReader in its normal
+64-record batches, so frames also cross batch boundaries. Before draining,
+each trace passes through the kernel event mask the daemon installs
+(evio.MASK_RELEVANT, widened by WakeFilter.codes() when filtering), emulated
+here as evdev applies EVIOCSMASK; --no-mask replays the raw trace.
+
+Usage: python3 bench/wake_filter.py [--wake-filter "contact=40, touch, palm=30, travel=20/250"]
+                                    [--corpus bench/corpus] [--no-mask] [--json out.json]
+"""
+
+import argparse, glob, json, os, sys, tempfile, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from touchwake.evio import EV_SYN, MASK_RELEVANT, widen_mask
+from touchwake.reader import EVENT, EventReader
+from touchwake.wakefilter import SYN_REPORT, WakeFilter, parse_filter
+
+DEFAULT_FILTER = "contact=40, touch, palm=30, travel=20/250"
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+
+def load_trace(path):
+    """(expect, packed input_event records, event count)."""
+    expect, data, count = None, bytearray(), 0
+    with open(path) as f:
+        for line in f:
+            if line.startswith("# expect:"):
+                expect = line.split(":", 1)[1].strip()
+            elif line.startswith("E:"):
+                stamp, etype, code, value = line.split("#")[0].split()[1:5]
+                sec, _, usec = stamp.partition(".")
+                data += EVENT.pack(int(sec), int(usec.ljust(6, "0")[:6]), int(etype, 16), int(code, 16), int(value))
+                count += 1
+    return expect, bytes(data), count
+
+def apply_mask(data, mask):
+    """The records a client with this evio mask reads: masked types/codes are dropped, and so is
+    the SYN_REPORT of a packet left empty (as evdev does); other EV_SYN events always pass."""
+    types, out, packet = mask[EV_SYN], bytearray(), False
+    for rec in EVENT.iter_unpack(data):
+        etype, code = rec[2], rec[3]
+        if etype == EV_SYN:
+            if code == SYN_REPORT:
+                if not packet:
+                    continue
+                packet = False
+        elif types is not None and etype not in types:
+            continue
+        else:
+            codes = mask.get(etype)
+            if codes is not None and code not in codes:
+                continue
+            packet = True
+        out += EVENT.pack(*rec)
+    return bytes(out)
+
+def drain(root, data, wake_filter=None):
+    """True if the trace would wake a sleeping display."""
+    path = os.path.join(root, "events")
+    with open(path, "wb") as f:
+        f.write(data)
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        reader = EventReader(fd)
+        if wake_filter is None:
+            return reader.read_activity() is not None
+        wake_filter.needed(True, False)
+        reader.read_filtered(wake_filter)
+        return wake_filter.wake_ts is not None
+    finally:
+        os.close(fd)
+
+def cost_ns(root, data, count, rules, repeat):
+    """ns per event, unfiltered fast path and filtered."""
+    out = []
+    for rules_ in (None, rules):
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            drain(root, data, WakeFilter(rules_) if rules_ else None)
+        out.append((time.perf_counter() - t0) / (repeat * count) * 1e9)
+    return out
+
+def main():
+    ap = argparse.ArgumentParser(description="Wake decisions on noisy input traces, with and without the wake filter")
+    ap.add_argument("--wake-filter", default=DEFAULT_FILTER)
+    ap.add_argument("--corpus", default=CORPUS)
+    ap.add_argument("--repeat", type=int, default=50, help="repetitions for the cost measurement")
+    ap.add_argument("--no-mask", action="store_true", help="replay raw traces, without the kernel event mask")
+    ap.add_argument("--json", help="write results to this file")
+    args = ap.parse_args()
+
+    rules = parse_filter(args.wake_filter)
+    plain_mask, filter_mask = MASK_RELEVANT, widen_mask(MASK_RELEVANT, WakeFilter(rules).codes())
+    masked = (lambda data, mask: data) if args.no_mask else apply_mask
+    results = {"wake_filter": args.wake_filter, "kernel_event_mask": not args.no_mask, "traces": {}}
+    with tempfile.TemporaryDirectory(prefix="touchwake-filter-") as root:
+        print(f"{'trace':<22}{'expect':>8}{'unfiltered':>12}{'filtered':>10}")
+        for path in sorted(glob.glob(os.path.join(args.corpus, "*.evemu"))):
+            name = os.path.basename(path)[:-len(".evemu")]
+            expect, data, count = load_trace(path)
+            plain = drain(root, masked(data, plain_mask))
+            filtered = drain(root, masked(data, filter_mask), WakeFilter(rules))
+            results["traces"][name] = {"expect": expect, "events": count, "unfiltered": plain, "filtered": filtered}
+            word = lambda woke: "wake" if woke else "ignore"
+            mark = "" if word(filtered) == expect else "  <- unexpected"
+            print(f"{name:<22}{expect:>8}{word(plain):>12}{word(filtered):>10}{mark}")
+        longest = max(glob.glob(os.path.join(args.corpus, "*.evemu")), key=os.path.getsize)
+        _expect, data, count = load_trace(longest)
+        data = masked(data, filter_mask)
+        fast, slow = cost_ns(root, data, len(data) // EVENT.size, rules, args.repeat)
+    traces = results["traces"].values()
+    results["false_wakes_unfiltered"] = sum(t["unfiltered"] and t["expect"] == "ignore" for t in traces)
+    results["false_wakes_filtered"] = sum(t["filtered"] and t["expect"] == "ignore" for t in traces)
+    results["missed_wakes_filtered"] = sum(not t["filtered"] and t["expect"] == "wake" for t in traces)
+    results["ns_per_event_unfiltered"], results["ns_per_event_filtered"] = fast, slow
+    print(f"false wakes: {results['false_wakes_unfiltered']} -> {results['false_wakes_filtered']}, "
+          f"missed wakes: {results['missed_wakes_filtered']}")
+    print(f"cost ({os.path.basename(longest)}): {fast:.0f} ns/event unfiltered, {slow:.0f} ns/event filtered")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
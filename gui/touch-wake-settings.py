@@ -1,33 +1,94 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-import os, glob, subprocess, configparser, tkinter as tk
-from tkinter import ttk, messagebox
+import os, sys, glob, json, time, subprocess, configparser, tkinter as tk
+from tkinter import ttk, messagebox, simpledialog
+
+# Shared package sits next to this script once installed, one level up in the repo
+_HERE = os.path.dirname(os.path.abspath(__file__))
+if not os.path.isdir(os.path.join(_HERE, "touchwake")):
+    sys.path.insert(0, os.path.dirname(_HERE))
+
+from touchwake.coalesce import CoalescedWriter
+from touchwake.config import DISPLAY_KEYS, FIELDS, PROFILE_FIELDS, ProfileConfig, parse_values
+from touchwake.control import CONTROL_SOCKET, request, subscribe
+from touchwake.core import SLEEP, UNDIM, WAKE, IdleCore, parse_stages
+from touchwake.fade import CURVES
+from touchwake.schedule import MODES
 
 CONF_PATH = "/etc/touch-wake-display.conf"
 SERVICE = "touch-wake-display.service"
 SYSTEMCTL = "/usr/bin/systemctl"  # fixed path (sudoers rule depends on this)
+# Settings edited here; pushed to the running daemon over the control socket
+LIVE_KEYS = ("idle_seconds", "dim_stages", "bl_base", "force_max_on_wake", "fade_out_ms", "fade_in_ms", "fade_curve",
+             "rescan_interval", "debug")
+
+# [display:NAME] sections: per-backlight overrides of DISPLAY_KEYS, plus input device patterns
+DISPLAY_PREFIX = "display:"
+MAIN_DISPLAY = "(main)"  # the [touchwake] section itself
+# [profile:NAME] sections: time-of-day schedule, first match wins (file order)
+PROFILE_PREFIX = "profile:"
+PROFILE_EDIT_KEYS = ("times", "mode", "idle_seconds", "wake_brightness", "displays")
+
+POLL_MS = 2000             # last-resort brightness polling (no daemon, no sysfs notifications)
+SUBSCRIBE_RETRY_MS = 10000  # while on a fallback source, try the daemon again this often
+
+SLIDER_WRITE_HZ = 60  # brightness writes per second while dragging (one per display frame)
 
 MIN_USER_BRIGHTNESS = 4  # Do not allow manual brightness below this raw value
+DEFAULT_CURVE = FIELDS["fade_curve"][1]
 
 def load_config():
-    cfg = {"idle_seconds":"30", "bl_base":"", "force_max_on_wake":"false", "rescan_interval":"2.0", "debug":"false"}
+    """[touchwake] settings plus {name: own keys} of every [display:NAME] and [profile:NAME] section."""
+    cfg = {"idle_seconds":"30", "dim_stages":"", "bl_base":"", "force_max_on_wake":"false", "rescan_interval":"2.0", "debug":"false",
+           "fade_in_ms":"80", "fade_out_ms":"300", "fade_curve":"gamma"}
+    displays, profiles = {}, {}
     if os.path.exists(CONF_PATH):
-        p = configparser.ConfigParser(); p.read(CONF_PATH)
+        p = configparser.ConfigParser(interpolation=None); p.read(CONF_PATH)
         sec = p["touchwake"] if "touchwake" in p else p["DEFAULT"]
-        for k in cfg.keys():
-            if k in sec: cfg[k] = sec.get(k, cfg[k])
-    return cfg
-
-def save_config(cfg):
-    p = configparser.ConfigParser()
+        # Keep every key (including daemon-only settings without a GUI control)
+        for k in sec.keys():
+            cfg[k] = sec.get(k, cfg.get(k, ""))
+        for name in p.sections():
+            if name.startswith(DISPLAY_PREFIX):
+                displays[name[len(DISPLAY_PREFIX):].strip()] = {k: v for k, v in p[name].items() if k not in p.defaults()}
+            elif name.startswith(PROFILE_PREFIX):
+                profiles[name[len(PROFILE_PREFIX):].strip()] = {k: v for k, v in p[name].items() if k not in p.defaults()}
+    return cfg, displays, profiles
+
+def save_config(cfg, displays, profiles):
+    p = configparser.ConfigParser(interpolation=None)
     p["touchwake"] = cfg
+    for name, values in displays.items():
+        p[DISPLAY_PREFIX + name] = values
+    for name, values in profiles.items():
+        p[PROFILE_PREFIX + name] = values
     with open(CONF_PATH, "w") as f:
         p.write(f)
 
+def detect_backlights():
+    return sorted([d for d in glob.glob("/sys/class/backlight/*") if os.path.isdir(d)])
+
 def detect_backlight():
-    cands = sorted([d for d in glob.glob("/sys/class/backlight/*") if os.path.isdir(d)])
+    cands = detect_backlights()
     return cands[0] if cands else ""
 
+def apply_live(cfg, displays, profiles):
+    """
+    Push settings to the running daemon. Returns the list of keys that still need
+    a restart, or None if the daemon is not reachable. Raises RuntimeError if rejected.
+    """
+    path = cfg.get("control_socket", CONTROL_SOCKET).strip()
+    if not path:
+        return None
+    values = {k: cfg[k] for k in LIVE_KEYS if k in cfg}
+    values["displays"] = displays
+    values["profiles"] = profiles
+    try:
+        reply = request("set-config", path=path, values=values)
+    except OSError:
+        return None
+    return reply.get("restart_required", [])
+
 def restart_service():
     try:
         subprocess.run([SYSTEMCTL, "restart", SERVICE], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
@@ -51,65 +112,421 @@ def restart_service():
         messagebox.showerror("Error", f"{SYSTEMCTL} not found.")
         return False
 
+def describe_stages(dim_stages, idle_seconds):
+    """'60:20%' and '120' -> '60 s → 20 %, 120 s → off' (stages at or after the timeout never run)."""
+    try:
+        idle = int(idle_seconds)
+    except ValueError:
+        return ""
+    try:
+        stages = parse_stages(dim_stages)
+    except ValueError as e:
+        return f"invalid: {e}"
+    parts = [f"{sec} s → {percent} %" + (f" ({fade} ms)" if fade is not None else "")
+             for sec, percent, fade in stages if sec < idle]
+    return ", ".join(parts + [f"{idle} s → off"])
+
+def describe_profiles(profiles):
+    if not profiles:
+        return "(none: same settings all day)"
+    parts = []
+    for name, values in profiles.items():
+        mode = values.get("mode", "auto").strip().lower()
+        parts.append(f"{name} {values.get('times', '')}" + (f" [{mode}]" if mode != "auto" else ""))
+    return "; ".join(parts)
+
+class ScheduleDialog(tk.Toplevel):
+    """Edits the [profile:NAME] sections; on OK `result` holds them (priority = list order)."""
+
+    def __init__(self, parent, profiles):
+        super().__init__(parent)
+        self.title("Schedule profiles")
+        self.transient(parent)
+        self.resizable(False, False)
+        self.profiles = {name: dict(values) for name, values in profiles.items()}
+        self.result = None
+        self._shown = None
+
+        frm = ttk.Frame(self, padding=12)
+        frm.pack(fill="both", expand=True)
+        side = ttk.Frame(frm)
+        side.grid(row=0, column=0, rowspan=6, sticky="ns", padx=(0, 12))
+        self.listbox = tk.Listbox(side, height=8, width=16, exportselection=False)
+        self.listbox.pack(fill="y")
+        self.listbox.bind("<<ListboxSelect>>", lambda e: self._on_select())
+        row = ttk.Frame(side)
+        row.pack(pady=(6, 0))
+        ttk.Button(row, text="Add…", width=6, command=self._on_add).pack(side="left")
+        ttk.Button(row, text="Remove", width=7, command=self._on_remove).pack(side="left", padx=2)
+        ttk.Button(row, text="Up", width=3, command=self._on_up).pack(side="left")
+
+        self.vars = {key: tk.StringVar() for key in PROFILE_EDIT_KEYS}
+        labels = {"times": "Times (e.g. mon-fri 08:00-18:00, sun):", "mode": "Mode:",
+                  "idle_seconds": "Idle (seconds, empty = unchanged):",
+                  "wake_brightness": "Wake brightness (%, empty = unchanged):",
+                  "displays": "Displays (names, empty = all):"}
+        self.entries = []
+        for r, key in enumerate(PROFILE_EDIT_KEYS):
+            ttk.Label(frm, text=labels[key]).grid(row=r, column=1, sticky="w", pady=4)
+            if key == "mode":
+                w = ttk.Combobox(frm, textvariable=self.vars[key], values=MODES, state="readonly", width=8)
+            else:
+                w = ttk.Entry(frm, textvariable=self.vars[key], width=36 if key == "times" else 10)
+            w.grid(row=r, column=2, sticky="w", padx=(6, 0))
+            self.entries.append(w)
+        ttk.Label(frm, text="auto = idle timer, on = always on, off = always off (input ignored).\n"
+                            "The first profile whose times match is active.", foreground="gray").grid(
+            row=len(PROFILE_EDIT_KEYS), column=1, columnspan=2, sticky="w", pady=(6, 0))
+        btns = ttk.Frame(frm)
+        btns.grid(row=len(PROFILE_EDIT_KEYS) + 1, column=0, columnspan=3, sticky="e", pady=(12, 0))
+        ttk.Button(btns, text="Cancel", command=self.destroy).pack(side="right", padx=6)
+        ttk.Button(btns, text="OK", command=self._on_ok).pack(side="right", padx=6)
+
+        self._refresh(next(iter(self.profiles), None))
+        self.grab_set()
+
+    def _refresh(self, select):
+        self.listbox.delete(0, "end")
+        for name in self.profiles:
+            self.listbox.insert("end", name)
+        self._show(select)
+
+    def _show(self, name):
+        self._shown = name
+        values = self.profiles.get(name, {})
+        for key, var in self.vars.items():
+            var.set(values.get(key, "auto" if key == "mode" else ""))
+        for w in self.entries:
+            w.state(["!disabled"] if name else ["disabled"])
+        if name:
+            i = list(self.profiles).index(name)
+            self.listbox.selection_clear(0, "end")
+            self.listbox.selection_set(i)
+
+    def _store(self):
+        if self._shown is None:
+            return
+        own = {key: var.get().strip() for key, var in self.vars.items() if var.get().strip()}
+        if own.get("mode") == "auto":
+            del own["mode"]
+        self.profiles[self._shown] = own
+
+    def _on_select(self):
+        sel = self.listbox.curselection()
+        if sel:
+            self._store()
+            self._show(self.listbox.get(sel[0]))
+
+    def _on_add(self):
+        name = (simpledialog.askstring("Add profile", "Name (e.g. night):", parent=self) or "").strip()
+        if not name:
+            return
+        if name in self.profiles or any(c in name for c in "[]"):
+            messagebox.showerror("Error", f"Profile name '{name}' is invalid or already used.", parent=self)
+            return
+        self._store()
+        self.profiles[name] = {"times": "22:00-07:00"}
+        self._refresh(name)
+
+    def _on_remove(self):
+        if self._shown is None:
+            return
+        del self.profiles[self._shown]
+        self._shown = None
+        self._refresh(next(iter(self.profiles), None))
+
+    def _on_up(self):
+        if self._shown is None:
+            return
+        self._store()
+        names = list(self.profiles)
+        i = names.index(self._shown)
+        if i:
+            names[i - 1], names[i] = names[i], names[i - 1]
+            self.profiles = {n: self.profiles[n] for n in names}
+            self._refresh(self._shown)
+
+    def _on_ok(self):
+        self._store()
+        for name, own in self.profiles.items():
+            try:
+                ProfileConfig(name, parse_values(own, PROFILE_FIELDS))
+            except ValueError as e:
+                messagebox.showerror("Error", f"[{name}] {e}" if not str(e).startswith("[") else str(e), parent=self)
+                self._show(name)
+                return
+        self.result = self.profiles
+        self.destroy()
+
 class App(tk.Tk):
     def __init__(self):
         super().__init__()
         self.title("Touch Wake Settings")
-        self.geometry("680x340")
+        self.geometry("680x530")
         self.resizable(False, False)
-        self.cfg = load_config()
+        self.cfg, self.displays, self.profiles = load_config()
+        self._shown = MAIN_DISPLAY  # whose settings the form currently edits
         # Preserve debug value internally (checkbox removed)
         self._debug_value = self.cfg.get("debug", "false")
 
         frm = ttk.Frame(self, padding=12)
         frm.pack(fill="both", expand=True)
 
-        # Row 0: Idle
-        ttk.Label(frm, text="Idle (seconds):").grid(row=0, column=0, sticky="w", padx=4, pady=6)
+        # Row 0: Display selection ([touchwake] or a [display:NAME] section)
+        ttk.Label(frm, text="Display:").grid(row=0, column=0, sticky="w", padx=4, pady=6)
+        disp_frame = ttk.Frame(frm)
+        disp_frame.grid(row=0, column=1, columnspan=2, sticky="w")
+        self.display_var = tk.StringVar(value=MAIN_DISPLAY)
+        self.display_box = ttk.Combobox(disp_frame, textvariable=self.display_var, state="readonly", width=20)
+        self.display_box.pack(side="left")
+        self.display_box.bind("<<ComboboxSelected>>", lambda e: self.on_select_display())
+        ttk.Button(disp_frame, text="Add…", command=self.on_add_display).pack(side="left", padx=(8, 4))
+        ttk.Button(disp_frame, text="Remove", command=self.on_remove_display).pack(side="left")
+        self._refresh_display_list()
+
+        # Row 1: Idle
+        ttk.Label(frm, text="Idle (seconds):").grid(row=1, column=0, sticky="w", padx=4, pady=6)
         self.idle_var = tk.StringVar(value=self.cfg["idle_seconds"])
-        ttk.Entry(frm, textvariable=self.idle_var, width=10).grid(row=0, column=1, sticky="w")
-
-        # Row 1: Backlight path
-        ttk.Label(frm, text="Backlight path (empty = auto):").grid(row=1, column=0, sticky="w", padx=4, pady=6)
+        idle_frame = ttk.Frame(frm)
+        idle_frame.grid(row=1, column=1, columnspan=2, sticky="w")
+        ttk.Entry(idle_frame, textvariable=self.idle_var, width=10).pack(side="left")
+        # Preview: the daemon's idle state machine run on this window's input; nothing is written
+        self.preview_btn = ttk.Button(idle_frame, text="Preview", command=self.on_preview)
+        self.preview_btn.pack(side="left", padx=(8, 4))
+        self.preview_lbl = ttk.Label(idle_frame, text="", foreground="gray")
+        self.preview_lbl.pack(side="left")
+        self._preview = None
+        self._preview_job = None
+        self._preview_stages = []
+
+        # Row 2: Dim stages before the sleep (shown as a timeline with the idle timeout)
+        ttk.Label(frm, text="Dim before sleep:").grid(row=2, column=0, sticky="w", padx=4, pady=6)
+        dim_frame = ttk.Frame(frm)
+        dim_frame.grid(row=2, column=1, columnspan=2, sticky="w")
+        self.dim_var = tk.StringVar(value=self.cfg.get("dim_stages", ""))
+        ttk.Entry(dim_frame, textvariable=self.dim_var, width=20).pack(side="left")
+        self.stages_lbl = ttk.Label(dim_frame, text="", foreground="gray")
+        self.stages_lbl.pack(side="left", padx=(8, 0))
+        for var in (self.idle_var, self.dim_var):
+            var.trace_add("write", lambda *_: self.stages_lbl.configure(
+                text=describe_stages(self.dim_var.get(), self.idle_var.get())))
+        self.stages_lbl.configure(text=describe_stages(self.dim_var.get(), self.idle_var.get()))
+
+        # Row 3: Backlight path
+        ttk.Label(frm, text="Backlight path (empty = auto):").grid(row=3, column=0, sticky="w", padx=4, pady=6)
         self.bl_var = tk.StringVar(value=self.cfg["bl_base"])
-        ttk.Entry(frm, textvariable=self.bl_var, width=50).grid(row=1, column=1, sticky="w")
-        ttk.Button(frm, text="Detect", command=self.on_detect).grid(row=1, column=2, padx=6)
+        ttk.Entry(frm, textvariable=self.bl_var, width=50).grid(row=3, column=1, sticky="w")
+        ttk.Button(frm, text="Detect", command=self.on_detect).grid(row=3, column=2, padx=6)
 
-        # Row 2: Brightness slider
-        ttk.Label(frm, text="Brightness:").grid(row=2, column=0, sticky="w", padx=4, pady=(10,4))
+        # Row 4: Brightness slider
+        ttk.Label(frm, text="Brightness:").grid(row=4, column=0, sticky="w", padx=4, pady=(10,4))
         slider_frame = ttk.Frame(frm)
-        slider_frame.grid(row=2, column=1, columnspan=2, sticky="we", pady=(10,4))
+        slider_frame.grid(row=4, column=1, columnspan=2, sticky="we", pady=(10,4))
         slider_frame.columnconfigure(0, weight=1)
         self.brightness_scale = ttk.Scale(slider_frame, from_=0, to=100, orient="horizontal", command=self._on_brightness_drag)
         self.brightness_scale.grid(row=0, column=0, sticky="we", padx=(0,6))
         self.brightness_value_lbl = ttk.Label(slider_frame, text="-")
         self.brightness_value_lbl.grid(row=0, column=1, sticky="e")
+        self.display_state_lbl = ttk.Label(slider_frame, text="", width=12)
+        self.display_state_lbl.grid(row=0, column=2, sticky="e", padx=(6,0))
         self._brightness_path = None
         self._brightness_max = 100
         self._dragging = False
         self._brightness_poll_job = None
+        self._subscribe_retry_job = None
+        self._sub_sock = None      # daemon state subscription (control socket)
+        self._sub_buf = b""
+        self._last_state = None    # latest state pushed by the daemon
+        self._sysfs_fd = None      # actual_brightness, watched for sysfs change notifications
+        self._writer = None        # CoalescedWriter for the slider (sysfs I/O off the Tk thread)
+        self._writer_error = None  # why the writer could not be opened
         self._last_write_error = False
         self.brightness_scale.bind("<ButtonPress-1>", lambda e: self._set_dragging(True))
         self.brightness_scale.bind("<ButtonRelease-1>", lambda e: self._on_brightness_release())
 
-        # Row 3: Force max only (debug removed)
+        # Row 5: Fade durations + curve
+        ttk.Label(frm, text="Fade out / in (ms):").grid(row=5, column=0, sticky="w", padx=4, pady=6)
+        fade_frame = ttk.Frame(frm)
+        fade_frame.grid(row=5, column=1, columnspan=2, sticky="w")
+        self.fade_out_var = tk.StringVar(value=self.cfg["fade_out_ms"])
+        self.fade_in_var = tk.StringVar(value=self.cfg["fade_in_ms"])
+        ttk.Entry(fade_frame, textvariable=self.fade_out_var, width=6).pack(side="left")
+        ttk.Label(fade_frame, text="/").pack(side="left", padx=4)
+        ttk.Entry(fade_frame, textvariable=self.fade_in_var, width=6).pack(side="left")
+        ttk.Label(fade_frame, text="Curve:").pack(side="left", padx=(12, 4))
+        curve = self.cfg["fade_curve"].strip().lower()
+        self.fade_curve_var = tk.StringVar(value=curve if curve in CURVES else DEFAULT_CURVE)
+        ttk.Combobox(fade_frame, textvariable=self.fade_curve_var, values=CURVES, state="readonly", width=8).pack(side="left")
+
+        # Row 6: Force max only (debug removed)
         self.force_var = tk.BooleanVar(value=self.cfg["force_max_on_wake"].lower() in ("1","true","yes","on"))
-        ttk.Checkbutton(frm, text="Force max brightness on every wake", variable=self.force_var).grid(row=3, column=1, sticky="w", pady=4)
+        ttk.Checkbutton(frm, text="Force max brightness on every wake", variable=self.force_var).grid(row=6, column=1, sticky="w", pady=4)
+
+        # Row 7: Input devices that wake this display (display sections only)
+        ttk.Label(frm, text="Wake devices (name/phys):").grid(row=7, column=0, sticky="w", padx=4, pady=6)
+        self.devices_var = tk.StringVar(value="")
+        self.devices_entry = ttk.Entry(frm, textvariable=self.devices_var, width=50)
+        self.devices_entry.grid(row=7, column=1, sticky="w")
+        self.devices_entry.state(["disabled"])
+
+        # Row 8: Screen-on time / estimated energy of this display (daemon state pushes)
+        ttk.Label(frm, text="Screen on today:").grid(row=8, column=0, sticky="w", padx=4, pady=6)
+        self.energy_lbl = ttk.Label(frm, text="-")
+        self.energy_lbl.grid(row=8, column=1, columnspan=2, sticky="w")
+
+        # Row 9: Time-of-day schedule profiles (edited in a dialog)
+        ttk.Label(frm, text="Schedule:").grid(row=9, column=0, sticky="w", padx=4, pady=6)
+        sched_frame = ttk.Frame(frm)
+        sched_frame.grid(row=9, column=1, columnspan=2, sticky="we")
+        self.schedule_lbl = ttk.Label(sched_frame, text=describe_profiles(self.profiles), width=58)
+        self.schedule_lbl.pack(side="left")
+        ttk.Button(sched_frame, text="Edit…", command=self.on_edit_schedule).pack(side="left", padx=6)
 
         # Hidden: keep rescan interval internally (no GUI element)
         self.scan_var = tk.StringVar(value=self.cfg["rescan_interval"])  # not shown
 
         # Buttons
         btns = ttk.Frame(frm)
-        btns.grid(row=4, column=0, columnspan=3, sticky="e", pady=12)
+        btns.grid(row=10, column=0, columnspan=3, sticky="e", pady=12)
         ttk.Button(btns, text="Cancel", command=self.destroy).pack(side="right", padx=6)
-        ttk.Button(btns, text="Save & restart service", command=self.on_save).pack(side="right", padx=6)
+        ttk.Button(btns, text="Save & apply", command=self.on_save).pack(side="right", padx=6)
 
         for c in range(3):
             frm.grid_columnconfigure(c, weight=0)
         frm.grid_columnconfigure(1, weight=1)
 
-        self._init_brightness_slider(initial=True)
+        self._init_brightness_slider()
+
+    # Displays ------------------------------------------------------------
+    def _refresh_display_list(self):
+        self.display_box.configure(values=(MAIN_DISPLAY,) + tuple(self.displays))
+
+    def _form_values(self):
+        return {
+            "idle_seconds": self.idle_var.get().strip(),
+            "dim_stages": self.dim_var.get().strip(),
+            "bl_base": self.bl_var.get().strip(),
+            "force_max_on_wake": "true" if self.force_var.get() else "false",
+            "fade_out_ms": self.fade_out_var.get().strip(),
+            "fade_in_ms": self.fade_in_var.get().strip(),
+            "fade_curve": self.fade_curve_var.get(),
+        }
+
+    def _store_form(self):
+        """Write the form back into the shown section; display sections keep only what differs from [touchwake]."""
+        values = self._form_values()
+        if self._shown == MAIN_DISPLAY:
+            self.cfg.update(values)
+            return
+        # Display keys without a control here (fade_max_hz, energy_watts_*) keep their section value
+        own = {k: v for k, v in self.displays[self._shown].items() if k in DISPLAY_KEYS and k not in values}
+        own.update((k, v) for k, v in values.items() if k == "bl_base" or v != self.cfg.get(k))
+        devices = self.devices_var.get().strip()
+        if devices:
+            own["devices"] = devices
+        self.displays[self._shown] = own
+
+    def _show_form(self, name):
+        values = dict(self.cfg)
+        if name != MAIN_DISPLAY:
+            values.update(self.displays[name])
+        self._shown = name
+        self.display_var.set(name)
+        self.idle_var.set(values["idle_seconds"])
+        self.dim_var.set(values.get("dim_stages", ""))
+        self.bl_var.set(values["bl_base"])
+        self.force_var.set(values["force_max_on_wake"].lower() in ("1","true","yes","on"))
+        self.fade_out_var.set(values["fade_out_ms"])
+        self.fade_in_var.set(values["fade_in_ms"])
+        curve = values["fade_curve"].strip().lower()
+        self.fade_curve_var.set(curve if curve in CURVES else DEFAULT_CURVE)
+        self.devices_var.set(values.get("devices", "") if name != MAIN_DISPLAY else "")
+        self.devices_entry.state(["disabled"] if name == MAIN_DISPLAY else ["!disabled"])
+        self._init_brightness_slider()
+
+    def on_select_display(self):
+        self._store_form()
+        self._show_form(self.display_var.get())
+
+    def on_add_display(self):
+        name = simpledialog.askstring("Add display", "Name (e.g. left):", parent=self)
+        name = (name or "").strip()
+        if not name:
+            return
+        if name == MAIN_DISPLAY or name in self.displays or any(c in name for c in "[]"):
+            messagebox.showerror("Error", f"Display name '{name}' is invalid or already used.")
+            return
+        self._store_form()
+        # Once display sections exist only they are driven: the first one takes over the main backlight
+        used = {v.get("bl_base", "") for v in self.displays.values()}
+        free = [d for d in detect_backlights() if d not in used]
+        first = not self.displays and self.cfg.get("bl_base", "").strip()
+        self.displays[name] = {"bl_base": first or (free[0] if free else "")}
+        self._refresh_display_list()
+        self._show_form(name)
+
+    def on_remove_display(self):
+        if self._shown == MAIN_DISPLAY:
+            return
+        del self.displays[self._shown]
+        self._refresh_display_list()
+        self._show_form(MAIN_DISPLAY)
+
+    def on_edit_schedule(self):
+        dialog = ScheduleDialog(self, self.profiles)
+        self.wait_window(dialog)
+        if dialog.result is not None:
+            self.profiles = dialog.result
+            self.schedule_lbl.configure(text=describe_profiles(self.profiles))
+
+    # Idle preview ---------------------------------------------------------
+    def on_preview(self):
+        if self._preview:
+            self._stop_preview()
+            return
+        try:
+            idle = int(self.idle_var.get()); assert idle > 0
+        except Exception:
+            messagebox.showerror("Error", "Idle (seconds) must be a positive integer.")
+            return
+        try:
+            self._preview_stages = [s for s in parse_stages(self.dim_var.get()) if s[0] < idle]
+        except ValueError as e:
+            messagebox.showerror("Error", f"Dim before sleep: {e}")
+            return
+        self._preview = IdleCore(idle, time.monotonic(), [s[0] for s in self._preview_stages])
+        for seq in ("<Motion>", "<KeyPress>", "<ButtonPress>"):
+            self.bind_all(seq, self._preview_activity)
+        self.preview_btn.configure(text="Stop")
+        self._preview_tick()
+
+    def _stop_preview(self):
+        for seq in ("<Motion>", "<KeyPress>", "<ButtonPress>"):
+            self.unbind_all(seq)
+        if self._preview_job:
+            self.after_cancel(self._preview_job)
+            self._preview_job = None
+        self._preview = None
+        self.preview_btn.configure(text="Preview")
+        self.preview_lbl.configure(text="")
+
+    def _preview_activity(self, _event):
+        if self._preview and self._preview.activity(time.monotonic()) in (WAKE, UNDIM):
+            self._preview_tick()  # re-arms the countdown
+
+    def _preview_tick(self):
+        self._preview_job = None
+        core = self._preview
+        now = time.monotonic()
+        if core.tick(now) == SLEEP or core.asleep:
+            self.preview_lbl.configure(text="would sleep now (move or type here to wake)")
+            return  # asleep: nothing to count down until the next input
+        remaining = core.deadline() - now
+        stages, stage = self._preview_stages, core.stage
+        state = f"dimmed to {stages[stage - 1][1]} %, " if stage else ""
+        step = f"dims to {stages[stage][1]} %" if stage < len(stages) else "sleeps"
+        self.preview_lbl.configure(text=f"{state}{step} in {remaining:.0f} s unless there is input")
+        self._preview_job = self.after(int(min(1.0, remaining) * 1000) + 1, self._preview_tick)
 
     def on_detect(self):
         path = detect_backlight()
@@ -127,9 +544,11 @@ class App(tk.Tk):
         auto = detect_backlight()
         return auto if auto and os.path.isdir(auto) else None
 
-    def _init_brightness_slider(self, initial=False):
+    def _init_brightness_slider(self):
+        self._close_writer()
         base = self._resolve_backlight_base()
         if not base:
+            self._stop_state_sources()
             self._brightness_path = None
             self.brightness_scale.state(["disabled"])
             self.brightness_value_lbl.configure(text="n/a")
@@ -137,6 +556,7 @@ class App(tk.Tk):
         bright = os.path.join(base, "brightness")
         maxp = os.path.join(base, "max_brightness")
         if not os.path.exists(bright):
+            self._stop_state_sources()
             self._brightness_path = None
             self.brightness_scale.state(["disabled"])
             self.brightness_value_lbl.configure(text="n/a")
@@ -150,6 +570,7 @@ class App(tk.Tk):
             maxv = MIN_USER_BRIGHTNESS + 1
         self._brightness_max = maxv
         self._brightness_path = bright
+        self._open_writer()
         self.brightness_scale.state(["!disabled"])
         cur_raw = self._read_current_brightness()
         if cur_raw is not None:
@@ -158,8 +579,7 @@ class App(tk.Tk):
             self._update_brightness_label(percent)
         else:
             self.brightness_value_lbl.configure(text="-")
-        if initial:
-            self._start_brightness_poll()
+        self._start_state_source()
 
     def _raw_to_percent(self, raw: int) -> int:
         if raw <= MIN_USER_BRIGHTNESS:
@@ -189,23 +609,39 @@ class App(tk.Tk):
         except Exception:
             return None
 
-    def _write_brightness(self, percent_value: float):
+    def _open_writer(self):
+        try:
+            self._writer = CoalescedWriter(self._brightness_path, max_hz=SLIDER_WRITE_HZ)
+            self._writer_error = None
+        except OSError as e:
+            self._writer, self._writer_error = None, e
+
+    def _close_writer(self):
+        if self._writer:
+            self._writer.close()
+            self._writer = None
+
+    def _write_brightness(self, percent_value: float, final=False):
+        """Hand the value to the writer thread; `final` (slider release) waits until it is written."""
         if not self._brightness_path:
             return
-        try:
-            raw = self._percent_to_raw(percent_value)
-            with open(self._brightness_path, 'w') as f:
-                f.write(str(raw))
+        raw = self._percent_to_raw(percent_value)
+        if self._writer is None:
+            error = self._writer_error
+        elif final:
+            error = self._writer.commit(raw)
+        else:
+            self._writer.set(raw)
+            error = self._writer.error  # from an earlier write; reported once
+        if error is None:
             self._last_write_error = False
             self._update_brightness_label(percent_value)
-        except PermissionError:
-            if not self._last_write_error:
+        elif not self._last_write_error:
+            self._last_write_error = True
+            if isinstance(error, PermissionError):
                 messagebox.showerror("Permission denied", "Cannot write brightness. Ensure user is in group 'video'.")
-                self._last_write_error = True
-        except Exception as e:
-            if not self._last_write_error:
-                messagebox.showerror("Write error", f"Failed to set brightness: {e}")
-                self._last_write_error = True
+            else:
+                messagebox.showerror("Write error", f"Failed to set brightness: {error}")
 
     def _on_brightness_drag(self, val):
         if self._dragging:
@@ -216,61 +652,237 @@ class App(tk.Tk):
 
     def _on_brightness_release(self):
         self._set_dragging(False)
-        self._write_brightness(self.brightness_scale.get())
+        self._write_brightness(self.brightness_scale.get(), final=True)
+
+    def _show_brightness(self, raw):
+        if raw is None or self._dragging:
+            return
+        percent = self._raw_to_percent(raw)
+        if int(round(self.brightness_scale.get())) != int(percent):
+            self.brightness_scale.set(percent)
+        self._update_brightness_label(percent)
+
+    # State updates --------------------------------------------------------
+    # Sources, best first, all event-driven through Tk's createfilehandler:
+    #   1. daemon state pushes over the control socket (brightness + asleep/awake)
+    #   2. sysfs change notifications on actual_brightness (the backlight class
+    #      signals every brightness change with sysfs_notify -> POLLPRI)
+    #   3. polling every POLL_MS, only if neither is available
+    def _start_state_source(self):
+        self._stop_fallbacks()
+        if self._sub_sock is None:
+            self._subscribe()
+        if self._sub_sock is not None:
+            self._show_state()
+            return
+        self.display_state_lbl.configure(text="")
+        self.energy_lbl.configure(text="-")
+        if not self._watch_sysfs():
+            self._start_brightness_poll()
+        self._subscribe_retry_job = self.after(SUBSCRIBE_RETRY_MS, self._retry_subscribe)
+
+    def _stop_fallbacks(self):
+        for job in (self._brightness_poll_job, self._subscribe_retry_job):
+            if job:
+                self.after_cancel(job)
+        self._brightness_poll_job = self._subscribe_retry_job = None
+        if self._sysfs_fd is not None:
+            self.tk.deletefilehandler(self._sysfs_fd)
+            os.close(self._sysfs_fd)
+            self._sysfs_fd = None
+
+    def _stop_state_sources(self):
+        self._stop_fallbacks()
+        self._unsubscribe()
+
+    def _retry_subscribe(self):
+        self._subscribe_retry_job = None
+        self._subscribe()
+        if self._sub_sock is not None:
+            self._start_state_source()
+        else:
+            self._subscribe_retry_job = self.after(SUBSCRIBE_RETRY_MS, self._retry_subscribe)
+
+    def _subscribe(self):
+        path = self.cfg.get("control_socket", CONTROL_SOCKET).strip()
+        if not path:
+            return
+        try:
+            sock = subscribe(path)
+        except OSError:
+            return
+        try:
+            self.tk.createfilehandler(sock, tk.READABLE, self._on_state_push)
+        except (AttributeError, tk.TclError):  # Tk built without file handlers
+            sock.close()
+            return
+        self._sub_sock, self._sub_buf = sock, b""
+
+    def _unsubscribe(self):
+        if self._sub_sock is not None:
+            self.tk.deletefilehandler(self._sub_sock)
+            self._sub_sock.close()
+            self._sub_sock = None
+        self._last_state = None
+
+    def _on_state_push(self, _file, _mask):
+        try:
+            data = self._sub_sock.recv(65536)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        lines = []
+        if data:
+            self._sub_buf += data
+            *lines, self._sub_buf = self._sub_buf.split(b"\n")
+        for line in lines:
+            try:
+                msg = json.loads(line)
+            except ValueError:
+                continue
+            if msg.get("ok") is False:
+                data = b""  # daemon refused the subscription
+                break
+            if isinstance(msg.get("state"), dict):
+                self._last_state = msg["state"]
+        if not data:
+            # Daemon stopped or restarted: switch to a fallback until it is back
+            self._unsubscribe()
+            self._start_state_source()
+            return
+        self._show_state()
+
+    def _show_state(self):
+        state = self._last_state
+        if not state or not self._brightness_path:
+            return
+        # Multi-display daemons report every backlight; pick the one shown here
+        base = os.path.realpath(os.path.dirname(self._brightness_path))
+        entry = next((d for d in state.get("displays", []) if os.path.realpath(d.get("backlight", "")) == base), None)
+        if entry is None:
+            self.display_state_lbl.configure(text="")
+            self.energy_lbl.configure(text="-")
+            return
+        self.display_state_lbl.configure(text="asleep" if entry.get("asleep") else "dimmed" if entry.get("dim_stage") else "awake")
+        energy = entry.get("energy")
+        if energy:
+            on_min = energy["today_screen_on_seconds"] / 60.0
+            self.energy_lbl.configure(text=f"{on_min // 60:.0f} h {on_min % 60:02.0f} min, ~{energy['today_wh']:.1f} Wh "
+                                           f"(total ~{energy['wh']:.1f} Wh)")
+        # During a fade, show where it is heading rather than an intermediate level
+        target = entry.get("fading_to")
+        self._show_brightness(target if target is not None else entry.get("brightness"))
+
+    def _watch_sysfs(self):
+        path = os.path.join(os.path.dirname(self._brightness_path or ""), "actual_brightness")
+        if not self._brightness_path or not os.path.exists(path):
+            return False
+        try:
+            fd = os.open(path, os.O_RDONLY | os.O_CLOEXEC)
+        except OSError:
+            return False
+        try:
+            self.tk.createfilehandler(fd, tk.EXCEPTION, self._on_sysfs_change)
+        except (AttributeError, tk.TclError):
+            os.close(fd)
+            return False
+        self._sysfs_fd = fd
+        self._on_sysfs_change(fd, 0)  # reading the attribute (re)arms the notification
+        return True
+
+    def _on_sysfs_change(self, _file, _mask):
+        try:
+            raw = int(os.pread(self._sysfs_fd, 32, 0).decode().strip())
+        except (OSError, ValueError):
+            return
+        self._show_brightness(raw)
 
     def _start_brightness_poll(self):
         if self._brightness_poll_job:
             self.after_cancel(self._brightness_poll_job)
-        self._brightness_poll_job = self.after(2000, self._poll_brightness_loop)
+        self._brightness_poll_job = self.after(POLL_MS, self._poll_brightness_loop)
 
     def _poll_brightness_loop(self):
-        cur_raw = self._read_current_brightness()
-        if cur_raw is not None and not self._dragging:
-            percent = self._raw_to_percent(cur_raw)
-            if int(round(self.brightness_scale.get())) != int(percent):
-                self.brightness_scale.set(percent)
-            self._update_brightness_label(percent)
+        self._show_brightness(self._read_current_brightness())
         self._start_brightness_poll()
 
-    def on_save(self):
+    def _check_display(self, name, values):
+        """False (after telling the user) if the effective settings of one section are invalid."""
+        where = "" if name == MAIN_DISPLAY else f"[{name}] "
         try:
-            idle = int(self.idle_var.get()); assert idle > 0
+            idle = int(values["idle_seconds"]); assert idle > 0
         except Exception:
-            messagebox.showerror("Error", "Idle (seconds) must be a positive integer.")
-            return
+            messagebox.showerror("Error", f"{where}Idle (seconds) must be a positive integer.")
+            return False
 
-        # rescan_interval kept (hidden) but validated
         try:
-            scan = float(self.scan_var.get()); assert scan > 0
+            stages = parse_stages(values.get("dim_stages", ""))
+        except ValueError as e:
+            messagebox.showerror("Error", f"{where}Dim before sleep: {e} (e.g. 60:20% or 30:50%/1000, 60:10%).")
+            return False
+        if stages and stages[-1][0] >= idle:
+            messagebox.showerror("Error", f"{where}Dim stages must all come before the idle timeout ({idle} s).")
+            return False
+
+        try:
+            fade_out = int(values["fade_out_ms"]); fade_in = int(values["fade_in_ms"])
+            assert fade_out >= 0 and fade_in >= 0
         except Exception:
-            # silently fallback to previous valid value in config if invalid
-            scan = float(self.cfg.get("rescan_interval", "2.0"))
+            messagebox.showerror("Error", f"{where}Fade durations must be non-negative integers (milliseconds).")
+            return False
 
-        bl = self.bl_var.get().strip()
+        bl = values["bl_base"].strip()
         if bl and (not bl.startswith("/sys/class/backlight/")):
-            messagebox.showerror("Error", "Backlight path must be under /sys/class/backlight/.")
-            return
+            messagebox.showerror("Error", f"{where}Backlight path must be under /sys/class/backlight/.")
+            return False
         if bl and (not os.path.isdir(bl)):
             if not messagebox.askyesno("Confirm", f"Path {bl} does not exist. Save anyway?"):
+                return False
+        if name != MAIN_DISPLAY and len(self.displays) > 1 and not bl:
+            messagebox.showerror("Error", f"{where}Each display needs its own backlight path.")
+            return False
+        return True
+
+    def on_save(self):
+        self._store_form()
+        if not self._check_display(MAIN_DISPLAY, self.cfg):
+            return
+        for name, own in self.displays.items():
+            if not self._check_display(name, dict(self.cfg, **own)):
                 return
 
-        cfg = {
-            "idle_seconds": str(idle),
-            "bl_base": bl,
-            "force_max_on_wake": "true" if self.force_var.get() else "false",
+        # rescan_interval kept (hidden) but validated
+        try:
+            scan = float(self.scan_var.get()); assert scan > 0
+        except Exception:
+            # silently fallback to previous valid value in config if invalid
+            scan = float(self.cfg.get("rescan_interval", "2.0"))
+
+        cfg = dict(self.cfg)
+        cfg.update({
             "rescan_interval": str(scan),
             # Preserve debug setting (no GUI control)
             "debug": self._debug_value,
-        }
+        })
         try:
-            save_config(cfg)
+            save_config(cfg, self.displays, self.profiles)
         except PermissionError:
             messagebox.showerror("Permission required","Cannot write /etc/touch-wake-display.conf.\nReinstall: file should be owned by the user.")
             return
         except Exception as e:
             messagebox.showerror("Error", f"Saving failed:\n{e}")
             return
-        if restart_service():
+        try:
+            pending = apply_live(cfg, self.displays, self.profiles)
+        except RuntimeError as e:
+            messagebox.showerror("Error", f"Saved, but the daemon rejected the settings:\n{e}")
+            return
+        if pending == []:
+            messagebox.showinfo("OK", "Saved and applied.")
+            self.destroy()
+        elif restart_service():
+            # Daemon not reachable (or a setting needs a restart): fall back to systemctl
             messagebox.showinfo("OK", "Saved and service restarted.")
             self.destroy()
 
@@ -24,6 +24,8 @@ echo ">> Copying application files to $APP_DIR …"
 mkdir -p "$APP_DIR"
 install -m 0755 "$REPO_DIR/daemon/touch-wake-display.py" "$APP_DIR/touch-wake-display.py"
 install -m 0755 "$REPO_DIR/gui/touch-wake-settings.py" "$APP_DIR/touch-wake-settings.py"
+mkdir -p "$APP_DIR/touchwake"
+install -m 0644 "$REPO_DIR"/touchwake/*.py "$APP_DIR/touchwake/"
 
 echo ">> Ensuring config file exists: $CONF"
 if [ ! -f "$CONF" ]; then
@@ -41,12 +43,20 @@ fi
 # Ensure readable by user/group
 chmod 0644 "$CONF" || true
 
+# control_group: the service joins it (SupplementaryGroups) to chgrp the control socket and inhibit dir
+CONTROL_GROUP="$(sed -n 's/^[[:space:]]*control_group[[:space:]]*=//p' "$CONF" | tail -n 1 | tr -d '[:space:]')"
+if [ -n "$CONTROL_GROUP" ]; then
+  echo ">> Ensuring control group exists: $CONTROL_GROUP"
+  groupadd -f "$CONTROL_GROUP"
+fi
+
 echo ">> Generating service file for user: $TARGET_USER"
 # Build service from template
 sed \
   -e "s|@@APP_DIR@@|$APP_DIR|g" \
   -e "s|@@USER@@|$TARGET_USER|g" \
   -e "s|@@GROUP@@|$TARGET_GROUP|g" \
+  -e "s|@@CONTROL_GROUP@@|$CONTROL_GROUP|g" \
   "$SERVICE_TMPL" > "$SERVICE_FILE"
 
 echo ">> Installing desktop entry …"
@@ -0,0 +1 @@
+"""Shared modules for the touch-wake-display daemon and the settings GUI."""
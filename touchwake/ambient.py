@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+Ambient-light adaptive brightness from an IIO light sensor.
+- The sensor attribute (in_illuminance*_input, or _raw with _scale/_offset) is
+  opened once and sampled with pread every ambient_interval seconds while a
+  display is awake; no samples (no timer) while every display is asleep
+- Samples are smoothed with an EMA; lux maps to a brightness percentage through
+  a lookup table precomputed over log10(lux) from the ambient_curve points
+- Hysteresis: a new level is only published once it differs by at least
+  ambient_hysteresis percent from the one in use
+The buffered IIO chardev is not used: at one sample every few seconds a single
+pread is cheaper than enabling a trigger and scan buffer.
+"""
+
+import glob, math, os
+from array import array
+
+from touchwake.paths import IIO_DIR
+
+LUT_STEPS_PER_DECADE = 32
+LUT_DECADES = 6  # up to 1e6 lux (direct sunlight ~1e5)
+_ATTR_PATTERNS = ("in_illuminance_input", "in_illuminance*_input", "in_illuminance_raw", "in_illuminance*_raw")
+
+def parse_curve(text):
+    """'lux:percent, ...' -> sorted ((lux, percent), ...); ValueError if malformed."""
+    points = []
+    for item in (text or "").split(","):
+        if not item.strip():
+            continue
+        lux, sep, pct = item.partition(":")
+        if not sep:
+            raise ValueError(f"ambient_curve point '{item.strip()}' is not lux:percent")
+        lux, pct = float(lux), float(pct)
+        if lux < 0 or not 0 <= pct <= 100:
+            raise ValueError("ambient_curve needs lux >= 0 and 0 <= percent <= 100")
+        points.append((lux, pct))
+    if not points:
+        raise ValueError("ambient_curve needs at least one lux:percent point")
+    return tuple(sorted(points))
+
+def build_lut(points):
+    """Brightness percent per log10(lux + 1) step, interpolated linearly between the curve points."""
+    xs = [math.log10(lux + 1.0) for lux, _pct in points]
+    ys = [pct for _lux, pct in points]
+    lut = array("d")
+    for i in range(LUT_DECADES * LUT_STEPS_PER_DECADE + 1):
+        x = i / LUT_STEPS_PER_DECADE
+        if x <= xs[0]:
+            lut.append(ys[0])
+        elif x >= xs[-1]:
+            lut.append(ys[-1])
+        else:
+            j = next(k for k in range(1, len(xs)) if x <= xs[k])
+            t = (x - xs[j - 1]) / (xs[j] - xs[j - 1])
+            lut.append(ys[j - 1] + t * (ys[j] - ys[j - 1]))
+    return lut
+
+def find_light_sensor(path="", iio_dir=IIO_DIR):
+    """Illuminance attribute: `path` itself, the first match inside `path` (device dir) or under iio_dir/*."""
+    if path and not os.path.isdir(path):
+        return path if os.path.exists(path) else None
+    dirs = [path] if path else sorted(glob.glob(os.path.join(iio_dir, "*")))
+    for pattern in _ATTR_PATTERNS:
+        for d in dirs:
+            found = sorted(glob.glob(os.path.join(d, pattern)))
+            if found:
+                return found[0]
+    return None
+
+def _read_float(path, default):
+    try:
+        with open(path) as f:
+            return float(f.read().strip())
+    except (OSError, ValueError):
+        return default
+
+class LightSensor:
+    """Persistent descriptor on one illuminance attribute; read_lux() costs one pread."""
+
+    def __init__(self, path):
+        self.path = path
+        self.scale, self.offset = 1.0, 0.0
+        if path.endswith("_raw"):
+            prefix = path[:-len("raw")]
+            self.scale = _read_float(prefix + "scale", 1.0)
+            self.offset = _read_float(prefix + "offset", 0.0)
+        self._fd = os.open(path, os.O_RDONLY | os.O_CLOEXEC)
+
+    def read_lux(self):
+        """Illuminance in lux; raises OSError/ValueError on a failed read."""
+        return max(0.0, (float(os.pread(self._fd, 32, 0)) + self.offset) * self.scale)
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+class AmbientLight:
+    """
+    Samples `sensor` on `loop` and calls on_level(percent) when the smoothed,
+    mapped level moves by at least `hysteresis` percent. pause()/resume() follow
+    the displays' sleep state.
+    """
+
+    def __init__(self, loop, sensor, on_level, interval=2.0, smoothing=0.3, curve=((0.0, 100.0),),
+                 hysteresis=5.0, log=None):
+        self.loop = loop
+        self.sensor = sensor
+        self.on_level = on_level
+        self.interval = interval
+        self.alpha = smoothing
+        self.lut = build_lut(curve)
+        self.hysteresis = hysteresis
+        self.log = log or (lambda *a: None)
+        self.lux = None      # smoothed illuminance
+        self.percent = None  # level in use (published)
+        self.samples = 0
+        self.errors = 0
+        self._timer = None
+
+    @property
+    def running(self):
+        return self._timer is not None
+
+    def resume(self):
+        """Sample now and every interval until pause()."""
+        if self._timer is None:
+            self._timer = self.loop.call_later(0, self._sample)
+
+    def pause(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def close(self):
+        self.pause()
+        self.sensor.close()
+
+    def level_for(self, lux):
+        i = int(math.log10(lux + 1.0) * LUT_STEPS_PER_DECADE)
+        return self.lut[min(i, len(self.lut) - 1)]
+
+    def _sample(self):
+        self._timer = self.loop.call_later(self.interval, self._sample)
+        try:
+            lux = self.sensor.read_lux()
+        except (OSError, ValueError) as e:
+            self.errors += 1
+            self.log("WARN light sensor:", self.sensor.path, e)
+            return
+        self.samples += 1
+        self.lux = lux if self.lux is None else self.lux + self.alpha * (lux - self.lux)
+        percent = self.level_for(self.lux)
+        # The curve's ends are always reached, even if closer than the hysteresis
+        edge = percent in (self.lut[0], self.lut[-1]) and percent != self.percent
+        if self.percent is None or edge or abs(percent - self.percent) >= self.hysteresis:
+            self.percent = percent
+            self.log(f"AMBIENT lux={self.lux:.1f} -> {percent:.0f}%")
+            self.on_level(percent)
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+Backlight sysfs access with persistent file descriptors.
+- brightness, actual_brightness, max_brightness and bl_power are opened once
+- Reads/writes use os.pread/os.pwrite at offset 0 (no open/close per call)
+- Common values (0, max, last active level) are pre-encoded
+- Writes that would not change the value are skipped
+- Descriptors are reopened once on ENODEV/ENOENT (device unbound and rebound)
+- on_level(level, powered) is called after every completed write (energy accounting)
+- Completion times of the latest writes are kept for wake tracing (monotonic)
+"""
+
+import errno, os, time
+
+_REOPEN_ERRNOS = (errno.ENODEV, errno.ENOENT, errno.EBADF, errno.ENXIO)
+
+POWER_ON = 0   # FB_BLANK_UNBLANK
+POWER_OFF = 4  # FB_BLANK_POWERDOWN
+
+class Backlight:
+    def __init__(self, base, log=None, truncate=False):
+        self.base = base
+        self.log = log or (lambda *a: None)
+        self._truncate = truncate  # plain files (benchmarks) keep stale digits after a shorter value
+        self._fd_brightness = -1
+        self._fd_actual = -1
+        self._fd_max = -1
+        self._fd_power = -1
+        self.max = 255
+        self._encoded = {}
+        self._last_brightness = None  # last value written or read back
+        self._last_power = None
+        self.writes = 0         # sysfs writes issued (metrics)
+        self.writes_skipped = 0 # writes avoided because the value was unchanged
+        self.on_level = None    # callback(level, powered) after a brightness/power change
+        self.brightness_written_at = 0.0  # time.monotonic() after the latest brightness write
+        self.power_written_at = 0.0       # ... and bl_power write
+        self.open()
+
+    # --- Setup ------------------------------------------------------------
+    def open(self):
+        """(Re)open all attributes; raises OSError if brightness is unavailable."""
+        self.close()
+        join = os.path.join
+        self._fd_brightness = os.open(join(self.base, "brightness"), os.O_RDWR | os.O_CLOEXEC)
+        self._fd_actual = self._open_optional("actual_brightness", os.O_RDONLY)
+        self._fd_max = self._open_optional("max_brightness", os.O_RDONLY)
+        self._fd_power = self._open_optional("bl_power", os.O_RDWR)
+        try:
+            self.max = self._pread_int(self._fd_max) if self._fd_max >= 0 else 255
+        except (OSError, ValueError):
+            self.max = 255
+        self._encoded = {0: self._encode(0), self.max: self._encode(self.max)}
+        self._last_brightness = None
+        self._last_power = None
+
+    def _open_optional(self, name, flags):
+        try:
+            return os.open(os.path.join(self.base, name), flags | os.O_CLOEXEC)
+        except OSError:
+            return -1
+
+    def close(self):
+        for attr in ("_fd_brightness", "_fd_actual", "_fd_max", "_fd_power"):
+            fd = getattr(self, attr)
+            if fd >= 0:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+                setattr(self, attr, -1)
+
+    @property
+    def has_power(self):
+        return self._fd_power >= 0
+
+    # --- Low-level I/O ----------------------------------------------------
+    @staticmethod
+    def _encode(val):
+        return b"%d\n" % val
+
+    def remember(self, val):
+        """Pre-encode a frequently used level (e.g. last active brightness)."""
+        if val not in self._encoded:
+            self._encoded[val] = self._encode(val)
+
+    @staticmethod
+    def _pread_int(fd):
+        return int(os.pread(fd, 32, 0).strip())
+
+    def _pwrite(self, fd, data):
+        self.writes += 1
+        os.pwrite(fd, data, 0)
+        if self._truncate:
+            os.ftruncate(fd, len(data))
+
+    def _retry_after_reopen(self, e):
+        """True if the device vanished/rebound and was reopened successfully."""
+        if e.errno not in _REOPEN_ERRNOS:
+            return False
+        try:
+            self.open()
+        except OSError as e2:
+            self.log("WARN backlight reopen failed:", e2)
+            return False
+        self.log("backlight reopened:", self.base)
+        return True
+
+    # --- Public API -------------------------------------------------------
+    def read_brightness(self, default=None):
+        """Current brightness setting; default (max) if unreadable."""
+        for attempt in (0, 1):
+            try:
+                val = self._pread_int(self._fd_brightness)
+                self._last_brightness = val
+                return val
+            except OSError as e:
+                if attempt or not self._retry_after_reopen(e):
+                    break
+            except ValueError:
+                break
+        return self.max if default is None else default
+
+    def read_actual_brightness(self):
+        """Brightness as reported by the driver; falls back to the set value."""
+        if self._fd_actual >= 0:
+            try:
+                return self._pread_int(self._fd_actual)
+            except (OSError, ValueError):
+                pass
+        return self.read_brightness()
+
+    def set_brightness(self, val):
+        """Clamp and write brightness; skipped if unchanged. Returns True if written."""
+        val = max(0, min(self.max, int(val)))
+        if val == self._last_brightness:
+            self.writes_skipped += 1
+            return False
+        data = self._encoded.get(val) or self._encode(val)
+        for attempt in (0, 1):
+            try:
+                self._pwrite(self._fd_brightness, data)
+                self.brightness_written_at = time.monotonic()
+                self._last_brightness = val
+                self.log("brightness ->", val)
+                self._changed()
+                return True
+            except OSError as e:
+                if attempt or not self._retry_after_reopen(e):
+                    self._last_brightness = None
+                    self.log("ERROR set_brightness:", e)
+                    return False
+        return False
+
+    def set_power(self, on):
+        """Write bl_power (0=on, 4=off) where supported; skipped if unchanged."""
+        state = POWER_ON if on else POWER_OFF
+        if self._fd_power < 0 or state == self._last_power:
+            return False
+        for attempt in (0, 1):
+            try:
+                self._pwrite(self._fd_power, self._encoded.get(state) or self._encode(state))
+                self.power_written_at = time.monotonic()
+                self._last_power = state
+                self.log("bl_power ->", state)
+                self._changed()
+                return True
+            except OSError as e:
+                if attempt or not self._retry_after_reopen(e) or self._fd_power < 0:
+                    self._last_power = None
+                    self.log("WARN set_power:", e)
+                    return False
+        return False
+
+    def _changed(self):
+        if not self.on_level:
+            return
+        level = self._last_brightness
+        if level is None:
+            level = self.read_brightness()  # after invalidate() or a reopen: read back what is set
+        self.on_level(level, self._last_power != POWER_OFF)
+
+    def invalidate(self):
+        """Forget cached values (something else may have written the attributes)."""
+        self._last_brightness = None
+        self._last_power = None
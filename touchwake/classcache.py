@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+Persistent device classification cache.
+- Identity comes from sysfs (/sys/class/input/eventN/device), no device open needed:
+  bus/vendor/product/version + phys, plus a hash of name, capability bitmaps and properties
+- Verdicts (relevant or not) are cached in /var/cache/touch-wake-display/devices.json;
+  a changed identity is simply a different key (old entries age out)
+- include/exclude rules (fnmatch patterns on name, phys or vendor:product) are
+  applied on top of the cached verdict, so editing them needs no invalidation
+Nodes without sysfs identity return None and are classified by opening them.
+"""
+
+import fnmatch, json, os
+
+from touchwake.devices import INPUT_PROP_DIRECT, classify
+from touchwake.evio import EV_KEY, EV_REL
+from touchwake.paths import CACHE_PATH, SYSFS_INPUT
+
+CACHE_VERSION = 1
+MAX_ENTRIES = 256
+
+_ID_FIELDS = ("bustype", "vendor", "product", "version")
+_CAP_FIELDS = ("ev", "key", "rel", "abs")
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def _bitmap(text):
+    """sysfs bitmap ("120013" or "3 0 fffe ...", most significant word first) -> int, low word only."""
+    words = (text or "0").split()
+    return int(words[-1], 16)
+
+def parse_rules(text):
+    """Comma-separated fnmatch patterns (case-insensitive)."""
+    return tuple(p.strip().lower() for p in (text or "").split(",") if p.strip())
+
+def read_identity(node, sysfs=SYSFS_INPUT):
+    """Identity dict for an event node name (e.g. 'event3'), or None without sysfs info."""
+    base = os.path.join(sysfs, node, "device")
+    ids = [_read(os.path.join(base, "id", f)) for f in _ID_FIELDS]
+    if None in ids:
+        return None
+    caps = {f: _read(os.path.join(base, "capabilities", f)) or "0" for f in _CAP_FIELDS}
+    return {
+        "name": _read(os.path.join(base, "name")) or "",
+        "phys": _read(os.path.join(base, "phys")) or "",
+        "id": ":".join(ids),
+        "usb_id": f"{ids[1]}:{ids[2]}",
+        "caps": caps,
+        "properties": _read(os.path.join(base, "properties")) or "0",
+    }
+
+def identity_key(ident):
+    import hashlib  # only needed on a cache miss (~4 ms import)
+    digest = hashlib.sha1("|".join([ident["name"], ident["properties"]]
+                                   + [ident["caps"][f] for f in _CAP_FIELDS]).encode()).hexdigest()[:16]
+    return f"{ident['id']}|{ident['phys']}|{digest}"
+
+def classify_identity(ident):
+    ev = _bitmap(ident["caps"]["ev"])
+    ev_types = {t for t in (EV_KEY, EV_REL) if ev & (1 << t)}
+    direct = bool(_bitmap(ident["properties"]) & (1 << INPUT_PROP_DIRECT))
+    return classify(ident["name"], ev_types, direct)
+
+def _matches(patterns, ident):
+    fields = (ident["name"].lower(), ident["phys"].lower(), ident["usb_id"].lower())
+    return any(fnmatch.fnmatchcase(f, p) for p in patterns for f in fields)
+
+class ClassCache:
+    def __init__(self, path=CACHE_PATH, sysfs=SYSFS_INPUT, include=(), exclude=(), log=None):
+        self.path = path
+        self.sysfs = sysfs
+        self.include = include
+        self.exclude = exclude
+        self.log = log or (lambda *a: None)
+        self.entries = {}  # identity key -> bool (insertion order = age)
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        self.load()
+
+    def load(self):
+        if not self.path:
+            return
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            self.log("WARN device cache unreadable, starting empty:", e)
+            return
+        if isinstance(data, dict) and data.get("version") == CACHE_VERSION and isinstance(data.get("entries"), dict):
+            self.entries = {k: bool(v) for k, v in data["entries"].items()}
+
+    def save(self):
+        """Persist if something changed (atomic replace); errors are logged, not fatal."""
+        if not self._dirty or not self.path:
+            return
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp, "w") as f:
+                json.dump({"version": CACHE_VERSION, "entries": self.entries}, f, indent=1)
+            os.replace(tmp, self.path)
+            self._dirty = False
+        except OSError as e:
+            self.log("WARN device cache not saved:", e)
+
+    def decide(self, path):
+        """True (open it), False (skip without opening) or None (no sysfs identity: open and classify)."""
+        ident = read_identity(os.path.basename(path), self.sysfs)
+        if ident is None:
+            return None
+        if self.exclude and _matches(self.exclude, ident):
+            return False
+        if self.include and _matches(self.include, ident):
+            return True
+        key = identity_key(ident)
+        verdict = self.entries.get(key)
+        if verdict is None:
+            self.misses += 1
+            verdict = classify_identity(ident)
+            self.entries[key] = verdict
+            while len(self.entries) > MAX_ENTRIES:
+                del self.entries[next(iter(self.entries))]
+            self._dirty = True
+        else:
+            self.hits += 1
+        return verdict
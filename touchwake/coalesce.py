@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Coalesced, rate-limited writes of an integer sysfs attribute (GUI brightness slider).
+- set() only stores the latest target; a worker thread does the I/O, so the
+  caller (Tk main loop) never blocks on a slow backlight controller (I2C)
+- At most max_hz writes per second; targets arriving in between replace each other
+- A target equal to the last value written during the same drag is skipped;
+  commit() ends the drag, so the next one always writes (the daemon may have
+  changed the level in between: sleep, dim, ambient, profile)
+- commit() writes the final value and waits for it (slider release)
+The attribute stays open for the writer's lifetime (pwrite, no open/close per write).
+"""
+
+import os, threading, time
+
+class CoalescedWriter:
+    def __init__(self, path, max_hz=60.0, truncate=False):
+        self.path = path
+        self.interval = 1.0 / max_hz
+        self.writes = 0
+        self.skipped = 0
+        self.error = None  # OSError of the latest write, None after a successful one
+        self._fd = os.open(path, os.O_WRONLY | os.O_CLOEXEC)
+        self._truncate = truncate  # plain files (benchmarks) keep stale digits after a shorter value
+        self._cond = threading.Condition()
+        self._pending = None
+        self._written = None   # last value written in the current drag
+        self._end = False      # the pending value is a commit() (ends the drag)
+        self._busy = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="brightness-writer", daemon=True)
+        self._thread.start()
+
+    def set(self, value):
+        """Request `value`; returns at once (the write happens in the next free slot)."""
+        with self._cond:
+            self._pending = int(value)
+            self._cond.notify_all()
+
+    def commit(self, value, timeout=1.0):
+        """Request `value` and wait until it is written (or skipped as unchanged); returns the write error."""
+        with self._cond:
+            self._pending = int(value)
+            self._end = True
+            self._cond.notify_all()
+            self._cond.wait_for(lambda: self._pending is None and not self._busy, timeout)
+            return self.error
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(1.0)
+        os.close(self._fd)
+
+    def _run(self):
+        next_slot = 0.0
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending is not None or self._closed)
+                # Rate limit; newer targets replace the pending one while waiting for the slot
+                while not self._closed and (delay := next_slot - time.monotonic()) > 0:
+                    self._cond.wait(delay)
+                if self._closed:
+                    return
+                value, self._pending = self._pending, None
+                end, self._end = self._end, False
+                if value == self._written:
+                    self.skipped += 1
+                    if end:
+                        self._written = None
+                    self._cond.notify_all()
+                    continue
+                self._busy = True
+            try:
+                data = str(value).encode()
+                os.pwrite(self._fd, data, 0)
+                if self._truncate:
+                    os.ftruncate(self._fd, len(data))
+                error = None
+            except OSError as e:
+                error = e
+            next_slot = time.monotonic() + self.interval
+            with self._cond:
+                self._busy = False
+                self.error = error
+                if error is None:
+                    self._written = None if end else value
+                    self.writes += 1
+                self._cond.notify_all()
@@ -0,0 +1,330 @@
+# -*- coding: utf-8 -*-
+"""
+Daemon configuration (/etc/touch-wake-display.conf, section [touchwake]).
+Missing keys fall back to the defaults below; invalid values raise ValueError.
+Optional [display:NAME] sections configure several backlights; each inherits
+the per-display keys (DISPLAY_KEYS) it does not set from [touchwake].
+Optional [profile:NAME] sections are time-of-day schedule profiles (see schedule.py).
+ConfigWatcher reports edits of the file via inotify on its directory (editors
+and the GUI may replace the file instead of writing it in place).
+"""
+
+import configparser, os
+
+from touchwake.ambient import parse_curve
+from touchwake.core import parse_stages
+from touchwake.schedule import MODES, parse_times
+from touchwake.wakefilter import parse_filter
+from touchwake.fade import CURVES
+from touchwake.inotify import Inotify, IN_CLOSE_WRITE, IN_MOVED_TO, IN_Q_OVERFLOW
+from touchwake.paths import (CACHE_PATH, CONF_PATH, CONTROL_SOCKET, ENERGY_FILE, INHIBIT_DIR, INPUT_DIR, METRICS_FILE,
+                             SYSFS_INPUT, TRACE_FILE)
+from touchwake.mux import BACKENDS
+
+SECTION = "touchwake"
+DISPLAY_PREFIX = "display:"
+PROFILE_PREFIX = "profile:"
+DEFAULT_DISPLAY = "default"  # implicit display when no [display:NAME] section exists
+MAX_TRACE_SIZE = 65536       # trace ring arrays are preallocated at this many wakes
+
+_TRUE = ("1", "true", "yes", "on")
+
+def parse_bool(value):
+    return str(value).strip().lower() in _TRUE
+
+# key -> (parser, default)
+FIELDS = {
+    "idle_seconds": (int, 30),
+    "dim_stages": (str, ""),               # dim before the sleep, e.g. "60:20%" or "30:50%/1000, 90:10%"; empty => off only
+    "bl_base": (str, ""),                  # empty => auto-detect
+    "force_max_on_wake": (parse_bool, False),
+    "rescan_interval": (float, 2.0),       # fallback when inotify is unavailable
+    "input_dir": (str, INPUT_DIR),
+    "input_sysfs": (str, SYSFS_INPUT),     # device identity for the classification cache
+    "device_cache": (str, CACHE_PATH),     # persisted classifications; empty => disabled
+    "include_devices": (str, ""),          # comma-separated patterns (name, phys or vendor:product)
+    "exclude_devices": (str, ""),          # checked first; e.g. "*power button*, vc4-hdmi*"
+    "wake_filter": (str, ""),              # rules for waking, e.g. "contact=40, touch, palm=30, travel=20/250"
+    "awake_filter": (str, ""),             # rules for keeping awake (same syntax); empty => any relevant event
+    "no_wake_devices": (str, ""),          # patterns (name/phys): keep displays awake, never wake them
+    "input_backend": (str, "epoll"),       # epoll | poll
+    "quiesce_active_devices": (parse_bool, True),
+    "kernel_event_mask": (parse_bool, True),
+    "reduce_event_mask_when_active": (parse_bool, False),
+    "fade_in_ms": (int, 80),
+    "fade_out_ms": (int, 300),
+    "fade_curve": (str, "gamma"),          # linear | gamma | log
+    "fade_max_hz": (float, 60.0),          # cap on brightness writes per second during a fade
+    "adaptive_brightness": (parse_bool, False),  # follow an IIO ambient light sensor
+    "light_sensor": (str, ""),             # illuminance attribute or IIO device dir; empty => auto-detect
+    "ambient_interval": (float, 2.0),      # seconds between sensor samples while awake
+    "ambient_smoothing": (float, 0.3),     # EMA weight of a new sample (0..1]
+    "ambient_curve": (str, "0:10, 10:25, 100:50, 1000:80, 10000:100"),  # lux:percent points
+    "ambient_hysteresis": (float, 5.0),    # percent points before the level changes
+    "ambient_fade_ms": (int, 1000),        # fade to a new ambient level while awake
+    "energy_file": (str, ENERGY_FILE),     # screen-on time / energy history; empty => not persisted
+    "energy_watts_min": (float, 0.3),      # estimated panel power while lit at the lowest level
+    "energy_watts_max": (float, 2.5),      # ... and at max_brightness (linear in between)
+    "trace_wakes": (parse_bool, False),    # record per-wake latency stages (kernel event -> backlight writes)
+    "trace_size": (int, 256),              # wakes kept in the trace ring
+    "trace_file": (str, TRACE_FILE),       # written on SIGUSR1
+    "record_file": (str, ""),              # activity log for --replay; empty => not recorded
+    "record_max_bytes": (int, 4194304),    # rotate the activity log to <file>.1 at this size
+    "metrics_file": (str, METRICS_FILE),   # Prometheus textfile; empty => disabled
+    "metrics_interval": (float, 30.0),     # refresh while awake (also written on sleep/wake/exit)
+    "control_socket": (str, CONTROL_SOCKET),  # live apply from the GUI; empty => disabled
+    "control_group": (str, ""),            # chgrp the socket (mode 0660) to this group
+    "inhibit_dir": (str, INHIBIT_DIR),     # idle inhibitor lock files; empty => socket inhibitors only
+    "debug": (parse_bool, False),
+}
+
+# Keys a [display:NAME] section may override, plus its own device mapping rules
+DISPLAY_KEYS = ("bl_base", "idle_seconds", "dim_stages", "force_max_on_wake", "fade_in_ms", "fade_out_ms", "fade_curve",
+                "fade_max_hz", "energy_watts_min", "energy_watts_max")
+DISPLAY_FIELDS = {key: FIELDS[key] for key in DISPLAY_KEYS}
+DISPLAY_FIELDS["devices"] = (str, "")  # comma-separated patterns (input device name or phys)
+
+# [profile:NAME] sections: schedule windows plus what changes while one is active (unset = no change)
+PROFILE_FIELDS = {
+    "times": (str, ""),                    # e.g. "mon-fri 08:00-18:00, sat 09:00-13:00" or "sun"
+    "mode": (str, "auto"),                 # auto (idle timer) | on (always on) | off (always off, input ignored)
+    "idle_seconds": (int, None),
+    "force_max_on_wake": (parse_bool, None),
+    "wake_brightness": (int, None),        # percent of max on wake (and when the profile starts)
+    "displays": (str, ""),                 # comma-separated display names; empty => all
+}
+
+# Cannot change while running (reported back, applied on the next start)
+RESTART_KEYS = ("input_backend", "control_socket", "control_group")
+AMBIENT_KEYS = ("adaptive_brightness", "light_sensor", "ambient_interval", "ambient_smoothing", "ambient_curve",
+                "ambient_hysteresis")
+
+def parse_values(raw, fields=FIELDS):
+    """Parse {key: text} (config file spelling) into typed values; unknown keys raise ValueError."""
+    values = {}
+    for key, text in raw.items():
+        if key not in fields:
+            raise ValueError(f"unknown setting '{key}'")
+        parser = fields[key][0]
+        text = str(text).strip()
+        try:
+            values[key] = parser(text)
+        except ValueError:
+            raise ValueError(f"{key} = '{text}' is not a valid {parser.__name__}") from None
+    return values
+
+def _validate_display(cfg, where=""):
+    """Checks shared by [touchwake] and [display:NAME] (DISPLAY_KEYS)."""
+    cfg.bl_base = cfg.bl_base.strip()
+    cfg.fade_curve = cfg.fade_curve.strip().lower()
+    if cfg.idle_seconds <= 0:
+        raise ValueError(f"{where}idle_seconds must be a positive integer")
+    try:
+        stages = parse_stages(cfg.dim_stages)
+    except ValueError as e:
+        raise ValueError(f"{where}{e}") from None
+    if stages and stages[-1][0] >= cfg.idle_seconds:
+        raise ValueError(f"{where}dim_stages must all come before idle_seconds ({cfg.idle_seconds} s)")
+    if cfg.fade_in_ms < 0 or cfg.fade_out_ms < 0:
+        raise ValueError(f"{where}fade_in_ms / fade_out_ms must not be negative")
+    if cfg.fade_curve not in CURVES:
+        raise ValueError(f"{where}fade_curve must be one of: {', '.join(CURVES)}")
+    if cfg.fade_max_hz < 1:
+        raise ValueError(f"{where}fade_max_hz must be at least 1")
+    if not 0 <= cfg.energy_watts_min <= cfg.energy_watts_max:
+        raise ValueError(f"{where}energy_watts_min / energy_watts_max need 0 <= min <= max")
+
+class DisplayConfig:
+    """Effective settings of one backlight: [display:NAME] overrides on top of [touchwake]."""
+
+    def __init__(self, name, base, overrides):
+        self.name = name
+        for key in DISPLAY_KEYS:
+            setattr(self, key, overrides.get(key, getattr(base, key)))
+        self.devices = overrides.get("devices", "")
+        _validate_display(self, f"[{DISPLAY_PREFIX}{name}] ")
+
+    def as_dict(self):
+        return {key: getattr(self, key) for key in DISPLAY_FIELDS}
+
+    def __eq__(self, other):
+        return isinstance(other, DisplayConfig) and self.name == other.name and self.as_dict() == other.as_dict()
+
+class ProfileConfig:
+    """One [profile:NAME] section; attributes of keys the section does not set are None."""
+
+    def __init__(self, name, values):
+        self.name = name
+        where = f"[{PROFILE_PREFIX}{name}] "
+        for key in PROFILE_FIELDS:
+            setattr(self, key, values.get(key))
+        try:
+            self.windows = parse_times(values.get("times", ""))
+        except ValueError as e:
+            raise ValueError(f"{where}{e}") from None
+        self.mode = (self.mode or "auto").strip().lower()
+        if self.mode not in MODES:
+            raise ValueError(f"{where}mode must be one of: {', '.join(MODES)}")
+        if self.idle_seconds is not None and self.idle_seconds <= 0:
+            raise ValueError(f"{where}idle_seconds must be a positive integer")
+        if self.wake_brightness is not None and not 1 <= self.wake_brightness <= 100:
+            raise ValueError(f"{where}wake_brightness must be a percentage from 1 to 100")
+        self.display_names = [n.strip() for n in (self.displays or "").split(",") if n.strip()]
+
+    def covers(self, display_name):
+        return not self.display_names or display_name in self.display_names
+
+class Config:
+    """Validated settings; attributes are named like the config keys."""
+
+    def __init__(self, displays=None, profiles=None, **values):
+        for key, (_parser, default) in FIELDS.items():
+            setattr(self, key, default)
+        for key, value in values.items():
+            if key not in FIELDS:
+                raise ValueError(f"unknown setting '{key}'")
+            setattr(self, key, value)
+        self.displays = dict(displays or {})  # name -> typed overrides (DISPLAY_FIELDS)
+        self.profiles = dict(profiles or {})  # name -> typed values (PROFILE_FIELDS), in priority order
+        self.validate()
+
+    @classmethod
+    def from_section(cls, sec, displays=None, profiles=None):
+        return cls(displays, profiles, **parse_values({key: sec.get(key) for key in FIELDS if key in sec}))
+
+    @classmethod
+    def from_file(cls, path=CONF_PATH):
+        """Parse `path`; a missing file yields the defaults."""
+        if not os.path.exists(path):
+            return cls()
+        parser = configparser.ConfigParser(interpolation=None)  # literal values ("60:20%")
+        try:
+            parser.read(path)
+        except configparser.Error as e:
+            raise ValueError(str(e)) from None
+        sec = parser[SECTION] if SECTION in parser else parser["DEFAULT"]
+        sections = {DISPLAY_PREFIX: ({}, DISPLAY_FIELDS), PROFILE_PREFIX: ({}, PROFILE_FIELDS)}
+        for name in parser.sections():
+            for prefix, (found, fields) in sections.items():
+                if name.startswith(prefix):
+                    own = {k: v for k, v in parser[name].items() if k not in parser.defaults()}
+                    try:
+                        found[name[len(prefix):].strip()] = parse_values(own, fields)
+                    except ValueError as e:
+                        raise ValueError(f"[{name}] {e}") from None
+        return cls.from_section(sec, sections[DISPLAY_PREFIX][0], sections[PROFILE_PREFIX][0])
+
+    def validate(self):
+        _validate_display(self)
+        self.metrics_file = self.metrics_file.strip()
+        self.control_socket = self.control_socket.strip()
+        self.device_cache = self.device_cache.strip()
+        self.input_sysfs = self.input_sysfs.strip()
+        self.control_group = self.control_group.strip()
+        self.input_backend = self.input_backend.strip().lower()
+        if self.rescan_interval <= 0:
+            raise ValueError("rescan_interval must be positive")
+        if self.input_backend not in BACKENDS:
+            raise ValueError(f"input_backend must be one of: {', '.join(BACKENDS)}")
+        self.light_sensor = self.light_sensor.strip()
+        self.energy_file = self.energy_file.strip()
+        if self.ambient_interval <= 0:
+            raise ValueError("ambient_interval must be positive")
+        if not 0 < self.ambient_smoothing <= 1:
+            raise ValueError("ambient_smoothing must be in (0, 1]")
+        if self.ambient_hysteresis < 0 or self.ambient_fade_ms < 0:
+            raise ValueError("ambient_hysteresis / ambient_fade_ms must not be negative")
+        parse_curve(self.ambient_curve)
+        if self.metrics_interval <= 0:
+            raise ValueError("metrics_interval must be positive")
+        self.trace_file = self.trace_file.strip()
+        parse_filter(self.wake_filter, "wake_filter")
+        parse_filter(self.awake_filter, "awake_filter")
+        self.record_file = self.record_file.strip()
+        self.inhibit_dir = self.inhibit_dir.strip()
+        if self.record_max_bytes < 4096:
+            raise ValueError("record_max_bytes must be at least 4096")
+        if not 1 <= self.trace_size <= MAX_TRACE_SIZE:
+            raise ValueError(f"trace_size must be between 1 and {MAX_TRACE_SIZE}")
+        displays = self.display_configs()  # validates every section
+        if len(displays) > 1:
+            bases = [d.bl_base for d in displays]
+            if "" in bases:
+                raise ValueError(f"bl_base is required in every [{DISPLAY_PREFIX}NAME] section when there are several")
+            if len(set(bases)) != len(bases):
+                raise ValueError("two displays use the same bl_base")
+        names = {d.name for d in displays}
+        for profile in self.profile_configs():
+            unknown = [n for n in profile.display_names if n not in names]
+            if unknown:
+                raise ValueError(f"[{PROFILE_PREFIX}{profile.name}] displays: unknown display '{unknown[0]}'")
+
+    def display_configs(self):
+        """Effective per-display settings, in file order (one implicit display without sections)."""
+        if not self.displays:
+            return [DisplayConfig(DEFAULT_DISPLAY, self, {})]
+        return [DisplayConfig(name, self, overrides) for name, overrides in self.displays.items()]
+
+    def profile_configs(self):
+        """Schedule profiles in priority (file) order."""
+        return [ProfileConfig(name, values) for name, values in self.profiles.items()]
+
+    def as_dict(self):
+        values = {key: getattr(self, key) for key in FIELDS}
+        values["displays"] = {name: dict(overrides) for name, overrides in self.displays.items()}
+        values["profiles"] = {name: dict(own) for name, own in self.profiles.items()}
+        return values
+
+    def updated(self, raw):
+        """
+        New Config with {key: text} applied on top of this one (ValueError if invalid).
+        raw["displays"] = {name: {key: text}} replaces all [display:NAME] sections,
+        raw["profiles"] likewise all [profile:NAME] sections.
+        """
+        raw = dict(raw)
+        values = self.as_dict()
+        sections = {}
+        for key, fields in (("displays", DISPLAY_FIELDS), ("profiles", PROFILE_FIELDS)):
+            sections[key] = values.pop(key)
+            if key in raw:
+                new = raw.pop(key)
+                if not isinstance(new, dict) or not all(isinstance(v, dict) for v in new.values()):
+                    raise ValueError(f"{key} must map section names to settings")
+                sections[key] = {name: parse_values(own, fields) for name, own in new.items()}
+        values.update(parse_values(raw))
+        return Config(sections["displays"], sections["profiles"], **values)
+
+    def changed_keys(self, other):
+        changed = [key for key in FIELDS if getattr(self, key) != getattr(other, key)]
+        if self.displays != other.displays:  # inherited keys are already listed above
+            changed.append("displays")
+        if self.profiles != other.profiles:
+            changed.append("profiles")
+        return changed
+
+class ConfigWatcher:
+    """Inotify watch on the config file's directory; changed() drains events."""
+
+    def __init__(self, path=CONF_PATH):
+        self.path = os.path.abspath(path)
+        self.name = os.path.basename(self.path)
+        self._inotify = Inotify()
+        try:
+            self._inotify.add_watch(os.path.dirname(self.path), IN_CLOSE_WRITE | IN_MOVED_TO)
+        except OSError:
+            self._inotify.close()
+            raise
+
+    def fileno(self):
+        return self._inotify.fd
+
+    def changed(self):
+        """True if the config file was written or replaced since the last call."""
+        hit = False
+        for _wd, mask, name in self._inotify.read_events():
+            if name == self.name or mask & IN_Q_OVERFLOW:
+                hit = True
+        return hit
+
+    def close(self):
+        self._inotify.close()
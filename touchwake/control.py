@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+"""
+Unix domain control socket (newline-delimited JSON).
+Requests:  {"cmd": "get-config" | "set-config" | "get-state" | "sleep" | "wake" | "subscribe"
+                  | "inhibit" | "uninhibit" | "list-inhibitors", ...}
+           set-config carries {"values": {key: value, ...}} (config file spelling)
+Responses: {"ok": true, ...} or {"ok": false, "error": "..."}
+After a successful "subscribe" the connection also receives pushed
+{"event": "state", "state": {...}} lines whenever the daemon's state changes.
+An "inhibit" ({"who": ..., "why": ..., "display": ...}) holds the screen on until
+"uninhibit" or until the connection that took it closes (see inhibit.py).
+The socket is mode 0660, owned by the service user (User= in the unit) and
+optionally chgrp'ed to control_group (the unit adds that group to
+SupplementaryGroups, install.sh fills it in from the config); clients are
+served from the daemon's event loop, one request per line. Replies and pushes are
+queued per client and written as the client reads them, so a slow or stuck client
+never blocks the loop; one with more than MAX_PENDING unread bytes is dropped.
+"""
+
+import grp, json, os, socket
+
+from touchwake.paths import CONTROL_SOCKET
+
+MAX_REQUEST = 64 * 1024
+MAX_PENDING = 1024 * 1024  # unread reply/push bytes per client (a wake trace is some 100 kB)
+CLIENT_TIMEOUT = 2.0
+
+def set_group(path, group):
+    """chgrp `path` to `group` unless it already has it; OSError (EPERM) if the user is not a member."""
+    gid = grp.getgrnam(group).gr_gid
+    if os.stat(path).st_gid != gid:
+        os.chown(path, -1, gid)
+
+class ControlServer:
+    """
+    Accepts clients on `path` and answers each JSON line with handler(request) -> dict.
+    Handler exceptions of type ValueError become {"ok": false, "error": ...}.
+    While the handler runs, `client` is the requesting connection's fd;
+    on_disconnect(fd) is called when a connection closes.
+    """
+
+    def __init__(self, loop, path, handler, group="", log=None, on_disconnect=None):
+        self.loop = loop
+        self.path = path
+        self.handler = handler
+        self.log = log or (lambda *a: None)
+        self.on_disconnect = on_disconnect or (lambda fd: None)
+        self.client = None
+        self._clients = {}  # fd -> (socket, input bytearray, output bytearray)
+        self._subscribers = set()  # fds that receive publish()ed messages
+        self._writing = set()  # fds with pending output (write readiness watched)
+        if os.path.exists(path):
+            os.unlink(path)  # stale socket from a previous run
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM | socket.SOCK_NONBLOCK | socket.SOCK_CLOEXEC)
+        try:
+            self.sock.bind(path)
+            os.chmod(path, 0o660)
+            if group:
+                set_group(path, group)
+            self.sock.listen(4)
+        except (OSError, KeyError):
+            self.sock.close()
+            raise
+        loop.add_reader(self.sock.fileno(), self._accept)
+
+    def close(self):
+        for fd in list(self._clients):
+            self._drop(fd)
+        self.loop.remove_reader(self.sock.fileno())
+        self.sock.close()
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except BlockingIOError:
+                return
+            except OSError as e:
+                self.log("WARN control accept:", e)
+                return
+            conn.setblocking(False)
+            fd = conn.fileno()
+            self._clients[fd] = (conn, bytearray(), bytearray())
+            self.loop.add_reader(fd, lambda fd=fd: self._ready(fd))
+
+    @property
+    def subscribers(self):
+        return len(self._subscribers)
+
+    def publish(self, msg):
+        """Push `msg` to every subscriber (queued, never blocks); one too far behind is dropped."""
+        data = json.dumps(msg).encode() + b"\n"
+        for fd in list(self._subscribers):
+            if not self._send(fd, data):
+                self._drop(fd)
+
+    def _drop(self, fd):
+        if fd not in self._clients:
+            return  # already dropped (e.g. by a publish() from the handler)
+        self._subscribers.discard(fd)
+        self._writing.discard(fd)
+        conn, _buf, _out = self._clients.pop(fd)
+        self.loop.remove_reader(fd)
+        conn.close()
+        self.on_disconnect(fd)
+
+    def _send(self, fd, data):
+        """Queue `data` and write what the socket takes now; False if the client should be dropped."""
+        if fd not in self._clients:
+            return False
+        out = self._clients[fd][2]
+        out += data
+        return self._flush(fd) and len(out) <= MAX_PENDING
+
+    def _flush(self, fd):
+        conn, _buf, out = self._clients[fd]
+        try:
+            del out[:conn.send(out)]
+        except BlockingIOError:
+            pass
+        except OSError:
+            return False
+        writing = bool(out)
+        if writing != (fd in self._writing):
+            self.loop.set_writable(fd, writing)
+            (self._writing.add if writing else self._writing.discard)(fd)
+        return True
+
+    def _ready(self, fd):
+        if fd in self._writing and not self._flush(fd):
+            self._drop(fd)
+            return
+        self._read(fd)
+
+    def _read(self, fd):
+        conn, buf, _out = self._clients[fd]
+        try:
+            data = conn.recv(4096)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self._drop(fd)
+            return
+        buf += data
+        while b"\n" in buf:
+            line, _, rest = bytes(buf).partition(b"\n")
+            buf[:] = rest
+            if not self._respond(fd, line):
+                self._drop(fd)
+                return
+        if len(buf) > MAX_REQUEST:
+            self._drop(fd)
+
+    def _respond(self, fd, line):
+        """Answer one request line; False if the client should be dropped."""
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+            self.client = fd
+            try:
+                reply = self.handler(request)
+            finally:
+                self.client = None
+            if request.get("cmd") == "subscribe" and reply.get("ok"):
+                self._subscribers.add(fd)
+        except ValueError as e:  # includes JSONDecodeError
+            reply = {"ok": False, "error": str(e)}
+        return self._send(fd, json.dumps(reply).encode() + b"\n")
+
+def request(cmd, path=CONTROL_SOCKET, timeout=CLIENT_TIMEOUT, **fields):
+    """
+    Send one request and return the reply dict. Raises OSError if the daemon
+    is not reachable and RuntimeError if it rejected the request.
+    """
+    msg = dict(fields, cmd=cmd)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.settimeout(timeout)
+        s.connect(path)
+        s.sendall(json.dumps(msg).encode() + b"\n")
+        buf = b""
+        while not buf.endswith(b"\n"):
+            chunk = s.recv(4096)
+            if not chunk:
+                raise ConnectionError("control socket closed without reply")
+            buf += chunk
+    reply = json.loads(buf)
+    if not reply.get("ok"):
+        raise RuntimeError(reply.get("error", "request failed"))
+    return reply
+
+def subscribe(path=CONTROL_SOCKET, timeout=CLIENT_TIMEOUT):
+    """
+    Connect and send "subscribe"; returns the socket in non-blocking mode. The reply
+    and every later push arrive as JSON lines carrying "state" (or "ok": false).
+    """
+    s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM | socket.SOCK_CLOEXEC)
+    try:
+        s.settimeout(timeout)
+        s.connect(path)
+        s.sendall(json.dumps({"cmd": "subscribe"}).encode() + b"\n")
+        s.setblocking(False)
+    except OSError:
+        s.close()
+        raise
+    return s
+
+def inhibit(who, why="", display=None, path=CONTROL_SOCKET, timeout=CLIENT_TIMEOUT):
+    """
+    Take an idle inhibitor; returns the connected socket, which holds it until it
+    is closed (or the process exits). Raises like request().
+    """
+    msg = {"cmd": "inhibit", "who": who, "why": why}
+    if display is not None:
+        msg["display"] = display
+    s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM | socket.SOCK_CLOEXEC)
+    try:
+        s.settimeout(timeout)
+        s.connect(path)
+        s.sendall(json.dumps(msg).encode() + b"\n")
+        buf = b""
+        while not buf.endswith(b"\n"):
+            chunk = s.recv(4096)
+            if not chunk:
+                raise ConnectionError("control socket closed without reply")
+            buf += chunk
+        reply = json.loads(buf)
+        if not reply.get("ok"):
+            raise RuntimeError(reply.get("error", "request failed"))
+    except BaseException:
+        s.close()
+        raise
+    return s
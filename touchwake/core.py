@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+Pure idle/wake state machine, shared by the daemon (idle.py wraps it in the
+event loop), activity replay and the GUI idle preview.
+- No clock, file or device access: every input carries its timestamp and the
+  result is an action (NONE / SLEEP / WAKE / DIM / UNDIM) for the caller to carry out
+- Optional dim stages (offsets in seconds before idle_seconds) come first: tick()
+  returns DIM as each one passes, activity while dimmed returns UNDIM
+- deadline() tells the caller when to call tick() next (None: nothing pending),
+  one stage at a time, so a driver needs one timer, not a periodic check
+- Also remembers the last brightness the user had before a sleep
+State is a handful of __slots__ fields; a step is a few comparisons, so it runs
+at millions of steps per second in tests and benchmarks (bench/core_steps.py).
+"""
+
+NONE, SLEEP, WAKE, DIM, UNDIM = 0, 1, 2, 3, 4
+ACTIONS = ("none", "sleep", "wake", "dim", "undim")
+
+def parse_stages(text):
+    """
+    "60:20%, 90:5%/2000" -> [(60, 20, None), (90, 5, 2000)]: idle seconds, percent of
+    max brightness and optional fade in ms. Offsets must increase; the final stage
+    (off) is idle_seconds. Raises ValueError.
+    """
+    stages = []
+    for item in (text or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            seconds, target = item.split(":")
+            target, _, fade = target.partition("/")
+            stage = (int(seconds), int(target.strip().rstrip("%")), int(fade) if fade.strip() else None)
+        except ValueError:
+            raise ValueError(f"dim stage '{item}' is not SECONDS:PERCENT[/FADE_MS]") from None
+        if stage[0] <= 0 or not 1 <= stage[1] <= 100 or (stage[2] is not None and stage[2] < 0):
+            raise ValueError(f"dim stage '{item}': seconds must be positive, percent from 1 to 100, fade >= 0")
+        if stages and stage[0] <= stages[-1][0]:
+            raise ValueError(f"dim stage '{item}' must come after {stages[-1][0]} s")
+        stages.append(stage)
+    return stages
+
+class IdleCore:
+    __slots__ = ("idle_seconds", "stages", "stage", "asleep", "asleep_since", "last_event_ts", "inhibited",
+                 "forced_off", "last_active_brightness")
+
+    def __init__(self, idle_seconds, now, stages=()):
+        self.idle_seconds = idle_seconds
+        self.stages = tuple(stages)          # dim stage offsets (seconds of idle), increasing
+        self.stage = 0                       # dim stages passed since the last activity (0 = full brightness)
+        self.asleep = False
+        self.asleep_since = None
+        self.last_event_ts = now
+        self.inhibited = False               # an idle inhibitor holds the display on
+        self.forced_off = False              # asleep whatever the input (schedule)
+        self.last_active_brightness = None   # last >0 brightness before a sleep
+
+    def next_offset(self):
+        """Idle seconds at which the next decision is due (next dim stage, else sleep)."""
+        stages, stage = self.stages, self.stage
+        if stage < len(stages) and stages[stage] < self.idle_seconds:
+            return stages[stage]
+        return self.idle_seconds
+
+    def deadline(self):
+        """When tick() may dim or sleep the display; None while asleep, inhibited or forced off."""
+        if self.asleep or self.inhibited or self.forced_off:
+            return None
+        if not self.stages:
+            return self.last_event_ts + self.idle_seconds
+        return self.last_event_ts + self.next_offset()
+
+    def activity(self, ts):
+        """User input with timestamp ts; WAKE if it wakes the display, UNDIM if it was dimmed."""
+        if self.forced_off:
+            return NONE
+        if self.asleep and ts < self.asleep_since:
+            return NONE  # buffered from before the sleep decision
+        # Late-read buffered events never move the idle start back
+        if ts > self.last_event_ts:
+            self.last_event_ts = ts
+        if self.asleep:
+            self.asleep = False
+            return WAKE
+        if self.stage:
+            self.stage = 0
+            return UNDIM
+        return NONE
+
+    def tick(self, now):
+        """Time has advanced to now; DIM as a dim stage passes, SLEEP once the idle deadline has."""
+        deadline = self.deadline()
+        if deadline is None or now < deadline:
+            return NONE
+        idle = now - self.last_event_ts
+        if idle >= self.idle_seconds:
+            return self._sleep(now)
+        # A late tick skips straight to the last stage already due
+        stages, stage = self.stages, self.stage
+        while stage < len(stages) and stages[stage] <= idle:
+            stage += 1
+        self.stage = stage
+        return DIM
+
+    def sleep_now(self, now):
+        return NONE if self.asleep else self._sleep(now)
+
+    def set_inhibited(self, on, now):
+        """Suspend the idle deadline (WAKE if asleep); releasing restarts the countdown from now."""
+        if on == self.inhibited:
+            return NONE
+        self.inhibited = on
+        if on:
+            return self.activity(now) if self.asleep or self.stage else NONE
+        if now > self.last_event_ts:
+            self.last_event_ts = now
+        return NONE
+
+    def set_forced_off(self, on, now):
+        """Keep the display asleep (SLEEP if awake); releasing leaves it asleep unless inhibited."""
+        if on == self.forced_off:
+            return NONE
+        self.forced_off = on
+        if on:
+            return NONE if self.asleep else self._sleep(now)
+        if self.inhibited and self.asleep:
+            return self.activity(now)
+        return NONE
+
+    def remember(self, level):
+        """Brightness in use when going to sleep (0 = already dark, ignored)."""
+        if level > 0:
+            self.last_active_brightness = level
+
+    def restore_target(self, max_level):
+        """Brightness to wake to: the remembered level, else max_level."""
+        last = self.last_active_brightness
+        return last if last and last > 0 else max_level
+
+    def _sleep(self, now):
+        self.stage = 0
+        self.asleep = True
+        self.asleep_since = now
+        return SLEEP
@@ -0,0 +1,1237 @@
+# -*- coding: utf-8 -*-
+"""
+Backlight idle/wake daemon (CM5 + Waveshare 8-DSI-TOUCH-A) with hotplug + config + logging
+- Dims (brightness=0) after inactivity, with perceptual fades on sleep/wake
+- Wakes on touch / keyboard / mouse (optionally force max brightness)
+- Controls bl_power if available (persistent sysfs descriptors, see backlight.py)
+- No grab(); event-driven hotplug via inotify on /dev/input (glob rescan as fallback)
+- Deadline-driven loop on a monotonic clock (no periodic wakeups while idle/asleep)
+- Loads settings from /etc/touch-wake-display.conf
+- Prometheus metrics textfile in /run/touch-wake-display (see metrics.py; --stats prints it)
+- Unix control socket for live config apply / state / forced sleep+wake, with state
+  pushes to subscribed clients such as the settings GUI (see control.py)
+- Hot reload of the config file on SIGHUP or when it changes (inotify)
+- Device classification from sysfs identity with a persistent cache (see classcache.py)
+- systemd Type=notify: READY=1 once devices are registered, WATCHDOG=1 pings from the loop
+- Screen-on time and estimated energy per backlight, persisted in /var/lib (see energy.py)
+- Optional wake latency tracing, kernel event -> backlight writes (see trace.py; SIGUSR1 dumps it)
+- Optional wake filter per device between reader and idle logic: ghost touches, palms,
+  jitter and no-wake devices do not wake the displays (see wakefilter.py)
+- Optional activity recording for deterministic replay under a simulated clock (see record.py, replay.py)
+- Optional ambient-light adaptive brightness from an IIO sensor (see ambient.py)
+- Time-of-day schedule profiles ([profile:NAME]): idle timeout, wake level, always
+  on/off; one wall-clock timer for the next transition (see schedule.py, timerfd.py)
+- Idle inhibitors (media players, dashboards) over the control socket or as lock
+  files in /run; while one is held the idle deadline is suspended (see inhibit.py)
+- Several backlights ([display:NAME] sections), each with its own idle timer and
+  fades; input devices wake only the displays they are mapped to (see display.py)
+
+Importing this module has no side effects; Daemon takes a Config plus optional
+device opener and clock so it can be driven by the benchmark harness, and
+on_activity() is the event source entry point the replayer feeds directly. Modules
+that are not needed before READY (argparse, control socket, evdev) are imported
+on first use; see bench/startup.py.
+"""
+
+import errno, glob, os, signal, sys, time
+
+from touchwake.backlight import Backlight
+from touchwake.classcache import ClassCache, parse_rules
+from touchwake.ambient import AmbientLight, LightSensor, find_light_sensor, parse_curve
+from touchwake.config import AMBIENT_KEYS, CONF_PATH, DISPLAY_KEYS, RESTART_KEYS, Config, ConfigWatcher
+from touchwake.devices import open_evdev_device, require_evdev
+from touchwake.display import Display
+from touchwake.energy import load_meters, save_meters
+from touchwake.eventloop import EventLoop
+from touchwake.evio import MASK_ACTIVITY, MASK_ALL, MASK_RELEVANT, apply_event_mask, set_clock_monotonic, widen_mask
+from touchwake.hotplug import DeviceWatcher
+from touchwake.metrics import Metrics, TextFormat, write_textfile
+from touchwake.mux import make_mux
+from touchwake.reader import EventReader
+from touchwake.record import Recorder
+from touchwake.schedule import Schedule
+from touchwake.sdnotify import Notifier
+from touchwake.trace import WakeTrace
+from touchwake.wakefilter import WakeFilter, device_matches, parse_filter
+
+BACKLIGHT_CLASS_DIR = "/sys/class/backlight"
+
+class StartupError(RuntimeError):
+    """Fatal, user-actionable startup problem (printed without traceback)."""
+
+def autodetect_backlight():
+    cands = sorted([d for d in glob.glob(os.path.join(BACKLIGHT_CLASS_DIR, "*")) if os.path.isdir(d)])
+    return cands[0] if cands else None
+
+class Daemon:
+    ACTIVE_PHASE_MARGIN = 1.0  # seconds before the idle deadline at which the active phase ends
+    RELOAD_DELAY = 0.2         # coalesce bursts of config file events (truncate + write, rename)
+    ENERGY_SAVE_INTERVAL = 600.0  # persist energy counters this often while awake (and on sleep/exit)
+    SCHEDULE_RECHECK = 3600.0     # without timerfd: re-evaluate the schedule at least this often (clock changes)
+
+    def __init__(self, config, open_device=None, clock=time.monotonic, log=None, conf_path=CONF_PATH, notifier=None,
+                 open_backlight=None):
+        self.config = config
+        self.notifier = notifier or Notifier({})
+        self.conf_path = conf_path
+        self.log = log or self._debug_log
+        self.open_device = open_device or open_evdev_device
+        self.open_backlight = open_backlight or Backlight  # (base, log=) -> Backlight
+        self.loop = EventLoop(clock=clock, mux=make_mux(config.input_backend))
+        self.devices = {}           # path -> device
+        self.readers = {}           # path -> EventReader
+        self.monotonic_fds = set()  # devices whose event timestamps share the loop clock
+        self.masked_fds = set()     # devices with a kernel-side event mask (EVIOCSMASK)
+        self.active_phase = {}      # fd -> device: reported activity while awake (quiesced and/or reduced mask)
+        self._phase_end_timer = None
+        self.displays = []          # Display per backlight, in config order (first = primary)
+        self.device_displays = {}   # fd -> tuple of displays the device wakes
+        self.filters = {}           # fd -> WakeFilter (only devices with rules)
+        self.watcher = None
+        self._watch_fd = None
+        self.metrics = Metrics(self.loop.time())
+        self._metrics_timer = None
+        self._rescan_timer = None
+        self.control = None
+        self.conf_watcher = None
+        self._reload_timer = None
+        self._publish_timer = None
+        self.classcache = None
+        self.ambient = None
+        self.trace = None           # WakeTrace while trace_wakes is on
+        self.recorder = None        # activity log (record_file)
+        self._energy_timer = None
+        self._energy_other = {}     # persisted meters of displays not configured right now (kept on save)
+        self.inhibitors = {}        # (control client fd, who) -> Inhibitor taken over the socket
+        self.inhibit_dir = None     # InhibitDir watching the lock files (inhibit_dir)
+        self._inhibit_summary = ""
+        self.schedule = None        # Schedule of the [profile:NAME] sections (None: no profiles)
+        self.profile_name = None    # active profile
+        self._profiles = {}         # name -> ProfileConfig
+        self._schedule_timer = None  # RealtimeTimer for the next transition
+        self._schedule_call = None   # loop timer instead, where timerfd is unavailable
+
+    def _debug_log(self, *a):
+        # Checks the live config so a reload can toggle debug output
+        if self.config.debug:
+            print(time.strftime("%H:%M:%S"), *a, flush=True)
+
+    @property
+    def primary(self):
+        return self.displays[0]
+
+    # --- Setup ------------------------------------------------------------
+    def _open_backlight(self, bl_base):
+        bl_base = bl_base or autodetect_backlight() or ""
+        if not bl_base or not os.path.isdir(bl_base):
+            raise StartupError(f"Backlight device not found. Set 'bl_base' in {self.conf_path}.")
+        try:
+            return self.open_backlight(bl_base, log=self.log)
+        except OSError as e:
+            raise StartupError(f"ERROR: Cannot open {bl_base}/brightness ({e.strerror}). Ensure user is in group 'video'.")
+
+    def _make_display(self, display_config, backlight=None):
+        return Display(self.loop, display_config, backlight or self._open_backlight(display_config.bl_base),
+                       on_change=self._display_changed, on_settled=self._display_settled, log=self.log)
+
+    def start(self):
+        """Open the backlights, register input devices and arm the idle timers."""
+        cfg = self.config
+        for display_config in cfg.display_configs():
+            self.displays.append(self._make_display(display_config))
+        self.load_energy()
+        if self.open_device is open_evdev_device:
+            try:
+                require_evdev()
+            except ImportError as e:
+                raise StartupError(str(e))
+            # Custom openers (benchmarks) see every node; the cache only fronts evdev
+            self.classcache = ClassCache(cfg.device_cache, cfg.input_sysfs, parse_rules(cfg.include_devices),
+                                         parse_rules(cfg.exclude_devices), log=self.log)
+
+        self.start_recorder()
+        self.start_watcher()
+        if self._watch_fd is None and not self.devices:
+            raise StartupError(f"No matching {cfg.input_dir}/event* devices found.")
+
+        self.log(f"RUN backend={self.loop.mux.name}, hotplug={'inotify' if self.watcher.event_driven else f'rescan {cfg.rescan_interval}s'}, "
+                 f"debug={cfg.debug}")
+        for display in self.displays:
+            dc = display.config
+            self.log(f"DISPLAY [{display.name}] idle={dc.idle_seconds}s, dim={dc.dim_stages or '-'}, fade={dc.fade_out_ms}/{dc.fade_in_ms}ms {dc.fade_curve}, "
+                     f"max={display.backlight.max}, path={display.backlight.base}, devices={dc.devices or '*'}")
+            display.start()
+        self.start_schedule()
+        self.start_ambient()
+        self.start_trace()
+        self.schedule_metrics()
+        self.schedule_energy_save(save=False)
+        self.start_control()
+        self.start_inhibit_dir()
+        self.watch_config()
+
+    def run(self):
+        self.loop.run()
+
+    def stop(self):
+        self.loop.stop()
+
+    def close(self):
+        if self.conf_watcher:
+            self.loop.remove_reader(self.conf_watcher.fileno())
+            self.conf_watcher.close()
+            self.conf_watcher = None
+        if self.control:
+            self.inhibitors.clear()  # released with their connections, nothing to recompute on exit
+            self.control.close()
+            self.control = None
+        if self.inhibit_dir:
+            self.inhibit_dir.close()
+        self.stop_schedule()
+        if self._metrics_timer:
+            self._metrics_timer.cancel()
+        self.write_metrics()
+        if self._energy_timer:
+            self._energy_timer.cancel()
+        self.save_energy()
+        self.stop_ambient()
+        for path in list(self.devices):
+            self.unregister_device_path(path)
+        self.stop_recorder()
+        if self.watcher:
+            self.watcher.close()
+        for display in self.displays:
+            display.close()
+        self.loop.mux.close()
+        self.log("EXIT")
+
+    # --- Input devices ----------------------------------------------------
+    def read_device(self, dev, reader):
+        records = reader.records
+        wake_filter = self.filters.get(dev.fd)
+        if wake_filter is not None:
+            asleep = [d.idle.asleep for d in self.device_displays[dev.fd]]
+            if not wake_filter.needed(any(asleep), not all(asleep)):
+                wake_filter = None
+        try:
+            if wake_filter is None:
+                latest = reader.read_activity()
+            else:
+                reader.read_filtered(wake_filter)
+                latest = max(wake_filter.wake_ts or 0.0, wake_filter.awake_ts or 0.0) or None
+        except OSError as e:
+            # Device vanished (ENODEV); drop it now so poll() does not spin on POLLERR
+            self.log("WARN read", dev.path, e)
+            self.unregister_device_path(dev.path)
+            return
+        if latest is None:
+            return
+        if self.recorder:
+            wall = latest - time.monotonic() + time.time() if dev.fd in self.monotonic_fds else latest
+            self.recorder.activity(dev.path, wall, reader.records - records)
+        if wake_filter is None:
+            self.on_activity(dev, latest)
+            return
+        if wake_filter.awake_ts is not None:
+            self.on_activity(dev, wake_filter.awake_ts, wake=False)
+        if wake_filter.wake_ts is not None:
+            self.on_activity(dev, wake_filter.wake_ts)
+
+    def on_activity(self, dev, latest, wake=True):
+        """
+        Relevant input on `dev` with event timestamp `latest` (loop clock if the device
+        is in monotonic_fds). wake=False: it only keeps awake displays awake.
+        """
+        read_at = time.monotonic() if self.trace else 0.0
+        displays = self.device_displays[dev.fd]
+        monotonic = dev.fd in self.monotonic_fds
+        awake = True
+        for display in displays:
+            idle = display.idle
+            was_asleep = idle.asleep
+            if was_asleep and not wake:
+                awake = False
+                continue
+            if monotonic:
+                idle.activity(latest)
+                if was_asleep and not idle.asleep:
+                    # Kernel event timestamp -> wake brightness write (done synchronously in on_wake)
+                    display.metrics.wake_latency.observe(self.loop.time() - latest)
+            else:
+                idle.activity()
+            if self.trace and was_asleep and not idle.asleep:
+                self.trace_wake(display, latest if monotonic else latest - time.time() + time.monotonic(), read_at)
+            awake = awake and not idle.asleep
+        if awake and dev.fd not in self.active_phase:
+            self.enter_active_phase(dev, displays)
+        self.log("EVENT -> reset idle")
+
+    def trace_wake(self, display, event, read_at):
+        """Record one wake; writes completed before read_at belong to an earlier change."""
+        bl = display.backlight
+        nan = float("nan")
+        self.trace.record(display.name, event, read_at,
+                          bl.power_written_at if bl.power_written_at >= read_at else nan,
+                          bl.brightness_written_at if bl.brightness_written_at >= read_at else nan)
+
+    def start_recorder(self):
+        path = self.config.record_file
+        if not path:
+            return
+        try:
+            self.recorder = Recorder(path, self.config.record_max_bytes, log=self.log)
+        except OSError as e:
+            notice(f"WARN activity not recorded: cannot open {path} ({e.strerror}).")
+            return
+        for dev_path, dev in self.devices.items():
+            self.recorder.device(dev_path, dev)
+
+    def stop_recorder(self):
+        if self.recorder:
+            self.recorder.close()
+            self.recorder = None
+
+    def start_trace(self):
+        self.trace = WakeTrace(self.config.trace_size) if self.config.trace_wakes else None
+
+    def dump_trace(self):
+        """SIGUSR1: write the trace ring to trace_file (JSON) and log the stage summary."""
+        cfg = self.config
+        if not self.trace:
+            notice(f"WARN wake trace is off. Set 'trace_wakes = true' in {self.conf_path}.")
+            return
+        if not cfg.trace_file:
+            notice(f"WARN wake trace not written: trace_file is empty in {self.conf_path}.")
+            return
+        import json
+        try:
+            os.makedirs(os.path.dirname(cfg.trace_file), exist_ok=True)
+            tmp = f"{cfg.trace_file}.{os.getpid()}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(self.trace.as_json(), f)
+            os.replace(tmp, cfg.trace_file)
+        except OSError as e:
+            notice(f"WARN wake trace not written: {cfg.trace_file} ({e}).")
+            return
+        summary = " ".join(f"{name}=p50:{s['p50']}/p95:{s['p95']}/p99:{s['p99']}ms"
+                           for name, s in self.trace.summary().items())
+        notice(f"TRACE {self.trace.count} wakes -> {cfg.trace_file}: {summary}")
+
+    def enter_active_phase(self, dev, displays):
+        """
+        The device already proved activity: stop servicing it (quiesce) and/or narrow
+        its kernel event mask until shortly before the earliest idle (or dim stage) deadline of its
+        displays. Buffered events are read on re-arm and supply the real last-activity time.
+        """
+        cfg = self.config
+        if not displays or min(d.idle.core.next_offset() for d in displays) <= 2 * self.ACTIVE_PHASE_MARGIN:
+            return
+        entered = False
+        if cfg.quiesce_active_devices and dev.fd in self.monotonic_fds:
+            self.loop.disarm_reader(dev.fd)
+            entered = True
+        # Not for filtered devices: the reduced mask hides the positions and contact data their rules judge
+        if cfg.reduce_event_mask_when_active and dev.fd in self.masked_fds and dev.fd not in self.filters:
+            entered = apply_event_mask(dev.fd, MASK_ACTIVITY) or entered
+        if not entered:
+            return
+        self.active_phase[dev.fd] = dev
+        deadline = min(d.deadline() for d in displays) - self.ACTIVE_PHASE_MARGIN
+        if self._phase_end_timer is None or deadline < self._phase_end_timer.when:
+            if self._phase_end_timer is not None:
+                self._phase_end_timer.cancel()
+            self._phase_end_timer = self.loop.call_at(deadline, self.end_active_phase)
+
+    def end_active_phase(self):
+        if self._phase_end_timer is not None:
+            self._phase_end_timer.cancel()
+            self._phase_end_timer = None
+        for fd in self.active_phase:
+            if fd in self.masked_fds:
+                apply_event_mask(fd, self.device_mask(fd))
+            self.loop.arm_reader(fd)
+        self.active_phase.clear()
+
+    def register_device_path(self, path):
+        """Open and classify a node; True if registered, False if irrelevant (OSError = retry later)."""
+        verdict = self.classcache.decide(path) if self.classcache else None
+        if verdict is None:
+            dev = self.open_device(path)
+        elif verdict:
+            dev = open_evdev_device(path, check=False)  # classified from sysfs, open only what we need
+        else:
+            dev = None
+        if dev is None:
+            self.log("skip device:", path)
+            return False
+        if set_clock_monotonic(dev.fd):
+            self.monotonic_fds.add(dev.fd)
+        reader = EventReader(dev.fd)
+        self.device_displays[dev.fd] = self.displays_for(dev)
+        self._set_filter(dev)
+        if self.config.kernel_event_mask and apply_event_mask(dev.fd, self.device_mask(dev.fd)):
+            self.masked_fds.add(dev.fd)
+        self.loop.add_reader(dev.fd, lambda: self.read_device(dev, reader))
+        self.devices[path] = dev
+        self.readers[path] = reader
+        if self.recorder:
+            self.recorder.device(path, dev)
+        self.log("reg device:", path, dev.name, "->", ",".join(d.name for d in self.device_displays[dev.fd]))
+        return True
+
+    def displays_for(self, dev):
+        """Displays whose patterns match the device; else those without patterns; else all."""
+        matched = tuple(d for d in self.displays if d.rules and d.matches(dev))
+        return matched or tuple(d for d in self.displays if not d.rules) or tuple(self.displays)
+
+    def device_mask(self, fd):
+        """MASK_RELEVANT, widened by the codes the device's wake filter reads."""
+        wake_filter = self.filters.get(fd)
+        return widen_mask(MASK_RELEVANT, wake_filter.codes()) if wake_filter else MASK_RELEVANT
+
+    def _set_filter(self, dev):
+        cfg = self.config
+        wake_rules, awake_rules = parse_filter(cfg.wake_filter), parse_filter(cfg.awake_filter)
+        wake_allowed = not device_matches(parse_rules(cfg.no_wake_devices), dev)
+        if wake_rules or awake_rules or not wake_allowed:
+            self.filters[dev.fd] = WakeFilter(wake_rules, awake_rules, wake_allowed)
+        else:
+            self.filters.pop(dev.fd, None)
+
+    def remap_devices(self):
+        for dev in self.devices.values():
+            self.device_displays[dev.fd] = self.displays_for(dev)
+
+    def unregister_device_path(self, path):
+        dev = self.devices.pop(path, None)
+        if not dev:
+            return
+        self.readers.pop(path, None)
+        if self.recorder:
+            self.recorder.gone(path)
+        self.loop.remove_reader(dev.fd)
+        self.monotonic_fds.discard(dev.fd)
+        self.masked_fds.discard(dev.fd)
+        self.active_phase.pop(dev.fd, None)
+        self.device_displays.pop(dev.fd, None)
+        self.filters.pop(dev.fd, None)
+        try:
+            dev.close()
+        except Exception:
+            pass
+        self.log("unreg device:", path)
+
+    def start_watcher(self):
+        """Watch config.input_dir (inotify, or periodic rescans as fallback) and register its devices."""
+        self.watcher = DeviceWatcher(self.register_device_path, self.unregister_device_path,
+                                     input_dir=self.config.input_dir, log=self.log)
+        self.watcher.start()
+        if self.classcache:
+            self.classcache.save()
+        self._watch_fd = self.watcher.fileno()
+        if self._watch_fd is not None:
+            self.loop.add_reader(self._watch_fd, self.handle_hotplug)
+        else:
+            self.schedule_rescan()
+
+    def stop_watcher(self):
+        if self._watch_fd is not None:
+            self.loop.remove_reader(self._watch_fd)
+            self._watch_fd = None
+        if self._rescan_timer:
+            self._rescan_timer.cancel()
+            self._rescan_timer = None
+        self.watcher.close()
+        for path in list(self.devices):
+            self.unregister_device_path(path)
+
+    def handle_hotplug(self):
+        self.watcher.handle_events()
+        if self.classcache:
+            self.classcache.save()
+        if self.watcher.fileno() != self._watch_fd:
+            # Directory watch lost: stop polling the stale descriptor, rely on rescans
+            self.loop.remove_reader(self._watch_fd)
+            self._watch_fd = None
+            self.schedule_rescan()
+
+    def schedule_rescan(self):
+        def _rescan():
+            self.watcher.rescan()
+            self.schedule_rescan()
+        if self._rescan_timer:
+            self._rescan_timer.cancel()
+        self._rescan_timer = self.loop.call_later(self.config.rescan_interval, _rescan)
+
+    # --- Live configuration / control -------------------------------------
+    def apply_config(self, config):
+        """
+        Switch to `config` without restarting: only what changed is recomputed, open
+        devices and brightness state survive. Raises StartupError (nothing applied)
+        if a new backlight cannot be opened. Returns (applied keys, keys needing a restart).
+        """
+        old = self.config
+        changed = old.changed_keys(config)
+        restart = [k for k in changed if k in RESTART_KEYS]
+        for key in restart:
+            setattr(config, key, getattr(old, key))  # keep describing what is running
+        changed = [k for k in changed if k not in RESTART_KEYS]
+        if not changed:
+            return [], restart
+        displays_changed = bool(({"displays"} | set(DISPLAY_KEYS)) & set(changed))
+        backlights = self._open_display_backlights(config) if displays_changed else {}  # fails before anything is touched
+        self.config = config
+        if displays_changed:
+            self._apply_displays(config, backlights)
+        if displays_changed or {"quiesce_active_devices", "reduce_event_mask_when_active", "kernel_event_mask"} & set(changed):
+            self.end_active_phase()
+        if "kernel_event_mask" in changed:
+            for dev in self.devices.values():
+                mask = self.device_mask(dev.fd) if config.kernel_event_mask else MASK_ALL
+                if apply_event_mask(dev.fd, mask) and config.kernel_event_mask:
+                    self.masked_fds.add(dev.fd)
+                else:
+                    self.masked_fds.discard(dev.fd)
+        rules_changed = bool({"include_devices", "exclude_devices", "input_sysfs"} & set(changed))
+        if self.classcache and rules_changed:
+            self.classcache.sysfs = config.input_sysfs
+            self.classcache.include = parse_rules(config.include_devices)
+            self.classcache.exclude = parse_rules(config.exclude_devices)
+        if "device_cache" in changed and self.classcache:
+            self.classcache.path = config.device_cache
+        if "input_dir" in changed or (self.classcache and rules_changed):
+            # Re-evaluate every node (the watcher's negative cache holds old decisions)
+            self.stop_watcher()
+            self.start_watcher()
+        elif "rescan_interval" in changed and self._rescan_timer:
+            self.schedule_rescan()
+        if set(AMBIENT_KEYS) & set(changed):
+            self.stop_ambient()
+            self.start_ambient()
+        elif displays_changed and self.ambient and self.ambient.percent is not None:
+            for display in self.displays:
+                if display.ambient_percent is None:  # added by this change
+                    display.set_ambient(self.ambient.percent, config.ambient_fade_ms)
+        if "energy_file" in changed or displays_changed:
+            self.schedule_energy_save()
+        if {"wake_filter", "awake_filter", "no_wake_devices"} & set(changed):
+            for dev in self.devices.values():
+                self._set_filter(dev)
+                if dev.fd in self.masked_fds:
+                    apply_event_mask(dev.fd, self.device_mask(dev.fd))
+        if {"record_file", "record_max_bytes"} & set(changed):
+            self.stop_recorder()
+            self.start_recorder()
+        if {"trace_wakes", "trace_size"} & set(changed):
+            self.start_trace()  # a new ring; the old records are dropped
+        if "profiles" in changed or displays_changed:
+            self.start_schedule()  # also re-applies the active profile to new and changed displays
+        if "inhibit_dir" in changed:
+            if self.inhibit_dir:
+                self.inhibit_dir.close()
+                self.inhibit_dir = None
+            self.start_inhibit_dir()
+        elif displays_changed:
+            if self.inhibit_dir:
+                self.inhibit_dir.rescan()  # locks naming added or removed displays
+            self.update_inhibition()
+        if {"metrics_file", "metrics_interval"} & set(changed) or displays_changed:
+            self.schedule_metrics()
+        return changed, restart
+
+    def _open_display_backlights(self, config):
+        """Backlights for new displays and changed bl_base, by display name (StartupError: none kept open)."""
+        current = {d.name: d for d in self.displays}
+        opened = {}
+        try:
+            for dc in config.display_configs():
+                display = current.get(dc.name)
+                if display is None or display.config.bl_base != dc.bl_base:
+                    opened[dc.name] = self._open_backlight(dc.bl_base)
+        except StartupError:
+            for backlight in opened.values():
+                backlight.close()
+            raise
+        return opened
+
+    def _apply_displays(self, config, backlights):
+        """Update, add and remove displays (by name) and re-map the input devices to them."""
+        current = {d.name: d for d in self.displays}
+        displays = []
+        for dc in config.display_configs():
+            display = current.pop(dc.name, None)
+            if display is None:
+                display = self._make_display(dc, backlights[dc.name])
+                if dc.name in self._energy_other:
+                    display.restore_energy(self._energy_other.pop(dc.name))
+                display.start()
+            else:
+                display.apply(dc, backlights.get(dc.name))
+            displays.append(display)
+        for display in current.values():
+            self.log(f"DISPLAY [{display.name}] removed")
+            display.close()
+            self._energy_other[display.name] = display.energy
+        self.displays = displays
+        self.remap_devices()
+
+    def reload_config(self):
+        """Re-read the config file and apply it in place; a bad file is rejected as a whole."""
+        self._reload_timer = None
+        t0 = time.perf_counter()
+        try:
+            config = Config.from_file(self.conf_path)
+            applied, restart = self.apply_config(config)
+        except (ValueError, StartupError) as e:
+            notice(f"RELOAD rejected ({(time.perf_counter() - t0) * 1000:.1f} ms), keeping previous settings: {e}")
+            return False
+        notice(f"RELOAD ok ({(time.perf_counter() - t0) * 1000:.1f} ms) changed={applied or 'none'}"
+               + (f" restart required for={restart}" if restart else ""))
+        self.publish_state()
+        self.notifier.notify(f"STATUS={self.status()}")
+        return True
+
+    # --- Energy accounting ------------------------------------------------
+    def load_energy(self):
+        path = self.config.energy_file
+        if not path:
+            return
+        try:
+            meters = load_meters(path)
+        except (OSError, ValueError) as e:
+            self.log("WARN energy history unreadable, starting empty:", e)
+            return
+        for display in self.displays:
+            if display.name in meters:
+                display.restore_energy(meters.pop(display.name))
+        self._energy_other = meters
+
+    def save_energy(self):
+        path = self.config.energy_file
+        if not path or not self.displays:
+            return
+        meters = dict(self._energy_other)
+        meters.update((d.name, d.energy) for d in self.displays)
+        try:
+            save_meters(path, meters)
+        except OSError as e:
+            self.log("WARN energy history not saved:", e)
+
+    def schedule_energy_save(self, save=True):
+        """Persist (unless save=False) and again every ENERGY_SAVE_INTERVAL while a display is awake."""
+        if self._energy_timer:
+            self._energy_timer.cancel()
+            self._energy_timer = None
+        if not self.config.energy_file:
+            return
+        if save:
+            self.save_energy()
+            self.publish_state()  # keeps the GUI's screen-on readout current during long awake periods
+        if any(not d.idle.asleep for d in self.displays):
+            self._energy_timer = self.loop.call_later(self.ENERGY_SAVE_INTERVAL, self.schedule_energy_save)
+
+    # --- Ambient light ----------------------------------------------------
+    def start_ambient(self):
+        """Adaptive brightness (adaptive_brightness = true); a missing sensor only disables the feature."""
+        cfg = self.config
+        if not cfg.adaptive_brightness:
+            return
+        path = find_light_sensor(cfg.light_sensor)
+        if not path:
+            notice(f"WARN adaptive brightness off: no IIO light sensor found. Set 'light_sensor' in {self.conf_path}.")
+            return
+        try:
+            sensor = LightSensor(path)
+        except OSError as e:
+            notice(f"WARN adaptive brightness off: cannot open {path} ({e.strerror}).")
+            return
+        self.ambient = AmbientLight(self.loop, sensor, self._ambient_level, interval=cfg.ambient_interval,
+                                    smoothing=cfg.ambient_smoothing, curve=parse_curve(cfg.ambient_curve),
+                                    hysteresis=cfg.ambient_hysteresis, log=self.log)
+        self.log("AMBIENT sensor:", path)
+        self._follow_ambient()
+
+    def stop_ambient(self):
+        if not self.ambient:
+            return
+        self.ambient.close()
+        self.ambient = None
+        for display in self.displays:
+            display.ambient_percent = None  # back to restoring the last brightness
+
+    def _ambient_level(self, percent):
+        for display in self.displays:
+            display.set_ambient(percent, self.config.ambient_fade_ms)
+
+    def _follow_ambient(self):
+        """Sample only while some display is awake."""
+        if self.ambient:
+            if any(not d.idle.asleep for d in self.displays):
+                self.ambient.resume()
+            else:
+                self.ambient.pause()
+
+    def status(self):
+        backlights = ", ".join(f"{d.backlight.base} idle {d.idle.idle_seconds}s" for d in self.displays)
+        return f"{len(self.devices)} input device(s), backlight {backlights}"
+
+    def start_watchdog(self):
+        """Ping the systemd watchdog from the loop itself, so a stuck loop gets restarted."""
+        interval = self.notifier.watchdog_interval
+        if not interval:
+            return
+        def _ping():
+            self.notifier.notify("WATCHDOG=1")
+            self.loop.call_later(interval, _ping)
+        _ping()
+
+    def request_reload(self):
+        if self._reload_timer is None:
+            self._reload_timer = self.loop.call_later(self.RELOAD_DELAY, self.reload_config)
+
+    def watch_config(self):
+        try:
+            self.conf_watcher = ConfigWatcher(self.conf_path)
+        except OSError as e:
+            self.log("WARN config watch unavailable (SIGHUP still reloads):", e)
+            return
+        def _on_conf_event():
+            if self.conf_watcher.changed():
+                self.request_reload()
+        self.loop.add_reader(self.conf_watcher.fileno(), _on_conf_event)
+
+    def start_control(self):
+        path = self.config.control_socket
+        if not path:
+            return
+        from touchwake.control import ControlServer  # socket/json: not needed before READY
+        try:
+            self.control = ControlServer(self.loop, path, self.handle_control, group=self.config.control_group,
+                                         log=self.log, on_disconnect=self._control_disconnected)
+        except (OSError, KeyError) as e:
+            notice(f"WARN control socket unavailable: {path}{self._group_error(e)}")
+
+    def _group_error(self, e):
+        """': reason.' for a control socket or inhibit directory setup error, with the control_group fix."""
+        group = self.config.control_group
+        if isinstance(e, KeyError):
+            return f": group '{group}' does not exist. Create it or fix control_group in {self.conf_path}."
+        if group and e.errno == errno.EPERM:
+            return (f": cannot chgrp to '{group}' ({e.strerror}). Re-run install.sh so the service joins"
+                    f" control_group '{group}'.")
+        return f" ({e.strerror or e})."
+
+    # --- Schedule profiles ------------------------------------------------
+    def wall_time(self):
+        return time.time()
+
+    def start_schedule(self):
+        """(Re)build the schedule from the profiles and apply the active one."""
+        self.stop_schedule()
+        profiles = self.config.profile_configs()
+        self._profiles = {p.name: p for p in profiles}
+        self.schedule = Schedule([(p.name, p.windows) for p in profiles]) if profiles else None
+        self.apply_schedule(announce=bool(profiles))
+
+    def stop_schedule(self):
+        if self._schedule_call:
+            self._schedule_call.cancel()
+            self._schedule_call = None
+        if self._schedule_timer:
+            self.loop.remove_reader(self._schedule_timer.fd)
+            self._schedule_timer.close()
+            self._schedule_timer = None
+        self.schedule = None
+
+    def apply_schedule(self, announce=False):
+        """Apply the profile active now and arm one timer for the next transition (no per-iteration checks)."""
+        time.tzset()  # a changed /etc/localtime takes effect at the next transition
+        now = self.wall_time()
+        name = self.schedule.active(now) if self.schedule else None
+        profile = self._profiles.get(name)
+        for display in self.displays:
+            display.set_profile(profile if profile and profile.covers(display.name) else None)
+        self.update_inhibition()
+        when = nxt = None
+        if self.schedule:
+            when, nxt = self.schedule.next_change(now)
+            self._arm_schedule(when)
+        if announce or name != self.profile_name:
+            self._profile_changed(name, when, nxt)
+        self.profile_name = name
+
+    def _profile_changed(self, name, until, following):
+        until = f" until {time.strftime('%a %Y-%m-%d %H:%M %Z', time.localtime(until))} then {following or '(none)'}" if until else ""
+        notice(f"SCHEDULE profile={name or '(none)'}{until}")
+
+    def _arm_schedule(self, when):
+        if self._schedule_call:
+            self._schedule_call.cancel()
+            self._schedule_call = None
+        if when is None:
+            return
+        try:
+            if self._schedule_timer is None:
+                from touchwake.timerfd import RealtimeTimer
+                self._schedule_timer = RealtimeTimer()
+                self.loop.add_reader(self._schedule_timer.fd, self._on_schedule_timer)
+            self._schedule_timer.set(when)
+            return
+        except OSError as e:
+            self.log("WARN schedule timerfd unavailable, using the loop clock:", e)
+            if self._schedule_timer:
+                self.loop.remove_reader(self._schedule_timer.fd)
+                self._schedule_timer.close()
+                self._schedule_timer = None
+        delay = min(max(0.0, when - self.wall_time()), self.SCHEDULE_RECHECK)
+        self._schedule_call = self.loop.call_later(delay, self._on_schedule_call)
+
+    def _on_schedule_timer(self):
+        fired = self._schedule_timer.read()
+        if fired == "clock-set":
+            notice("SCHEDULE wall clock changed, recomputing the next transition")
+        if fired:
+            self.apply_schedule(announce=fired == "clock-set")
+
+    def _on_schedule_call(self):
+        self._schedule_call = None
+        self.apply_schedule()
+
+    # --- Idle inhibitors --------------------------------------------------
+    def start_inhibit_dir(self):
+        path = self.config.inhibit_dir
+        if not path:
+            return
+        from touchwake.inhibit import InhibitDir
+        try:
+            self.inhibit_dir = InhibitDir(self.loop, path, self.update_inhibition, group=self.config.control_group,
+                                          log=self.log, displays=lambda: [d.name for d in self.displays], warn=notice)
+        except (OSError, KeyError) as e:
+            notice(f"WARN inhibit directory unavailable: {path}{self._group_error(e)}")
+        self.update_inhibition()
+
+    def all_inhibitors(self):
+        held = list(self.inhibitors.values())
+        if self.inhibit_dir:
+            held += self.inhibit_dir.held.values()
+        return held
+
+    def update_inhibition(self):
+        """Recompute which displays are held on; called on every inhibitor change (never polled)."""
+        held = self.all_inhibitors()
+        for display in self.displays:
+            display.set_inhibited(display.always_on or any(i.covers(display.name) for i in held))
+        summary = ", ".join(sorted(f"{i.who} ({i.why})" if i.why else i.who for i in held))
+        if summary != self._inhibit_summary:
+            self._inhibit_summary = summary
+            notice(f"INHIBIT {len(held)} held" + (f": {summary}" if summary else ""))
+        self.publish_state()
+
+    def _control_disconnected(self, fd):
+        keys = [key for key in self.inhibitors if key[0] == fd]
+        for key in keys:
+            del self.inhibitors[key]
+        if keys:
+            self.update_inhibition()
+
+    def _inhibit(self, request):
+        from touchwake.inhibit import Inhibitor
+        who, why = request.get("who"), request.get("why", "")
+        if not isinstance(who, str) or not who.strip():
+            raise ValueError("inhibit needs a non-empty 'who'")
+        if not isinstance(why, str):
+            raise ValueError("'why' must be a string")
+        display = request.get("display")
+        if display is not None:
+            self._requested_displays(request)  # unknown names are rejected
+        self.inhibitors[(self.control.client, who.strip())] = Inhibitor(who.strip(), why.strip(), "socket", display)
+        self.update_inhibition()
+
+    def get_state(self):
+        """Primary display fields at the top level (single-display clients), every display under 'displays'."""
+        displays = [d.state() for d in self.displays]
+        state = dict(displays[0])
+        state.pop("name")
+        state.update({
+            "displays": displays,
+            "devices": sorted(self.devices),
+            "device_displays": {path: [d.name for d in self.device_displays[dev.fd]] for path, dev in self.devices.items()},
+            "input_backend": self.loop.mux.name,
+            "inhibitors": [i.as_dict() for i in self.all_inhibitors()],
+            "profile": self.profile_name,
+            "ambient": {"sensor": self.ambient.sensor.path, "lux": self.ambient.lux, "percent": self.ambient.percent,
+                        "sampling": self.ambient.running} if self.ambient else None,
+        })
+        return state
+
+    def _requested_displays(self, request):
+        name = request.get("display")
+        if name is None:
+            return self.displays
+        for display in self.displays:
+            if display.name == name:
+                return [display]
+        raise ValueError(f"unknown display '{name}'")
+
+    def handle_control(self, request):
+        cmd = request.get("cmd")
+        if cmd == "get-config":
+            return {"ok": True, "config": self.config.as_dict()}
+        if cmd in ("get-state", "subscribe"):
+            return {"ok": True, "state": self.get_state()}
+        if cmd == "get-energy":
+            return {"ok": True, "energy": {d.name: d.energy_report() for d in self.displays}}
+        if cmd == "get-trace":
+            fmt = request.get("format", "json")
+            if not self.trace:
+                raise ValueError("wake trace is off; set trace_wakes = true")
+            if fmt == "json":
+                return {"ok": True, "trace": self.trace.as_json()}
+            if fmt == "trace-event":
+                return {"ok": True, "trace": self.trace.trace_events()}
+            raise ValueError("format must be json or trace-event")
+        if cmd == "set-config":
+            values = request.get("values")
+            if not isinstance(values, dict):
+                raise ValueError("set-config needs an object 'values'")
+            config = self.config.updated(values)
+            try:
+                applied, restart = self.apply_config(config)
+            except StartupError as e:
+                raise ValueError(str(e)) from None
+            self.log("CONFIG applied:", applied, "restart required:", restart)
+            self.publish_state()
+            return {"ok": True, "applied": applied, "restart_required": restart}
+        if cmd == "sleep":
+            for display in self._requested_displays(request):
+                display.idle.sleep_now()
+            return {"ok": True, "state": self.get_state()}
+        if cmd == "wake":
+            for display in self._requested_displays(request):
+                display.idle.activity()
+            return {"ok": True, "state": self.get_state()}
+        if cmd == "inhibit":
+            self._inhibit(request)
+            return {"ok": True, "inhibitors": [i.as_dict() for i in self.all_inhibitors()]}
+        if cmd == "uninhibit":
+            if self.inhibitors.pop((self.control.client, str(request.get("who", "")).strip()), None) is None:
+                raise ValueError("no inhibitor of that name is held by this connection")
+            self.update_inhibition()
+            return {"ok": True, "inhibitors": [i.as_dict() for i in self.all_inhibitors()]}
+        if cmd == "list-inhibitors":
+            return {"ok": True, "inhibitors": [i.as_dict() for i in self.all_inhibitors()]}
+        raise ValueError(f"unknown command '{cmd}'")
+
+    def publish_state(self):
+        """Push the state to subscribed clients once the current loop iteration is done (coalesced)."""
+        if self.control and self.control.subscribers and self._publish_timer is None:
+            self._publish_timer = self.loop.call_later(0, self._publish_now)
+
+    def _publish_now(self):
+        self._publish_timer = None
+        if self.control:
+            self.control.publish({"event": "state", "state": self.get_state()})
+
+    # --- Metrics ----------------------------------------------------------
+    def render_metrics(self):
+        now = self.loop.time()
+        m, watcher = self.metrics, self.watcher
+        out = TextFormat()
+        out.sample("uptime_seconds", "gauge", "Seconds since daemon start.", now - m.started)
+        # Samples of one family must be contiguous: one pass per metric over the displays
+        labelled = [(d, {"display": d.name}) for d in self.displays]
+        for d, labels in labelled:
+            out.sample("asleep", "gauge", "1 while the display is asleep.", int(d.idle.asleep), labels)
+        for d, labels in labelled:
+            out.sample("sleeps_total", "counter", "Idle sleeps.", d.metrics.sleeps, labels)
+        for d, labels in labelled:
+            out.sample("wakes_total", "counter", "Wakes from sleep.", d.metrics.wakes, labels)
+        for d, labels in labelled:
+            out.sample("dim_stage", "gauge", "Idle dim stage reached (0 = full brightness).", d.idle.stage, labels)
+        for d, labels in labelled:
+            out.sample("dims_total", "counter", "Idle dim stages entered.", d.metrics.dims, labels)
+        for d, labels in labelled:
+            out.sample("undims_total", "counter", "Dimmed displays restored by activity before the sleep.",
+                       d.metrics.undims, labels)
+        for d, labels in labelled:
+            out.sample("asleep_seconds_total", "counter", "Time spent with the display asleep.", d.metrics.total_asleep(now), labels)
+        reports = [(d.energy_report(buckets=False), labels) for d, labels in labelled]
+        for r, labels in reports:
+            out.sample("screen_on_seconds_total", "counter", "Time the backlight was lit (persisted).",
+                       r["screen_on_seconds"], labels)
+        for r, labels in reports:
+            out.sample("energy_wh_total", "counter", "Estimated backlight energy (energy_watts_min/max model).",
+                       r["wh"], labels)
+        for d, labels in labelled:
+            out.histogram("wake_latency_seconds", "Kernel event timestamp to wake brightness write.", d.metrics.wake_latency, labels)
+        for d, labels in labelled:
+            out.sample("inhibited", "gauge", "1 while an idle inhibitor holds the display on.", int(d.idle.inhibited), labels)
+        out.sample("inhibitors", "gauge", "Idle inhibitors held (socket and lock files).", len(self.all_inhibitors()))
+        out.sample("devices", "gauge", "Registered input devices.", len(self.devices))
+        for path, reader in self.readers.items():
+            labels = {"device": path, "name": getattr(self.devices[path], "name", "")}
+            out.sample("device_events_total", "counter", "Input event records drained per device.", reader.records, labels)
+        for path, reader in self.readers.items():
+            out.sample("device_reads_total", "counter", "readv() calls per device.", reader.reads, {"device": path})
+        filtered = [(path, self.filters[dev.fd]) for path, dev in self.devices.items() if dev.fd in self.filters]
+        for path, wake_filter in filtered:
+            out.sample("device_filter_frames_total", "counter", "Input frames judged by the wake filter.",
+                       wake_filter.frames, {"device": path})
+        for path, wake_filter in filtered:
+            out.sample("device_filter_rejected_total", "counter", "Input frames rejected by the wake filter.",
+                       wake_filter.rejected, {"device": path})
+        if self.classcache:
+            out.sample("device_cache_hits_total", "counter", "Device classifications answered from the cache.", self.classcache.hits)
+            out.sample("device_cache_misses_total", "counter", "Device classifications computed from sysfs.", self.classcache.misses)
+        if watcher:
+            out.sample("rescans_total", "counter", "Full input directory rescans.", watcher.rescans)
+            out.sample("rescan_seconds_total", "counter", "Time spent in rescans.", watcher.rescan_seconds)
+        if self.ambient:
+            a = self.ambient
+            out.sample("ambient_samples_total", "counter", "Light sensor samples.", a.samples)
+            out.sample("ambient_errors_total", "counter", "Failed light sensor reads.", a.errors)
+            if a.lux is not None:
+                out.sample("ambient_lux", "gauge", "Smoothed ambient illuminance.", a.lux)
+                out.sample("ambient_level_percent", "gauge", "Adaptive brightness level in use.", a.percent)
+        out.sample("loop_iterations_total", "counter", "Event loop iterations (poll wakeups).", self.loop.iterations)
+        out.sample("loop_iterations_per_second", "gauge", "Event loop iterations per second since the previous export.",
+                   m.iteration_rate(now, self.loop.iterations))
+        for d, labels in labelled:
+            out.sample("backlight_writes_total", "counter", "sysfs backlight writes.", d.backlight.writes, labels)
+        for d, labels in labelled:
+            out.sample("backlight_writes_skipped_total", "counter", "Brightness writes skipped (value unchanged).",
+                       d.backlight.writes_skipped, labels)
+        return out.text()
+
+    def write_metrics(self):
+        path = self.config.metrics_file
+        if not path:
+            return
+        try:
+            write_textfile(path, self.render_metrics())
+        except OSError as e:
+            self.log("WARN metrics:", e)
+
+    def schedule_metrics(self):
+        """Write now and refresh every metrics_interval while a display is awake; no timer while all sleep."""
+        if self._metrics_timer:
+            self._metrics_timer.cancel()
+            self._metrics_timer = None
+        if not self.config.metrics_file:
+            return
+        self.write_metrics()
+        if any(not d.idle.asleep for d in self.displays):
+            self._metrics_timer = self.loop.call_later(self.config.metrics_interval, self.schedule_metrics)
+
+    # --- Idle / Wake ------------------------------------------------------
+    def _display_changed(self, display):
+        if display.idle.asleep:
+            self.end_active_phase()  # devices of this display must be read again to wake it
+        self._follow_ambient()
+        self.schedule_metrics()
+        self.schedule_energy_save(save=display.idle.asleep)
+        self.publish_state()
+
+    def _display_settled(self, display):
+        self.publish_state()
+
+def notice(msg):
+    """Always logged (rare, operator-relevant events such as reloads)."""
+    print(time.strftime("%H:%M:%S"), msg, flush=True)
+
+def install_signal_handlers(daemon):
+    """
+    SIGTERM/SIGINT stop the loop, SIGHUP reloads the config, SIGUSR1 dumps the wake
+    trace. The wakeup pipe carries the signal numbers and interrupts a poll() that
+    may block indefinitely; reload and dump run from the loop, never inside the
+    signal handler.
+    """
+    def _stop(*_):
+        daemon.stop()
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+    signal.signal(signal.SIGHUP, lambda *_: None)
+    signal.signal(signal.SIGUSR1, lambda *_: None)
+    sig_r, sig_w = os.pipe2(os.O_NONBLOCK | os.O_CLOEXEC)
+    signal.set_wakeup_fd(sig_w, warn_on_full_buffer=False)
+
+    def _drain_signal_pipe():
+        try:
+            signums = os.read(sig_r, 512)
+        except BlockingIOError:
+            return
+        if signal.SIGHUP in signums:
+            daemon.request_reload()
+        if signal.SIGUSR1 in signums:
+            daemon.dump_trace()
+    daemon.loop.add_reader(sig_r, _drain_signal_pipe)
+
+def print_stats(config):
+    path = config.metrics_file
+    if not path:
+        raise SystemExit("ERROR: Metrics are disabled. Set 'metrics_file' in the config.")
+    try:
+        with open(path) as f:
+            text = f.read()
+        age = time.time() - os.stat(path).st_mtime
+    except OSError as e:
+        raise SystemExit(f"ERROR: Cannot read {path} ({e.strerror}). Is touch-wake-display.service running?")
+    print(text, end="")
+    print(f"# written {age:.0f}s ago (refreshed every {config.metrics_interval:g}s while awake, and on sleep/wake)")
+
+def _hours(seconds):
+    return f"{seconds / 3600.0:.1f} h"
+
+def print_energy(config):
+    """Energy report from the running daemon, or from the persisted file if it is not reachable."""
+    try:
+        from touchwake.control import request
+        energy = request("get-energy", path=config.control_socket)["energy"]
+        source = "daemon"
+    except (OSError, RuntimeError):
+        from touchwake.energy import report
+        try:
+            meters = load_meters(config.energy_file) if config.energy_file else {}
+        except (OSError, ValueError) as e:
+            raise SystemExit(f"ERROR: Cannot read {config.energy_file} ({e}).")
+        if not meters:
+            raise SystemExit("ERROR: No energy history yet. Is touch-wake-display.service running?")
+        watts = {d.name: (d.energy_watts_min, d.energy_watts_max) for d in config.display_configs()}
+        energy = {name: report(m, *watts.get(name, (config.energy_watts_min, config.energy_watts_max)))
+                  for name, m in meters.items()}
+        source = config.energy_file
+    for name, r in energy.items():
+        print(f"[{name}] today: {_hours(r['today_screen_on_seconds'])} on, {r['today_wh']:.2f} Wh; "
+              f"total: {_hours(r['screen_on_seconds'])} on, {r['wh']:.2f} Wh")
+        for day, on_s, wh in r["days"][-7:]:
+            print(f"  {day}  {_hours(on_s):>7} on  {wh:8.2f} Wh")
+    print(f"# from {source}; Wh estimated from energy_watts_min/max")
+
+def print_trace(config, fmt):
+    """Stage percentiles (fmt 'summary') or the raw trace as JSON from the running daemon."""
+    from touchwake.control import request
+    import json
+    try:
+        trace = request("get-trace", path=config.control_socket,
+                        format="json" if fmt == "summary" else fmt)["trace"]
+    except OSError as e:
+        raise SystemExit(f"ERROR: Daemon not reachable on {config.control_socket} ({e}). "
+                         "Is touch-wake-display.service running?")
+    except RuntimeError as e:
+        raise SystemExit(f"ERROR: {e}.")
+    if fmt != "summary":
+        print(json.dumps(trace))
+        return
+    print(f"{trace['wakes']} wakes traced, last {len(trace['records'])} kept (ms, monotonic clock)")
+    print(f"{'stage':<22}{'count':>6}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+    fmt_ms = lambda v: f"{v:9.3f}" if v is not None else f"{'-':>9}"
+    for name, s in trace["summary"].items():
+        print(f"{name:<22}{s['count']:>6}" + "".join(fmt_ms(s[k]) for k in ("p50", "p95", "p99", "max")))
+
+def hold_inhibitor(config, who, why, display):
+    """Hold an idle inhibitor until interrupted (Ctrl+C, SIGTERM) or the daemon exits."""
+    from touchwake.control import inhibit
+    try:
+        s = inhibit(who, why, display, path=config.control_socket)
+    except OSError as e:
+        raise SystemExit(f"ERROR: Daemon not reachable on {config.control_socket} ({e}). "
+                         "Is touch-wake-display.service running?")
+    except RuntimeError as e:
+        raise SystemExit(f"ERROR: {e}.")
+    print(f"Holding the screen on as '{who}'" + (f" on [{display}]" if display else "") + "; Ctrl+C releases it.", flush=True)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    s.settimeout(None)
+    try:
+        while s.recv(4096):
+            pass  # replies only; the daemon closes the connection when it exits
+    except KeyboardInterrupt:
+        pass
+    finally:
+        signal.signal(signal.SIGINT, signal.SIG_IGN)  # a second Ctrl+C must not interrupt the release
+        s.close()
+
+def print_inhibitors(config):
+    from touchwake.control import request
+    try:
+        held = request("list-inhibitors", path=config.control_socket)["inhibitors"]
+        lines = []
+        for i in held:
+            since = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(i["since"]))
+            where = f"[{i['display']}]" if i["display"] else "all"
+            pid = f" pid {i['pid']}" if i["pid"] else ""
+            lines.append(f"{i['who']:<20} {where:<10} {i['source']:<6} since {since}{pid}  {i['why']}")
+    except OSError as e:
+        raise SystemExit(f"ERROR: Daemon not reachable on {config.control_socket} ({e}). "
+                         "Is touch-wake-display.service running?")
+    except RuntimeError as e:
+        raise SystemExit(f"ERROR: {e}.")
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        raise SystemExit(f"ERROR: Unexpected reply from {config.control_socket} ({e!r}). "
+                         "Do the daemon and this script come from the same install?")
+    for line in lines:
+        print(line)
+    print(f"# {len(held)} idle inhibitor(s) held")
+
+def print_replay(config, paths):
+    from touchwake.replay import replay
+    try:
+        summary = replay(config, paths)
+    except (OSError, ValueError) as e:
+        raise SystemExit(f"ERROR: Cannot replay ({e}).")
+    print(f"# {summary['records']} records, {summary['decisions']} decisions, "
+          f"{summary['simulated_seconds'] / 3600.0:.1f} h replayed in {summary['replay_seconds']:.2f} s")
+
+def main(argv=None):
+    import argparse
+    ap = argparse.ArgumentParser(description="Turn off the DSI backlight after inactivity; wake on touch/keyboard/mouse.")
+    ap.add_argument("--config", default=CONF_PATH, help=f"config file (default: {CONF_PATH})")
+    ap.add_argument("--stats", action="store_true", help="print the running daemon's metrics once and exit")
+    ap.add_argument("--energy", action="store_true", help="print screen-on time and estimated energy per display and exit")
+    ap.add_argument("--replay", nargs="+", metavar="LOG",
+                    help="replay activity logs (record_file; oldest first) under the config and print every decision")
+    ap.add_argument("--trace", nargs="?", const="summary", choices=("summary", "json", "trace-event"),
+                    help="print wake latency stages (needs trace_wakes = true); json / trace-event dump the records")
+    ap.add_argument("--inhibit", metavar="WHO", help="hold the screen on as WHO until interrupted (idle inhibitor)")
+    ap.add_argument("--why", default="", help="reason shown with --inhibit")
+    ap.add_argument("--display", help="with --inhibit: hold only this display (default: all)")
+    ap.add_argument("--inhibitors", action="store_true", help="list the idle inhibitors held and exit")
+    args = ap.parse_args(argv)
+    try:
+        config = Config.from_file(args.config)
+    except ValueError as e:
+        raise SystemExit(f"Invalid configuration in {args.config}: {e}")
+    if args.stats:
+        print_stats(config)
+        return
+    if args.energy:
+        print_energy(config)
+        return
+    if args.trace:
+        print_trace(config, args.trace)
+        return
+    if args.replay:
+        print_replay(config, args.replay)
+        return
+    if args.inhibit:
+        hold_inhibitor(config, args.inhibit, args.why, args.display)
+        return
+    if args.inhibitors:
+        print_inhibitors(config)
+        return
+    notifier = Notifier()
+    daemon = Daemon(config, conf_path=args.config, notifier=notifier)
+    try:
+        daemon.start()
+    except StartupError as e:
+        notifier.notify(f"STATUS={e}")
+        raise SystemExit(str(e))
+    install_signal_handlers(daemon)
+    daemon.start_watchdog()
+    # Devices are registered and the idle timer is armed: dependent units may start
+    notifier.notify("READY=1", f"STATUS={daemon.status()}")
+    try:
+        daemon.run()
+    finally:
+        notifier.notify("STOPPING=1")
+        daemon.close()
+        notifier.close()
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+Input device opening and classification (touchscreen / keyboard / mouse).
+python-evdev is imported on first use so the package stays importable without it.
+"""
+
+from touchwake.evio import EV_KEY, EV_REL
+
+INPUT_PROP_DIRECT = 0x01
+EVDEV_HINT = "Missing evdev? -> sudo apt install -y python3-evdev"
+
+_InputDevice = None
+
+def require_evdev():
+    """Import python-evdev once; raises ImportError with an install hint."""
+    global _InputDevice
+    if _InputDevice is None:
+        try:
+            from evdev import InputDevice  # type: ignore
+        except ImportError as e:
+            raise ImportError(f"{EVDEV_HINT} ({e})") from e
+        _InputDevice = InputDevice
+    return _InputDevice
+
+def is_touchscreen(dev) -> bool:
+    name = (dev.name or "").lower()
+    if 'touch' in name or 'goodix' in name:
+        return True
+    try:
+        props = dev.properties()
+        if INPUT_PROP_DIRECT in props:
+            return True
+    except Exception:
+        pass
+    return False
+
+def is_keyboard_or_mouse(dev) -> bool:
+    name = (dev.name or "").lower()
+    caps = dev.capabilities()
+    is_mouse = (EV_REL in caps) or ('mouse' in name)
+    is_kbd   = (EV_KEY in caps) or ('keyboard' in name) or ('kbd' in name)
+    return is_mouse or is_kbd
+
+def classify(name, ev_types, direct) -> bool:
+    """Same rules as is_touchscreen/is_keyboard_or_mouse on plain values (sysfs identity, see classcache.py)."""
+    name = (name or "").lower()
+    if 'touch' in name or 'goodix' in name or direct:
+        return True
+    return (EV_REL in ev_types) or (EV_KEY in ev_types) or any(w in name for w in ('mouse', 'keyboard', 'kbd'))
+
+def open_evdev_device(path, check=True):
+    """
+    Open and classify an event node. Returns the InputDevice (needs .fd, .path,
+    .name, .close()) or None if the device is irrelevant. OSError = retry later.
+    check=False skips classification (already decided, e.g. by the device cache).
+    """
+    dev = require_evdev()(path)
+    if check and not (is_touchscreen(dev) or is_keyboard_or_mouse(dev)):
+        dev.close()
+        return None
+    return dev
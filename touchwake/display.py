@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""
+One backlight ("display") with its own idle timeout, fades and wake target.
+Every display's IdleController arms its deadline in the shared EventLoop timer
+heap, so N displays cost one heap entry each (O(log N) per re-arm) and input
+activity only stores a timestamp on the displays the device is mapped to.
+Input devices are mapped by the display's `devices` patterns (name or phys).
+An active schedule profile (config.ProfileConfig) overrides the idle timeout and
+wake level, or forces the display on or off.
+Optional dim stages (dim_stages) lower the level before the sleep; the panel stays
+powered, so activity restores the pre-dim level with a single brightness write.
+"""
+
+import fnmatch
+
+from touchwake.classcache import parse_rules
+from touchwake.core import parse_stages
+from touchwake.energy import EnergyMeter, report
+from touchwake.fade import Fader
+from touchwake.idle import IdleController
+from touchwake.metrics import Metrics
+
+class Display:
+    def __init__(self, loop, config, backlight, on_change=None, on_settled=None, log=None):
+        self.loop = loop
+        self.name = config.name
+        self.config = config
+        self.backlight = backlight
+        self.on_change = on_change or (lambda display: None)    # went to sleep / woke up / (un)dimmed
+        self.on_settled = on_settled or (lambda display: None)  # a sleep/wake fade reached its target
+        self.log = log or (lambda *a: None)
+        self.rules = parse_rules(config.devices)
+        self.fader = Fader(loop, backlight, curve=config.fade_curve, max_hz=config.fade_max_hz)
+        self.stages = parse_stages(config.dim_stages)  # [(seconds, percent, fade_ms or None)]
+        self.idle = IdleController(loop, config.idle_seconds, self.sleep, self.wake, self.dim, self.undim,
+                                   [s[0] for s in self.stages])
+        self.undim_level = None             # level before the first dim stage (None = not dimmed)
+        self.change = None                  # last on_change cause: sleep / wake / dim / undim
+        self.metrics = Metrics(loop.time())
+        self.ambient_percent = None         # adaptive level (ambient light); replaces the restore target
+        self.energy = EnergyMeter()
+        self.profile = None                 # active schedule profile covering this display
+        self._attach(backlight)
+
+    def _attach(self, backlight):
+        """Feed every level/power change of `backlight` into the energy meter."""
+        def _on_level(level, powered):
+            self.energy.update(level / backlight.max if backlight.max else 0.0, powered and level > 0)
+        backlight.on_level = _on_level
+        level = backlight.read_brightness()
+        _on_level(level, True)
+
+    def restore_energy(self, meter):
+        """Continue a persisted meter (history from before a restart)."""
+        meter.adopt(self.energy)
+        self.energy = meter
+
+    def energy_report(self, buckets=True):
+        return report(self.energy, self.config.energy_watts_min, self.config.energy_watts_max, buckets)
+
+    def matches(self, dev):
+        """True if `dev` (name / phys) matches one of this display's device patterns."""
+        fields = (getattr(dev, "name", "") or "").lower(), (getattr(dev, "phys", "") or "").lower()
+        return any(fnmatch.fnmatchcase(f, p) for p in self.rules for f in fields)
+
+    def start(self):
+        # Ensure display is not left dark at startup
+        self.backlight.set_power(True)
+        if self.backlight.read_brightness() <= 0:
+            self.backlight.set_brightness(self.backlight.max)
+        self.idle.start()
+
+    def close(self):
+        self.fader.cancel()
+        self.idle.stop()
+        self.energy.flush()
+        self.backlight.on_level = None
+        self.backlight.close()
+
+    def set_inhibited(self, on):
+        """Hold the display on (an idle inhibitor covers it) or release it to the idle timer."""
+        if on != self.idle.inhibited:
+            self.log(f"INHIBIT [{self.name}]", "on" if on else "off")
+            self.idle.set_inhibited(on)
+
+    @property
+    def last_active_brightness(self):
+        """Last >0 brightness before a sleep (kept by the idle core)."""
+        return self.idle.core.last_active_brightness
+
+    def set_profile(self, profile):
+        """Switch to schedule profile `profile` (None = plain settings); an awake display fades to its level."""
+        old = self._profile_level()
+        self.profile = profile
+        self.idle.set_forced_off(profile is not None and profile.mode == "off")
+        idle_seconds = self._idle_seconds()
+        if idle_seconds != self.idle.idle_seconds:
+            self.idle.set_idle_seconds(idle_seconds)
+        level = self._profile_level()
+        if level != old and not self.idle.asleep:
+            if self.undim_level is not None:
+                self.undim_level = level or self._restore_target()  # applied on undim
+            elif not self.fader.active:
+                self.fader.fade_to(level or self._restore_target(), self.config.fade_in_ms, on_done=self._settled)
+
+    @property
+    def always_on(self):
+        return self.profile is not None and self.profile.mode == "on"
+
+    def _idle_seconds(self):
+        p = self.profile
+        return p.idle_seconds if p is not None and p.idle_seconds is not None else self.config.idle_seconds
+
+    def _force_max(self):
+        p = self.profile
+        return p.force_max_on_wake if p is not None and p.force_max_on_wake is not None else self.config.force_max_on_wake
+
+    def _profile_level(self):
+        """Raw wake level set by the active profile, or None."""
+        p = self.profile
+        if p is None or p.wake_brightness is None:
+            return None
+        return max(1, round(p.wake_brightness / 100.0 * self.backlight.max))
+
+    def deadline(self):
+        """When the idle timer next decides (next dim stage, else sleep), inhibitors aside."""
+        return self.idle.last_event_ts + self.idle.core.next_offset()
+
+    def apply(self, config, backlight=None):
+        """Switch to new per-display settings; `backlight` replaces the open one (bl_base changed)."""
+        self.config = config
+        self.rules = parse_rules(config.devices)
+        if backlight:
+            self.fader.cancel()
+            self.backlight.on_level = None
+            self.backlight.close()
+            self.backlight = self.fader.backlight = backlight
+            self._attach(backlight)
+            if self.idle.asleep:
+                backlight.set_brightness(0)
+                backlight.set_power(False)
+            else:
+                backlight.set_power(True)
+                if backlight.read_brightness() <= 0:
+                    backlight.set_brightness(self.last_active_brightness or backlight.max)
+        self.fader.curve = config.fade_curve
+        self.fader.max_hz = config.fade_max_hz
+        if self._idle_seconds() != self.idle.idle_seconds:
+            self.idle.set_idle_seconds(self._idle_seconds())
+        self.stages = parse_stages(config.dim_stages)
+        self.idle.set_stages([s[0] for s in self.stages])
+
+    def state(self):
+        bl, idle = self.backlight, self.idle
+        return {
+            "name": self.name,
+            "asleep": idle.asleep,
+            "inhibited": idle.inhibited,
+            "profile": self.profile.name if self.profile else None,
+            "idle_seconds": idle.idle_seconds,
+            # Until the next dim stage or the sleep, as the idle timer will act
+            "idle_remaining": (0 if idle.asleep or idle.forced_off else None if idle.inhibited
+                               else max(0.0, self.deadline() - self.loop.time())),
+            "dim_stage": idle.stage,
+            "dim_stages": self.stages,
+            "brightness": bl.read_brightness(),
+            "fading_to": self.fader.target,
+            "ambient_percent": self.ambient_percent,
+            "max_brightness": bl.max,
+            "last_active_brightness": self.last_active_brightness,
+            "backlight": bl.base,
+            "energy": self.energy_report(buckets=False),
+        }
+
+    def _ambient_raw(self):
+        return max(1, round(self.ambient_percent / 100.0 * self.backlight.max))
+
+    def set_ambient(self, percent, fade_ms):
+        """New adaptive level (None = off); fades there now if awake and no sleep/wake fade is running."""
+        self.ambient_percent = percent
+        if percent is None or self.idle.asleep or self._force_max() or self._profile_level():
+            return
+        if self.undim_level is not None:
+            self.undim_level = self._ambient_raw()  # applied on undim
+            return
+        if self.fader.active:
+            return
+        self.fader.fade_to(self._ambient_raw(), fade_ms, on_done=self._settled)
+
+    # --- Idle / Wake ------------------------------------------------------
+    def wake(self):
+        cfg, bl, fader = self.config, self.backlight, self.fader
+        # Abort a running fade-out immediately; it already proved the panel was lit
+        interrupted = fader.active
+        fader.cancel()
+        self.undim_level = None
+        bl.set_power(True)
+        force_max = self._force_max()
+        if force_max:
+            fader.fade_to(bl.max, cfg.fade_in_ms, on_done=self._settled)
+        else:
+            target = self._profile_level() or self._restore_target()
+            # If current brightness already >0 (e.g. external wake) do not overwrite
+            if interrupted or bl.read_brightness() <= 0:
+                fader.fade_to(target, cfg.fade_in_ms, on_done=self._settled)
+        self.metrics.on_wake(self.loop.time())
+        self.change = "wake"
+        self.on_change(self)
+        self.log(f"WAKE [{self.name}] restore=", self.last_active_brightness, "force_max=", force_max,
+                 "interrupted_fade=", interrupted)
+
+    def dim(self, stage):
+        """Idle dim stage `stage` (1-based) reached: fade down, never up, with the panel left on."""
+        bl, fader = self.backlight, self.fader
+        _, percent, fade_ms = self.stages[stage - 1]
+        if self.undim_level is None:
+            self.undim_level = fader.target if fader.active else bl.read_brightness()
+        level = min(self.undim_level, max(1, round(percent / 100.0 * bl.max)))
+        fader.fade_to(level, self.config.fade_out_ms if fade_ms is None else fade_ms, on_done=self._settled)
+        self.metrics.dims += 1
+        self.change = "dim"
+        self.on_change(self)
+        self.log(f"DIM [{self.name}] stage={stage} level={level} from={self.undim_level}")
+
+    def undim(self):
+        """Activity while dimmed: back to the pre-dim level in one write, no bl_power toggle."""
+        level, self.undim_level = self.undim_level, None
+        self.fader.cancel()
+        if level:
+            self.backlight.set_brightness(level)
+        self.metrics.undims += 1
+        self.change = "undim"
+        self.on_change(self)
+        self.log(f"UNDIM [{self.name}] level={level}")
+
+    def _restore_target(self):
+        # Adaptive level if enabled, else restore previous brightness if available, else fallback to max
+        if self.ambient_percent is not None:
+            return self._ambient_raw()
+        return self.idle.core.restore_target(self.backlight.max)
+
+    def sleep(self):
+        bl, fader = self.backlight, self.fader
+        # Capture current brightness (or the target of a running fade-in, or the pre-dim level) before turning off
+        cur = self.undim_level if self.undim_level is not None else fader.target if fader.active else bl.read_brightness()
+        self.undim_level = None
+        if cur > 0 and self._profile_level() is None:  # a profile's level is not the user's choice
+            self.idle.core.remember(cur)
+            bl.remember(cur)
+        def _off():
+            bl.set_power(False)
+            self._settled()
+        fader.fade_to(0, self.config.fade_out_ms, on_done=_off)
+        self.metrics.on_sleep(self.loop.time())
+        self.change = "sleep"
+        self.on_change(self)
+        self.log(f"SLEEP [{self.name}] remember=", self.last_active_brightness)
+
+    def _settled(self):
+        self.on_settled(self)
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+Screen-on time and energy accounting per backlight.
+- Backlight reports every level/power change; EnergyMeter integrates
+  lit seconds and brightness fraction x seconds between changes. Durations come
+  from the monotonic clock, so wall-clock steps (NTP at boot, manual changes)
+  neither add nor drop time; the wall clock only places them in buckets
+- Totals plus hourly and daily buckets in fixed-size rings (no growth); an
+  interval is split at hour boundaries, days follow local midnight
+- Estimated Wh from a linear model: watts_min while lit at the lowest level up
+  to watts_max at max_brightness; the model is applied when reporting, so
+  changing it re-rates the stored history
+- Persisted as one compact binary file for all displays (struct + arrays)
+"""
+
+import os, struct, time
+from array import array
+
+HOURS = 48  # hourly buckets kept
+DAYS = 35   # daily buckets kept
+
+_MAGIC = b"TWE1"
+_HEADER = struct.Struct("<4sI")
+_METER = struct.Struct("<HIIdd")  # name length, hour slots, day slots, on seconds, level seconds
+
+class Ring:
+    """Fixed number of time buckets; slot = bucket number % size, stale slots are overwritten."""
+    __slots__ = ("ids", "on", "level")
+
+    def __init__(self, size):
+        self.ids = array("q", [-1] * size)
+        self.on = array("d", bytes(8 * size))
+        self.level = array("d", bytes(8 * size))
+
+    def add(self, bucket, on_s, level_s):
+        i = bucket % len(self.ids)
+        if self.ids[i] != bucket:
+            self.ids[i] = bucket
+            self.on[i] = 0.0
+            self.level[i] = 0.0
+        self.on[i] += on_s
+        self.level[i] += level_s
+
+    def get(self, bucket):
+        i = bucket % len(self.ids)
+        return (self.on[i], self.level[i]) if self.ids[i] == bucket else (0.0, 0.0)
+
+    def items(self):
+        """(bucket, on seconds, level seconds), oldest first."""
+        return sorted((b, self.on[i], self.level[i]) for i, b in enumerate(self.ids) if b >= 0)
+
+    def pack(self):
+        return self.ids.tobytes() + self.on.tobytes() + self.level.tobytes()
+
+    def unpack(self, data):
+        n = len(self.ids)
+        self.ids = array("q", data[:8 * n])
+        self.on = array("d", data[8 * n:16 * n])
+        self.level = array("d", data[16 * n:24 * n])
+
+class EnergyMeter:
+    __slots__ = ("clock", "monotonic", "on_seconds", "level_seconds", "hours", "days", "_since", "_fraction", "_lit")
+
+    def __init__(self, clock=time.time, hours=HOURS, days=DAYS, monotonic=time.monotonic):
+        self.clock = clock
+        self.monotonic = monotonic
+        self.on_seconds = 0.0     # lifetime lit time
+        self.level_seconds = 0.0  # lifetime integral of brightness fraction (0..1) over time
+        self.hours = Ring(hours)
+        self.days = Ring(days)
+        self._since = monotonic()  # start of the interval not yet credited
+        self._fraction = 0.0
+        self._lit = False
+
+    def update(self, fraction, lit):
+        """The backlight changed: credit the elapsed interval at the old level, continue at the new one."""
+        self.flush()
+        self._fraction = fraction if lit else 0.0
+        self._lit = lit
+
+    def adopt(self, live):
+        """Continue at the level of the `live` meter (this one was restored from disk)."""
+        self.update(live._fraction, live._lit)
+
+    def flush(self):
+        mono = self.monotonic()
+        elapsed, self._since = mono - self._since, mono
+        if not self._lit or elapsed <= 0:
+            return
+        now = self.clock()
+        t = now - elapsed
+        off = time.localtime(t).tm_gmtoff
+        while t < now:
+            hour = int(t // 3600)
+            end = min(now, (hour + 1) * 3600.0)
+            dt = end - t
+            level_s = dt * self._fraction
+            self.on_seconds += dt
+            self.level_seconds += level_s
+            self.hours.add(hour, dt, level_s)
+            self.days.add(int((t + off) // 86400), dt, level_s)
+            t = end
+
+    def today(self):
+        now = self.clock()
+        return self.days.get(int((now + time.localtime(now).tm_gmtoff) // 86400))
+
+def watt_hours(on_s, level_s, watts_min, watts_max):
+    return (on_s * watts_min + level_s * (watts_max - watts_min)) / 3600.0
+
+def report(meter, watts_min, watts_max, buckets=True):
+    """Totals (and hourly/daily buckets) with estimated Wh, JSON-friendly."""
+    meter.flush()
+    wh = lambda on_s, level_s: round(watt_hours(on_s, level_s, watts_min, watts_max), 4)
+    today_on, today_level = meter.today()
+    out = {
+        "screen_on_seconds": round(meter.on_seconds, 1),
+        "level_seconds": round(meter.level_seconds, 1),
+        "wh": wh(meter.on_seconds, meter.level_seconds),
+        "today_screen_on_seconds": round(today_on, 1),
+        "today_wh": wh(today_on, today_level),
+    }
+    if buckets:
+        out["hours"] = [[b * 3600, round(on, 1), wh(on, lv)] for b, on, lv in meter.hours.items()]
+        out["days"] = [[time.strftime("%Y-%m-%d", time.gmtime(b * 86400)), round(on, 1), wh(on, lv)]
+                       for b, on, lv in meter.days.items()]
+    return out
+
+def save_meters(path, meters):
+    """Write {display name: EnergyMeter} atomically."""
+    parts = [_HEADER.pack(_MAGIC, len(meters))]
+    for name, meter in meters.items():
+        meter.flush()
+        raw = name.encode()
+        parts.append(_METER.pack(len(raw), len(meter.hours.ids), len(meter.days.ids),
+                                 meter.on_seconds, meter.level_seconds))
+        parts += [raw, meter.hours.pack(), meter.days.pack()]
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(b"".join(parts))
+    os.replace(tmp, path)
+
+def load_meters(path, clock=time.time):
+    """{display name: EnergyMeter} from `path`; {} if missing. ValueError if corrupt."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return {}
+    try:
+        magic, count = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError("not an energy file")
+        pos, meters = _HEADER.size, {}
+        for _ in range(count):
+            name_len, hours, days, on_s, level_s = _METER.unpack_from(data, pos)
+            pos += _METER.size
+            name = data[pos:pos + name_len].decode()
+            pos += name_len
+            meter = EnergyMeter(clock, hours, days)
+            meter.on_seconds, meter.level_seconds = on_s, level_s
+            for ring, n in ((meter.hours, hours), (meter.days, days)):
+                chunk = data[pos:pos + 24 * n]
+                if len(chunk) != 24 * n:
+                    raise ValueError("truncated energy file")
+                ring.unpack(chunk)
+                pos += 24 * n
+            meters[name] = meter
+    except (struct.error, UnicodeDecodeError) as e:
+        raise ValueError(f"corrupt energy file ({e})") from None
+    return meters
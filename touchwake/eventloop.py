@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+Deadline-driven event loop for the daemon.
+- One readiness set (epoll by default, see mux.py) for input devices, hotplug and signal wakeups
+- Timers kept in a min-heap; the poll timeout is the exact time to the earliest one
+- Blocks indefinitely when no timer is armed (no periodic wakeups)
+- Monotonic clock by default, so wall-clock jumps (NTP at boot) do not matter; any
+  clock can be injected, and run_until() drives a simulated one (replay.py)
+"""
+
+import heapq, itertools, math, time
+
+from touchwake.mux import make_mux
+
+class Timer:
+    """Handle returned by EventLoop.call_at(); cancel() is O(1) (lazy heap removal)."""
+    __slots__ = ("when", "callback", "cancelled")
+
+    def __init__(self, when, callback):
+        self.when = when
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+class EventLoop:
+    def __init__(self, clock=time.monotonic, mux=None):
+        self.time = clock
+        self.mux = mux if mux is not None else make_mux()
+        self._timers = []    # heap of (when, seq, Timer)
+        self._seq = itertools.count()
+        self._stop_requested = False
+        self.iterations = 0
+
+    # --- Readers ----------------------------------------------------------
+    def add_reader(self, fd, callback):
+        """Call callback() whenever fd is readable (or reports an error)."""
+        self.mux.register(fd, callback)
+
+    def remove_reader(self, fd):
+        self.mux.unregister(fd)
+
+    def disarm_reader(self, fd):
+        """Keep fd registered but stop reporting it until arm_reader()."""
+        self.mux.disarm(fd)
+
+    def arm_reader(self, fd):
+        self.mux.arm(fd)
+
+    def set_writable(self, fd, on):
+        """Also call the reader's callback while fd is writable (pending output)."""
+        self.mux.set_writable(fd, on)
+
+    # --- Timers -----------------------------------------------------------
+    def call_at(self, when, callback):
+        timer = Timer(when, callback)
+        heapq.heappush(self._timers, (when, next(self._seq), timer))
+        return timer
+
+    def call_later(self, delay, callback):
+        return self.call_at(self.time() + delay, callback)
+
+    def next_deadline(self):
+        """Earliest pending timer deadline, or None if nothing is armed."""
+        timers = self._timers
+        while timers and timers[0][2].cancelled:
+            heapq.heappop(timers)
+        return timers[0][0] if timers else None
+
+    def _run_due_timers(self):
+        now = self.time()
+        timers = self._timers
+        while timers and (timers[0][2].cancelled or timers[0][0] <= now):
+            timer = heapq.heappop(timers)[2]
+            if not timer.cancelled:
+                timer.cancelled = True
+                timer.callback()
+
+    # --- Loop -------------------------------------------------------------
+    def run_once(self):
+        deadline = self.next_deadline()
+        if deadline is None:
+            timeout = None
+        else:
+            # Round up so we never wake a hair early and spin on the same deadline
+            timeout = max(0, math.ceil((deadline - self.time()) * 1000))
+        self.iterations += 1
+        for callback in self.mux.poll(timeout):
+            if callback is not None:
+                callback()
+        self._run_due_timers()
+
+    def run(self):
+        # A stop() issued before run() (e.g. SIGTERM during startup) is honoured
+        while not self._stop_requested:
+            self.run_once()
+        self._stop_requested = False
+
+    def stop(self):
+        self._stop_requested = True
+
+    def run_until(self, when, set_time):
+        """Simulated clock (replay): fire the timers due up to `when`, each at its own deadline, then set_time(when)."""
+        while (deadline := self.next_deadline()) is not None and deadline <= when:
+            set_time(max(deadline, self.time()))
+            self._run_due_timers()
+        set_time(max(when, self.time()))
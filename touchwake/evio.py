@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+Raw evdev ioctls not covered by python-evdev (kept dependency-free).
+"""
+
+import ctypes, fcntl, struct, time
+
+# _IOW('E', 0xa0, int)
+EVIOCSCLOCKID = 0x400445a0
+# _IOW('E', 0x93, struct input_mask)
+EVIOCSMASK = 0x40104593
+_INPUT_MASK = struct.Struct("IIQ")  # type, codes_size, codes_ptr
+
+EV_SYN, EV_KEY, EV_REL, EV_ABS = 0x00, 0x01, 0x02, 0x03
+# Bit counts per mask; index 0 (EV_SYN slot) is the event *type* mask
+MASK_BITS = {EV_SYN: 0x20, EV_KEY: 0x300, EV_REL: 0x10, EV_ABS: 0x40}
+
+REL_X, REL_Y, REL_WHEEL = 0x00, 0x01, 0x08
+ABS_X, ABS_Y = 0x00, 0x01
+ABS_MT_POSITION_X, ABS_MT_POSITION_Y, ABS_MT_TRACKING_ID = 0x35, 0x36, 0x39
+
+# Everything that counts as activity; drops EV_MSC/EV_SW/..., pressure,
+# touch size and slot bookkeeping (EV_SYN is never masked, empty packets are dropped).
+# Devices with a wake filter get it widened by WakeFilter.codes() (palm rules read touch size/tool type)
+MASK_RELEVANT = {
+    EV_SYN: (EV_KEY, EV_REL, EV_ABS),
+    EV_KEY: None,  # all keys/buttons
+    EV_REL: None,
+    EV_ABS: (ABS_X, ABS_Y, ABS_MT_POSITION_X, ABS_MT_POSITION_Y, ABS_MT_TRACKING_ID),
+}
+# While awake with recent activity: one "something happened" code per device class
+# (key/button presses incl. BTN_TOUCH, new touch contacts, mouse motion)
+MASK_ACTIVITY = {
+    EV_SYN: (EV_KEY, EV_REL, EV_ABS),
+    EV_KEY: None,
+    EV_REL: (REL_X, REL_Y, REL_WHEEL),
+    EV_ABS: (ABS_MT_TRACKING_ID,),
+}
+
+# No filtering (restores the kernel default)
+MASK_ALL = {EV_SYN: None, EV_KEY: None, EV_REL: None, EV_ABS: None}
+
+def widen_mask(mask, extra):
+    """`mask` plus the {type: codes} in `extra` (None = all codes), e.g. what a wake filter reads."""
+    out = dict(mask)
+    for ev_type, codes in extra.items():
+        have = out.get(ev_type, ())
+        out[ev_type] = None if have is None or codes is None else tuple(sorted(set(have) | set(codes)))
+        types = out[EV_SYN]
+        if types is not None and ev_type not in types:
+            out[EV_SYN] = tuple(types) + (ev_type,)
+    return out
+
+def set_clock_monotonic(fd):
+    """Stamp events on fd with CLOCK_MONOTONIC (same base as time.monotonic()). Returns success."""
+    try:
+        fcntl.ioctl(fd, EVIOCSCLOCKID, struct.pack("i", time.CLOCK_MONOTONIC))
+        return True
+    except OSError:
+        return False
+
+def _set_mask(fd, ev_type, codes):
+    nbits = MASK_BITS[ev_type]
+    bitmap = bytearray((nbits + 7) // 8)
+    for code in (range(nbits) if codes is None else codes):
+        bitmap[code // 8] |= 1 << (code % 8)  # little-endian bitmap (arm64/armhf/x86)
+    buf = ctypes.create_string_buffer(bytes(bitmap), len(bitmap))
+    fcntl.ioctl(fd, EVIOCSMASK, _INPUT_MASK.pack(ev_type, len(bitmap), ctypes.addressof(buf)))
+
+def apply_event_mask(fd, mask):
+    """
+    Install a kernel-side event filter (EVIOCSMASK, Linux >= 4.4) so the daemon
+    is only woken for events that matter. Returns False if unsupported.
+    """
+    try:
+        for ev_type, codes in mask.items():
+            if ev_type != EV_SYN:
+                _set_mask(fd, ev_type, codes)
+        _set_mask(fd, EV_SYN, mask[EV_SYN])
+        return True
+    except OSError:
+        return False
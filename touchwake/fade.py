@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Brightness fades driven by EventLoop timers (no sleeping threads).
+- Interpolation happens in perceptual space (linear, gamma 2.2 or log curve)
+- Lookup tables are precomputed once per (max_brightness, curve)
+- Step rate is capped (max_hz) and never exceeds one write per raw level
+- cancel() takes effect before the next step, so a wake interrupts a fade-out at once
+"""
+
+import math
+
+CURVES = ("linear", "gamma", "log")
+PERCEPTUAL_STEPS = 1024
+_GAMMA = 2.2
+_LOG_BASE = 100.0
+
+def _perceptual_to_linear(curve, x):
+    if curve == "gamma":
+        return x ** _GAMMA
+    if curve == "log":
+        return (_LOG_BASE ** x - 1.0) / (_LOG_BASE - 1.0)
+    return x
+
+_TABLES = {}
+
+def curve_tables(max_brightness, curve):
+    """
+    Return (to_perceptual, from_perceptual) lookup lists for a backlight:
+    to_perceptual[raw] -> 0..PERCEPTUAL_STEPS, from_perceptual[p] -> raw level.
+    """
+    key = (max_brightness, curve)
+    tables = _TABLES.get(key)
+    if tables is None:
+        if curve not in CURVES:
+            raise ValueError(f"Unknown fade curve '{curve}' (expected: {', '.join(CURVES)})")
+        from_perc = [round(max_brightness * _perceptual_to_linear(curve, p / PERCEPTUAL_STEPS))
+                     for p in range(PERCEPTUAL_STEPS + 1)]
+        # Inverse by scanning the monotonic table once
+        to_perc = [0] * (max_brightness + 1)
+        p = 0
+        for raw in range(max_brightness + 1):
+            while p < PERCEPTUAL_STEPS and from_perc[p] < raw:
+                p += 1
+            to_perc[raw] = p
+        tables = _TABLES[key] = (to_perc, from_perc)
+    return tables
+
+class Fader:
+    """Fades one Backlight; at most one fade is active at a time."""
+
+    def __init__(self, loop, backlight, curve="gamma", max_hz=60.0):
+        self.loop = loop
+        self.backlight = backlight
+        self.curve = curve
+        self.max_hz = max_hz
+        self.level = None      # last level written by the fader
+        self.target = None     # target of the active fade
+        self._levels = ()
+        self._index = 0
+        self._t0 = 0.0
+        self._interval = 0.0
+        self._timer = None
+        self._on_done = None
+
+    @property
+    def active(self):
+        return self._timer is not None
+
+    def fade_to(self, target, duration_ms, on_done=None, start=None):
+        """Fade from `start` (default: current brightness) to `target` over duration_ms."""
+        self.cancel()
+        bl = self.backlight
+        target = max(0, min(bl.max, int(target)))
+        if start is None:
+            start = bl.read_brightness()
+        if duration_ms <= 0 or start == target:
+            bl.set_brightness(target)
+            self.level = target
+            if on_done:
+                on_done()
+            return
+        to_perc, from_perc = curve_tables(bl.max, self.curve)
+        p0, p1 = to_perc[max(0, min(bl.max, start))], to_perc[target]
+        duration = duration_ms / 1000.0
+        steps = max(1, min(math.ceil(duration * self.max_hz), abs(target - start)))
+        levels = [from_perc[p0 + (p1 - p0) * i // steps] for i in range(1, steps + 1)]
+        levels[-1] = target
+        self._levels = levels
+        self._index = 0
+        self._interval = duration / steps
+        self._t0 = self.loop.time()
+        self.target = target
+        self._on_done = on_done
+        self._step()
+
+    def _step(self):
+        level = self._levels[self._index]
+        self.backlight.set_brightness(level)
+        self.level = level
+        self._index += 1
+        if self._index < len(self._levels):
+            # Absolute schedule so slow writes do not stretch the fade
+            self._timer = self.loop.call_at(self._t0 + self._index * self._interval, self._step)
+            return
+        self._timer = None
+        self.target = None
+        on_done, self._on_done = self._on_done, None
+        if on_done:
+            on_done()
+
+    def cancel(self):
+        """Abort the active fade (its on_done is not called); returns the last written level."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self.target = None
+        self._on_done = None
+        return self.level
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+Event-driven input hotplug tracking.
+- Watches the input directory (default /dev/input) with inotify
+- Registers/unregisters nodes only when add/remove events arrive
+- Negative cache for nodes classified as irrelevant (never reopened until replaced)
+- Glob rescan kept as fallback when inotify is unavailable or its queue overflowed
+"""
+
+import os, glob, time
+
+from touchwake.inotify import (
+    Inotify, IN_ATTRIB, IN_CREATE, IN_DELETE, IN_MOVED_FROM, IN_MOVED_TO,
+    IN_DELETE_SELF, IN_MOVE_SELF, IN_IGNORED, IN_Q_OVERFLOW, IN_ONLYDIR,
+)
+from touchwake.paths import INPUT_DIR
+
+NODE_PREFIX = "event"
+
+_WATCH_MASK = IN_CREATE | IN_DELETE | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+_GONE_MASK = IN_DELETE | IN_MOVED_FROM
+_LOST_WATCH_MASK = IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED | IN_Q_OVERFLOW
+
+def _node_identity(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_rdev, st.st_ino)
+
+class DeviceWatcher:
+    """
+    Tracks event nodes below `input_dir` and forwards changes to callbacks.
+
+    on_add(path) returns True if the device was registered and False if it is
+    irrelevant (negative-cached). OSError means "not ready yet" (e.g. udev has not
+    fixed permissions); the node is retried on its next IN_ATTRIB or rescan.
+    on_remove(path) is called for registered nodes that disappeared.
+    """
+
+    def __init__(self, on_add, on_remove, input_dir=INPUT_DIR, log=None):
+        self.input_dir = input_dir
+        self.on_add = on_add
+        self.on_remove = on_remove
+        self.log = log or (lambda *a: None)
+        self.registered = {}   # path -> node identity
+        self.ignored = {}      # negative cache: path -> node identity
+        self.pending = set()   # nodes that failed to open; retried on IN_ATTRIB/rescan
+        self.rescans = 0
+        self.rescan_seconds = 0.0  # cumulative rescan cost (metrics)
+        self._inotify = None
+        self._wd = None
+
+    # --- Setup ------------------------------------------------------------
+    def start(self):
+        """Install the inotify watch (if possible) and run the initial scan."""
+        try:
+            self._inotify = Inotify()
+            self._wd = self._inotify.add_watch(self.input_dir, _WATCH_MASK)
+        except OSError as e:
+            self.log("WARN inotify unavailable, falling back to rescans:", e)
+            self._close_inotify()
+        self.rescan()
+
+    def fileno(self):
+        """Inotify descriptor for the poll set, or None when only rescans are possible."""
+        return self._inotify.fd if self._inotify else None
+
+    @property
+    def event_driven(self):
+        return self._inotify is not None
+
+    def close(self):
+        self._close_inotify()
+
+    def _close_inotify(self):
+        if self._inotify:
+            self._inotify.close()
+        self._inotify = None
+        self._wd = None
+
+    # --- Node handling ----------------------------------------------------
+    def _is_event_node(self, name):
+        return name.startswith(NODE_PREFIX) and name[len(NODE_PREFIX):].isdigit()
+
+    def _try_add(self, path):
+        ident = _node_identity(path)
+        if ident is None:
+            self.pending.discard(path)
+            return
+        if self.registered.get(path) == ident or self.ignored.get(path) == ident:
+            return
+        # Same node name but a different device behind it: forget stale state first
+        if path in self.registered:
+            self._remove(path)
+        self.ignored.pop(path, None)
+        try:
+            accepted = self.on_add(path)
+        except OSError as e:
+            self.pending.add(path)
+            self.log("defer device:", path, e)
+            return
+        self.pending.discard(path)
+        if accepted:
+            self.registered[path] = ident
+        else:
+            self.ignored[path] = ident
+
+    def _remove(self, path):
+        self.pending.discard(path)
+        self.ignored.pop(path, None)
+        if self.registered.pop(path, None) is not None:
+            self.on_remove(path)
+
+    def rescan(self):
+        """Full glob reconciliation (initial scan, fallback mode, inotify overflow)."""
+        t0 = time.perf_counter()
+        existing = set(glob.glob(os.path.join(self.input_dir, NODE_PREFIX + "*")))
+        for path in [p for p in self.registered if p not in existing]:
+            self._remove(path)
+        for path in [p for p in self.ignored if p not in existing]:
+            del self.ignored[path]
+        self.pending &= existing
+        for path in sorted(existing):
+            if self._is_event_node(os.path.basename(path)):
+                self._try_add(path)
+        self.rescans += 1
+        self.rescan_seconds += time.perf_counter() - t0
+
+    def handle_events(self):
+        """Process pending inotify events; call when fileno() is readable."""
+        if not self._inotify:
+            return
+        rescan = False
+        for wd, mask, name in self._inotify.read_events():
+            if mask & _LOST_WATCH_MASK:
+                if mask & IN_Q_OVERFLOW:
+                    self.log("WARN inotify queue overflow, rescanning")
+                else:
+                    self.log("WARN input directory watch lost, falling back to rescans")
+                    self._close_inotify()
+                rescan = True
+                continue
+            if wd != self._wd or not self._is_event_node(name):
+                continue
+            path = os.path.join(self.input_dir, name)
+            if mask & _GONE_MASK:
+                self._remove(path)
+            elif mask & (IN_CREATE | IN_MOVED_TO):
+                self._try_add(path)
+            elif mask & IN_ATTRIB and path in self.pending:
+                self._try_add(path)
+        if rescan:
+            self.rescan()
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Idle/wake timing on top of EventLoop; the decisions are IdleCore's (core.py).
+Activity only stores a timestamp; the single idle timer is re-armed lazily when
+it fires early, so the hot path never touches the timer heap. Dim stages use the
+same timer, armed for one stage at a time. While asleep, inhibited or forced off
+no timer is armed at all.
+"""
+
+from touchwake.core import DIM, SLEEP, UNDIM, WAKE, IdleCore
+
+class IdleController:
+    def __init__(self, loop, idle_seconds, on_sleep, on_wake, on_dim=None, on_undim=None, stages=()):
+        self.loop = loop
+        self.core = IdleCore(idle_seconds, loop.time(), stages)
+        self.on_sleep = on_sleep
+        self.on_wake = on_wake
+        self.on_dim = on_dim or (lambda stage: None)  # stage: 1-based index of the dim stage reached
+        self.on_undim = on_undim or (lambda: None)
+        self._timer = None
+
+    # Read-only views of the core state
+    asleep = property(lambda self: self.core.asleep)
+    asleep_since = property(lambda self: self.core.asleep_since)
+    last_event_ts = property(lambda self: self.core.last_event_ts)
+    idle_seconds = property(lambda self: self.core.idle_seconds)
+    inhibited = property(lambda self: self.core.inhibited)
+    forced_off = property(lambda self: self.core.forced_off)
+    stage = property(lambda self: self.core.stage)
+
+    def start(self):
+        self._arm()
+
+    def stop(self):
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+
+    def activity(self, ts=None):
+        """Record user activity (monotonic timestamp, default now); wakes if asleep (unless forced off)."""
+        action = self.core.activity(self.loop.time() if ts is None else ts)
+        if action == WAKE:
+            self.on_wake()
+            self._arm()
+        elif action == UNDIM:
+            self.on_undim()
+            self._rearm()  # the timer waits for a later stage; the first one is due sooner now
+
+    def set_idle_seconds(self, idle_seconds):
+        """Change the timeout; the running deadline moves with it."""
+        self.core.idle_seconds = idle_seconds
+        self._rearm()
+
+    def set_stages(self, stages):
+        """Change the dim stage offsets; a dimmed display is restored first."""
+        stages = tuple(stages)
+        if stages == self.core.stages:
+            return
+        if self.core.stage:
+            self.core.stage = 0
+            self.on_undim()
+        self.core.stages = stages
+        self._rearm()
+
+    def set_inhibited(self, on):
+        """Suspend the idle deadline (waking if asleep); releasing restarts the countdown from now."""
+        self._act(self.core.set_inhibited(on, self.loop.time()))
+        self._rearm()
+
+    def set_forced_off(self, on):
+        """Keep the display asleep whatever the input (schedule); releasing leaves it asleep unless inhibited."""
+        self._act(self.core.set_forced_off(on, self.loop.time()))
+        self._rearm()
+
+    def sleep_now(self):
+        """Go to sleep immediately (the next activity wakes as usual)."""
+        self.stop()
+        self._act(self.core.sleep_now(self.loop.time()))
+
+    def _act(self, action):
+        if action == SLEEP:
+            self.on_sleep()
+        elif action == WAKE:
+            self.on_wake()
+        elif action == UNDIM:
+            self.on_undim()
+
+    def _rearm(self):
+        self.stop()
+        self._arm()
+
+    def _arm(self):
+        deadline = self.core.deadline()
+        if deadline is not None:
+            self._timer = self.loop.call_at(deadline, self._on_deadline)
+
+    def _on_deadline(self):
+        self._timer = None
+        action = self.core.tick(self.loop.time())
+        if action == SLEEP:
+            self.on_sleep()
+            return
+        if action == DIM:
+            self.on_dim(self.core.stage)
+        self._arm()  # next stage, or activity moved the deadline since the timer was armed
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+Idle inhibitors: while one is held, the idle deadline of the displays it covers
+is suspended (taking one wakes them; releasing the last one restarts the idle
+countdown). Holders are tracked by events only, nothing is checked per loop
+iteration:
+- Control socket: {"cmd": "inhibit", "who": ..., "why": ..., "display": ...} is
+  held until "uninhibit" or until the connection closes (control.inhibit())
+- Lock files in inhibit_dir (/run/touch-wake-display/inhibit), watched with
+  inotify: a file is held while it exists. If its content starts with a PID the
+  inhibitor also ends when that process exits (pidfd readable, no polling).
+  The file name is the holder; "NAME@DISPLAY" covers one display only (a lock
+  naming an unknown display is ignored with a warning, as the socket rejects it).
+  The daemon creates the directory as the service user (User= in the unit),
+  mode 0755: only that user and root may add locks. With control_group set it
+  is 1770 and chgrp'ed to that group (the unit's SupplementaryGroups include it),
+  whose members may add and remove their own files.
+  Example: echo "$$ video playback" > /run/touch-wake-display/inhibit/player
+"""
+
+import os, time
+
+from touchwake.inotify import IN_CLOSE_WRITE, IN_DELETE, IN_MOVED_FROM, IN_MOVED_TO, IN_Q_OVERFLOW, Inotify
+
+_MAX_CONTENT = 256
+
+class Inhibitor:
+    __slots__ = ("who", "why", "source", "display", "since", "pid")
+
+    def __init__(self, who, why="", source="socket", display=None, pid=None):
+        self.who = who
+        self.why = why
+        self.source = source    # "socket" or "file"
+        self.display = display  # display name, None = all
+        self.since = time.time()
+        self.pid = pid
+
+    def covers(self, display_name):
+        return self.display is None or self.display == display_name
+
+    def as_dict(self):
+        return {"who": self.who, "why": self.why, "source": self.source, "display": self.display,
+                "since": round(self.since, 3), "pid": self.pid}
+
+def parse_lock(name, text):
+    """Inhibitor for lock file `name` with content `text` ('[PID] [why]')."""
+    who, _, display = name.partition("@")
+    word, _, rest = text.strip().partition(" ")
+    pid = int(word) if word.isdigit() else None
+    why = rest.strip() if pid is not None else text.strip()
+    return Inhibitor(who, why, "file", display or None, pid)
+
+class InhibitDir:
+    """
+    Lock files in `path`; held maps file name -> Inhibitor, on_change() runs after every change.
+    displays() returns the known display names (None: accept any); warn(msg) reports rejected locks.
+    """
+
+    def __init__(self, loop, path, on_change, group="", log=None, displays=None, warn=None):
+        self.loop = loop
+        self.path = path
+        self.on_change = on_change
+        self.log = log or (lambda *a: None)
+        self.displays = displays
+        self.warn = warn or self.log
+        self.held = {}
+        self._pidfds = {}  # file name -> pidfd (readable once the holder exits)
+        os.makedirs(path, exist_ok=True)
+        # Sticky like /tmp: control_group members may add and remove their own files; without a group the
+        # service user only
+        os.chmod(path, 0o1770 if group else 0o755)
+        if group:
+            from touchwake.control import set_group
+            set_group(path, group)
+        self._inotify = Inotify()
+        try:
+            self._inotify.add_watch(path, IN_CLOSE_WRITE | IN_MOVED_TO | IN_DELETE | IN_MOVED_FROM)
+        except OSError:
+            self._inotify.close()
+            raise
+        loop.add_reader(self._inotify.fd, self._on_events)
+        for name in sorted(os.listdir(path)):
+            self._load(name)
+
+    def close(self):
+        for name in list(self._pidfds):
+            self._forget(name)
+        self.held.clear()
+        self.loop.remove_reader(self._inotify.fd)
+        self._inotify.close()
+
+    def rescan(self):
+        """Re-read every lock file (e.g. after the displays changed); True if the held set changed."""
+        changed = False
+        for name in set(self.held) | set(os.listdir(self.path)):
+            changed = self._load(name) or changed
+        return changed
+
+    def _on_events(self):
+        names = set()
+        for _wd, mask, name in self._inotify.read_events():
+            if mask & IN_Q_OVERFLOW:
+                names.update(self.held)
+                names.update(os.listdir(self.path))
+            elif name:
+                names.add(name)
+        changed = False
+        for name in names:
+            changed = self._load(name) or changed
+        if changed:
+            self.on_change()
+
+    def _load(self, name):
+        """(Re)read one lock file; True if the held set changed."""
+        before = self.held.get(name)
+        self._forget(name)
+        if name.startswith("."):
+            return before is not None  # editor/atomic-write temp files
+        try:
+            with open(os.path.join(self.path, name)) as f:
+                inhibitor = parse_lock(name, f.read(_MAX_CONTENT))
+        except (OSError, UnicodeDecodeError):
+            return before is not None  # removed
+        known = self.displays() if self.displays else None
+        if inhibitor.display is not None and known is not None and inhibitor.display not in known:
+            self.warn(f"WARN inhibitor '{name}' ignored: unknown display '{inhibitor.display}' "
+                      f"(displays: {', '.join(known)}).")
+            return before is not None
+        if inhibitor.pid is not None:
+            try:
+                pidfd = os.pidfd_open(inhibitor.pid)
+            except ProcessLookupError:
+                return before is not None  # stale file of a process that is gone
+            except (OSError, AttributeError) as e:
+                self.log("WARN inhibitor", name, "held without process tracking:", e)
+            else:
+                self._pidfds[name] = pidfd
+                self.loop.add_reader(pidfd, lambda: self._exited(name))
+        if before is not None:
+            inhibitor.since = before.since
+        self.held[name] = inhibitor
+        return before is None or before.as_dict() != inhibitor.as_dict()
+
+    def _exited(self, name):
+        self._forget(name)
+        self.log("inhibitor holder exited:", name)
+        self.on_change()
+
+    def _forget(self, name):
+        self.held.pop(name, None)
+        pidfd = self._pidfds.pop(name, None)
+        if pidfd is not None:
+            self.loop.remove_reader(pidfd)
+            os.close(pidfd)
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+Minimal inotify binding via ctypes (no third-party dependency).
+The descriptor is non-blocking and meant to be registered in a poll set.
+"""
+
+import ctypes, os, struct
+
+IN_ATTRIB      = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM  = 0x00000040
+IN_MOVED_TO    = 0x00000080
+IN_CREATE      = 0x00000100
+IN_DELETE      = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF   = 0x00000800
+IN_Q_OVERFLOW  = 0x00004000
+IN_IGNORED     = 0x00008000
+IN_ONLYDIR     = 0x01000000
+
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC  = os.O_CLOEXEC
+_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len (name follows)
+_READ_SIZE = 16 * 1024
+
+_libc = None
+
+def _get_libc():
+    global _libc
+    if _libc is None:
+        # The running interpreter already links libc; avoids find_library()'s ldconfig spawn
+        _libc = ctypes.CDLL(None, use_errno=True)
+    return _libc
+
+class Inotify:
+    """Non-blocking inotify instance; raises OSError if the kernel/libc lacks support."""
+
+    def __init__(self):
+        try:
+            libc = _get_libc()
+            self._add = libc.inotify_add_watch
+            self._rm = libc.inotify_rm_watch
+            fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        except (OSError, AttributeError) as e:
+            raise OSError(f"inotify unavailable: {e}") from e
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_init1 failed: {os.strerror(err)}")
+        self._add.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self._rm.argtypes = (ctypes.c_int, ctypes.c_int)
+        self.fd = fd
+
+    def fileno(self):
+        return self.fd
+
+    def add_watch(self, path, mask):
+        wd = self._add(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_add_watch {path}: {os.strerror(err)}")
+        return wd
+
+    def rm_watch(self, wd):
+        self._rm(self.fd, wd)
+
+    def read_events(self):
+        """Drain the descriptor; returns a list of (wd, mask, name) tuples."""
+        events = []
+        while True:
+            try:
+                buf = os.read(self.fd, _READ_SIZE)
+            except BlockingIOError:
+                break
+            if not buf:
+                break
+            off = 0
+            end = len(buf)
+            while off + _EVENT.size <= end:
+                wd, mask, _cookie, nlen = _EVENT.unpack_from(buf, off)
+                off += _EVENT.size
+                name = buf[off:off + nlen].rstrip(b"\0").decode(errors="surrogateescape")
+                off += nlen
+                events.append((wd, mask, name))
+        return events
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
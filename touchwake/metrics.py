@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+Daemon metrics in Prometheus text format.
+- Counters live in fixed-size __slots__ objects / arrays; the hot path only increments
+- Per-component counters (reads, writes, rescans, loop iterations) stay on the
+  components themselves and are collected when the file is rendered
+- The textfile is written atomically (temp file + rename) so readers never see a partial file
+"""
+
+import os
+from array import array
+from bisect import bisect_left
+
+# Seconds; kernel event timestamp -> first brightness write
+WAKE_LATENCY_BUCKETS = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds):
+        self.bounds = tuple(bounds)
+        self.counts = array("Q", bytes(8 * (len(self.bounds) + 1)))  # last slot = +Inf
+        self.sum = array("d", [0.0])
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum[0] += value
+
+class Metrics:
+    """Sleep/wake bookkeeping updated by the daemon; everything else is read at render time."""
+    __slots__ = ("started", "sleeps", "wakes", "dims", "undims", "asleep_seconds", "asleep_since",
+                 "wake_latency", "_last_render", "_last_iterations")
+
+    def __init__(self, now):
+        self.started = now
+        self.sleeps = 0
+        self.wakes = 0
+        self.dims = 0      # dim stages entered
+        self.undims = 0    # dimmed displays brought back by activity before the sleep
+        self.asleep_seconds = 0.0
+        self.asleep_since = None
+        self.wake_latency = Histogram(WAKE_LATENCY_BUCKETS)
+        self._last_render = now
+        self._last_iterations = 0
+
+    def on_sleep(self, now):
+        self.sleeps += 1
+        self.asleep_since = now
+
+    def on_wake(self, now):
+        self.wakes += 1
+        if self.asleep_since is not None:
+            self.asleep_seconds += now - self.asleep_since
+            self.asleep_since = None
+
+    def total_asleep(self, now):
+        if self.asleep_since is None:
+            return self.asleep_seconds
+        return self.asleep_seconds + now - self.asleep_since
+
+    def iteration_rate(self, now, iterations):
+        """Loop iterations per second since the previous call."""
+        elapsed = now - self._last_render
+        rate = (iterations - self._last_iterations) / elapsed if elapsed > 0 else 0.0
+        self._last_render = now
+        self._last_iterations = iterations
+        return rate
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+class TextFormat:
+    """Builds one exposition; each metric family is declared once (HELP/TYPE) before its samples."""
+
+    def __init__(self, prefix="touchwake_"):
+        self.prefix = prefix
+        self.lines = []
+        self._declared = set()
+
+    def _declare(self, name, kind, help_text):
+        if name not in self._declared:
+            self._declared.add(name)
+            self.lines.append(f"# HELP {name} {help_text}")
+            self.lines.append(f"# TYPE {name} {kind}")
+
+    def sample(self, name, kind, help_text, value, labels=None):
+        name = self.prefix + name
+        self._declare(name, kind, help_text)
+        self.lines.append(f"{name}{_labels(labels)} {value}")
+
+    def histogram(self, name, help_text, hist, labels=None):
+        name = self.prefix + name
+        self._declare(name, "histogram", help_text)
+        labels = labels or {}
+        cumulative = 0
+        for bound, count in zip(hist.bounds, hist.counts):
+            cumulative += count
+            self.lines.append(f"{name}_bucket{_labels(dict(labels, le=f'{bound:g}'))} {cumulative}")
+        cumulative += hist.counts[-1]
+        self.lines.append(f"{name}_bucket{_labels(dict(labels, le='+Inf'))} {cumulative}")
+        self.lines.append(f"{name}_sum{_labels(labels)} {hist.sum[0]}")
+        self.lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+
+    def text(self):
+        return "\n".join(self.lines) + "\n"
+
+def write_textfile(path, text):
+    """Atomically replace `path` (node_exporter textfile collector compatible)."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        f.write(text)
+    os.replace(tmp, path)
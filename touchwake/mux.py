@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+Readiness multiplexers used by EventLoop.
+- PollMux: select.poll(), O(registered fds) per wait
+- EpollMux: select.epoll(), O(ready fds) per wait; scales to hundreds of devices
+Both keep the registration payload in a list indexed by fd, so dispatching an
+event needs no dict lookup. Readers can be disarmed (kept registered but not
+reported) and re-armed later, which lets the daemon ignore noisy devices while
+it already knows the user is active. set_writable() adds write readiness to an
+fd's events (the same callback is called; it tries its pending writes first).
+"""
+
+import select
+
+class _PayloadTable:
+    """fd-indexed payload slots (fds are small dense integers)."""
+    __slots__ = ("slots",)
+
+    def __init__(self):
+        self.slots = []
+
+    def put(self, fd, payload):
+        slots = self.slots
+        if fd >= len(slots):
+            slots.extend([None] * (fd + 1 - len(slots)))
+        slots[fd] = payload
+
+    def pop(self, fd):
+        slots = self.slots
+        if fd < len(slots):
+            payload, slots[fd] = slots[fd], None
+            return payload
+        return None
+
+    def get(self, fd):
+        slots = self.slots
+        return slots[fd] if fd < len(slots) else None
+
+class PollMux:
+    name = "poll"
+
+    def __init__(self):
+        self._poll = select.poll()
+        self._table = _PayloadTable()
+
+    def register(self, fd, payload):
+        if self._table.get(fd) is not None:
+            self._poll.modify(fd, select.POLLIN)
+        else:
+            self._poll.register(fd, select.POLLIN)
+        self._table.put(fd, payload)
+
+    def unregister(self, fd):
+        if self._table.pop(fd) is not None:
+            try:
+                self._poll.unregister(fd)
+            except KeyError:
+                pass  # disarmed
+
+    def disarm(self, fd):
+        # poll() always reports POLLERR/POLLHUP, so drop the fd from the set entirely
+        try:
+            self._poll.unregister(fd)
+        except KeyError:
+            pass
+
+    def arm(self, fd):
+        if self._table.get(fd) is not None:
+            self._poll.register(fd, select.POLLIN)
+
+    def set_writable(self, fd, on):
+        if self._table.get(fd) is not None:
+            self._poll.modify(fd, select.POLLIN | select.POLLOUT if on else select.POLLIN)
+
+    def poll(self, timeout_ms):
+        get = self._table.get
+        return [get(fd) for fd, _flags in self._poll.poll(timeout_ms)]
+
+    def close(self):
+        pass
+
+class EpollMux:
+    name = "epoll"
+
+    def __init__(self, max_events=64):
+        self._epoll = select.epoll()
+        self._table = _PayloadTable()
+        self._max_events = max_events
+
+    def register(self, fd, payload):
+        if self._table.get(fd) is not None:
+            self._epoll.modify(fd, select.EPOLLIN)
+        else:
+            self._epoll.register(fd, select.EPOLLIN)
+        self._table.put(fd, payload)
+
+    def unregister(self, fd):
+        if self._table.pop(fd) is not None:
+            try:
+                self._epoll.unregister(fd)
+            except OSError:
+                pass  # already closed
+
+    def disarm(self, fd):
+        # ONESHOT without EPOLLIN: at most one ERR/HUP report (e.g. unplug), then silent
+        try:
+            self._epoll.modify(fd, select.EPOLLONESHOT)
+        except OSError:
+            pass
+
+    def arm(self, fd):
+        if self._table.get(fd) is not None:
+            self._epoll.modify(fd, select.EPOLLIN)
+
+    def set_writable(self, fd, on):
+        if self._table.get(fd) is not None:
+            self._epoll.modify(fd, select.EPOLLIN | select.EPOLLOUT if on else select.EPOLLIN)
+
+    def poll(self, timeout_ms):
+        timeout = -1 if timeout_ms is None else timeout_ms / 1000.0
+        slots = self._table.slots
+        return [slots[fd] for fd, _flags in self._epoll.poll(timeout, self._max_events)]
+
+    def close(self):
+        self._epoll.close()
+
+BACKENDS = {"poll": PollMux, "epoll": EpollMux}
+
+def make_mux(name="epoll"):
+    """Create a multiplexer by name; falls back to poll where epoll is missing."""
+    if name == "epoll" and not hasattr(select, "epoll"):
+        name = "poll"
+    try:
+        return BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown input backend '{name}' (expected: {', '.join(BACKENDS)})") from None
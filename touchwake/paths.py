@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+"""
+Default filesystem locations, kept in a dependency-free module so importing
+the config does not pull in socket/json/hashlib users just for their defaults.
+"""
+
+CONF_PATH = "/etc/touch-wake-display.conf"
+INPUT_DIR = "/dev/input"
+SYSFS_INPUT = "/sys/class/input"
+RUN_DIR = "/run/touch-wake-display"             # systemd RuntimeDirectory
+CACHE_DIR = "/var/cache/touch-wake-display"     # systemd CacheDirectory
+STATE_DIR = "/var/lib/touch-wake-display"       # systemd StateDirectory
+METRICS_FILE = RUN_DIR + "/metrics.prom"
+CONTROL_SOCKET = RUN_DIR + "/control.sock"
+CACHE_PATH = CACHE_DIR + "/devices.json"
+IIO_DIR = "/sys/bus/iio/devices"
+ENERGY_FILE = STATE_DIR + "/energy.bin"
+TRACE_FILE = RUN_DIR + "/wake-trace.json"
+INHIBIT_DIR = RUN_DIR + "/inhibit"
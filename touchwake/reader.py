@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Allocation-light evdev reader.
+Reads raw `struct input_event` records with os.readv() into a reusable buffer
+and checks the type/value columns of a whole batch at C speed through strided
+memoryviews, instead of building one python-evdev InputEvent per event. Only
+one relevant event is needed to reset the idle timer; the rest of the queue is
+drained without being parsed. `reads` / `records` count readv() calls and
+records drained (metrics). read_filtered() hands every record of the batch to
+a WakeFilter instead (column lists per batch, see wakefilter.py).
+
+Relevant: EV_KEY press/repeat, any EV_REL (mouse), any EV_ABS (touch).
+"""
+
+import os, struct
+
+EV_KEY = 0x01
+EV_REL = 0x02
+EV_ABS = 0x03
+
+# Native layout: struct timeval (2 x long) + __u16 type + __u16 code + __s32 value
+EVENT = struct.Struct("llHHi")
+_TIME = struct.Struct("ll")
+_TYPE_OFFSET = struct.calcsize("ll")
+
+class EventReader:
+    __slots__ = ("fd", "reads", "records", "_buf", "_bufs", "_types", "_codes", "_values", "_secs", "_usecs", "_size")
+
+    def __init__(self, fd, batch=64):
+        size = EVENT.size
+        self.fd = fd
+        self.reads = 0
+        self.records = 0
+        self._buf = bytearray(size * batch)
+        self._bufs = [self._buf]
+        self._size = size
+        view = memoryview(self._buf)
+        # Column views over the buffer (one element per record)
+        self._types = view.cast("H")[_TYPE_OFFSET // 2::size // 2]
+        self._codes = view.cast("H")[_TYPE_OFFSET // 2 + 1::size // 2]
+        self._values = view.cast("i")[(_TYPE_OFFSET + 4) // 4::size // 4]
+        longs = view.cast("l")
+        self._secs = longs[0::size // longs.itemsize]
+        self._usecs = longs[1::size // longs.itemsize]
+
+    def _batch_relevant(self, count):
+        types = self._types[:count].tolist()
+        if EV_ABS in types or EV_REL in types:
+            return True
+        if EV_KEY in types:
+            values = self._values[:count].tolist()
+            for i, t in enumerate(types):
+                if t == EV_KEY and values[i] in (1, 2):
+                    return True
+        return False
+
+    def read_activity(self):
+        """
+        Drain the descriptor. Returns the timestamp (seconds) of the newest record
+        if the queue held a relevant event, else None. Raises OSError on device
+        errors (e.g. ENODEV after unplug); EAGAIN just ends the drain.
+        """
+        buf_len = len(self._buf)
+        size = self._size
+        relevant = False
+        newest = None
+        while True:
+            try:
+                n = os.readv(self.fd, self._bufs)
+            except BlockingIOError:
+                break
+            count = n // size
+            self.reads += 1
+            self.records += count
+            if count:
+                if not relevant:
+                    relevant = self._batch_relevant(count)
+                sec, usec = _TIME.unpack_from(self._buf, (count - 1) * size)
+                newest = sec + usec * 1e-6
+            if n < buf_len:
+                break  # queue empty; skip the extra EAGAIN round trip
+        return newest if relevant else None
+
+    def read_filtered(self, wake_filter):
+        """Drain the descriptor through wake_filter (results in its wake_ts / awake_ts); OSError as read_activity()."""
+        buf_len = len(self._buf)
+        size = self._size
+        while True:
+            try:
+                n = os.readv(self.fd, self._bufs)
+            except BlockingIOError:
+                break
+            count = n // size
+            self.reads += 1
+            self.records += count
+            if count:
+                wake_filter.feed(count, self._secs[:count].tolist(), self._usecs[:count].tolist(),
+                                 self._types[:count].tolist(), self._codes[:count].tolist(),
+                                 self._values[:count].tolist())
+            if n < buf_len:
+                break
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+Activity recorder (record_file): the filtered input stream the idle logic saw,
+for replaying field problems later (see replay.py, touch-wake-display.py --replay).
+- Fixed-size 48-byte records, appended with one write() each; no buffering, so
+  a crash loses nothing that was decided on
+- A record per relevant batch read from a device (wall-clock timestamp of its
+  newest event, number of events drained), plus device add/remove records
+  carrying the name and phys
+- Size-rotated: at record_max_bytes the file moves to <file>.1 (replacing the
+  previous one) and a new file starts with the registered devices again, so
+  every file replays on its own
+With quiesce_active_devices, events are not read while a display is known to be
+awake; the log then holds what the daemon decided on, not every touch.
+"""
+
+import os, struct, time
+
+RECORD = struct.Struct("<dHBxH34s")  # time, device index, kind, events, payload
+MAGIC = b"TWR1"
+
+START = 0     # payload: MAGIC + b"S" (daemon started) or b"R" (continued after rotation)
+DEVICE = 1    # payload: device name (utf-8, truncated)
+PHYS = 2      # payload: device phys
+GONE = 3      # device removed
+ACTIVITY = 4  # count = events in the batch (capped)
+
+_MAX_COUNT = 0xFFFF
+
+class Recorder:
+    def __init__(self, path, max_bytes=4 * 1024 * 1024, clock=time.time, log=None):
+        self.path = path
+        self.max_bytes = max(max_bytes, 64 * RECORD.size)
+        self.clock = clock
+        self.log = log or (lambda *a: None)
+        self.records = 0
+        self._index = {}    # device path -> index (unique per session)
+        self._devices = {}  # index -> (name, phys) of registered devices, re-emitted after rotation
+        self._next = 0
+        self._fd = -1
+        self._size = 0
+        self._open(b"S")
+
+    def _open(self, start):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND | os.O_CLOEXEC, 0o640)
+        self._size = os.fstat(self._fd).st_size
+        self._write(self.clock(), 0, START, 0, MAGIC + start)
+        for index, (name, phys) in self._devices.items():
+            self._write_device(index, name, phys)
+
+    def _write(self, t, index, kind, count, payload=b""):
+        try:
+            os.write(self._fd, RECORD.pack(t, index, kind, min(count, _MAX_COUNT), payload))
+        except OSError as e:
+            self.log("WARN record:", self.path, e)
+            return
+        self._size += RECORD.size
+        self.records += 1
+
+    def _write_device(self, index, name, phys):
+        t = self.clock()
+        self._write(t, index, DEVICE, 0, name.encode())
+        if phys:
+            self._write(t, index, PHYS, 0, phys.encode())
+
+    def _rotate_if_full(self):
+        if self._size + 2 * RECORD.size <= self.max_bytes:
+            return
+        os.close(self._fd)
+        try:
+            os.replace(self.path, self.path + ".1")
+        except OSError as e:
+            self.log("WARN record rotate:", self.path, e)
+        self._open(b"R")
+
+    def device(self, path, dev):
+        self._rotate_if_full()
+        index = self._next
+        self._next += 1
+        self._index[path] = index
+        self._devices[index] = (getattr(dev, "name", "") or "", getattr(dev, "phys", "") or "")
+        self._write_device(index, *self._devices[index])
+
+    def gone(self, path):
+        index = self._index.pop(path, None)
+        if index is not None:
+            self._rotate_if_full()
+            del self._devices[index]
+            self._write(self.clock(), index, GONE, 0)
+
+    def activity(self, path, t, count):
+        """Relevant input at wall-clock time t on the device registered for `path`."""
+        index = self._index.get(path)
+        if index is not None:
+            self._rotate_if_full()
+            self._write(t, index, ACTIVITY, count)
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+def read_records(path):
+    """Yield (time, device index, kind, count, payload) from one log; ValueError if it is not one."""
+    with open(path, "rb") as f:
+        data = f.read()
+    first = RECORD.unpack_from(data) if len(data) >= RECORD.size else None
+    if not first or first[2] != START or not first[4].startswith(MAGIC):
+        raise ValueError(f"{path} is not an activity log")
+    for t, index, kind, count, payload in RECORD.iter_unpack(data[:len(data) - len(data) % RECORD.size]):
+        yield t, index, kind, count, payload.rstrip(b"\0")
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+Deterministic replay of activity logs (record.py) through the idle/wake logic.
+- ReplayDaemon is the Daemon with in-memory backlights and no devices, sockets
+  or files; log records are fed to Daemon.on_activity()
+- The loop clock is simulated: it jumps from one timer deadline or record to the
+  next (EventLoop.run_until), so a week of activity replays in seconds
+- Displays, device mapping and timeouts come from the given config; "what if"
+  questions are answered by replaying against an edited copy
+- Every decision is printed: SLEEP / WAKE per display, with the waking device,
+  DIM / UNDIM for idle dim stages, and PROFILE when a schedule profile starts (log timestamps are wall time, so the
+  schedule runs on the simulated clock too)
+"""
+
+import time
+
+from touchwake.daemon import Daemon
+from touchwake.record import ACTIVITY, DEVICE, GONE, PHYS, START, read_records
+
+# Everything that touches the outside world is switched off for a replay
+_REPLAY_OVERRIDES = {
+    "control_socket": "", "metrics_file": "", "energy_file": "", "record_file": "", "inhibit_dir": "",
+    "trace_wakes": "false", "adaptive_brightness": "false", "quiesce_active_devices": "false", "reduce_event_mask_when_active": "false",
+}
+
+class SimClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def set(self, now):
+        self.now = now
+
+class SimBacklight:
+    """In-memory stand-in for Backlight (same attributes the displays use)."""
+
+    def __init__(self, base, max_brightness=255):
+        self.base = base or "(auto)"
+        self.max = max_brightness
+        self.brightness = max_brightness
+        self.power = True
+        self.writes = 0
+        self.writes_skipped = 0
+        self.on_level = None
+        self.brightness_written_at = 0.0
+        self.power_written_at = 0.0
+
+    def read_brightness(self, default=None):
+        return self.brightness
+
+    def set_brightness(self, val):
+        val = max(0, min(self.max, int(val)))
+        if val == self.brightness:
+            self.writes_skipped += 1
+            return False
+        self.brightness = val
+        self.writes += 1
+        return True
+
+    def set_power(self, on):
+        if on == self.power:
+            return False
+        self.power = on
+        self.writes += 1
+        return True
+
+    def remember(self, val):
+        pass
+
+    def close(self):
+        pass
+
+class SimDevice:
+    def __init__(self, fd, name):
+        self.fd = fd  # key only; never polled
+        self.path = f"replay:{fd}"
+        self.name = name
+        self.phys = ""
+
+def _stamp(t):
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(t)) + f".{int(t % 1 * 1000):03d}"
+
+def _duration(seconds):
+    if seconds < 120:
+        return f"{seconds:.0f} s"
+    minutes = seconds / 60.0
+    return f"{minutes:.0f} min" if minutes < 120 else f"{minutes // 60:.0f} h {minutes % 60:02.0f} min"
+
+class ReplayDaemon(Daemon):
+    def __init__(self, config, out=print):
+        self.clock = SimClock()
+        super().__init__(config.updated(_REPLAY_OVERRIDES), clock=self.clock, log=lambda *a: None)
+        self.out = out
+        self.decisions = 0
+        self._waker = None
+        self._next_fd = 1 << 20
+        self._session = {}  # device index in the log -> SimDevice
+
+    def _open_backlight(self, bl_base):
+        return SimBacklight(bl_base)
+
+    def _display_changed(self, display):
+        self.decisions += 1
+        idle, now = display.idle, self.loop.time()
+        by = f"'{self._waker.name}'" if self._waker else "the schedule"
+        if display.change == "dim":
+            self.out(f"{_stamp(now)} DIM   [{display.name}] stage {idle.stage} ({display.stages[idle.stage - 1][1]}%) "
+                     f"idle since {_stamp(idle.last_event_ts)[11:19]}")
+        elif display.change == "undim":
+            self.out(f"{_stamp(now)} UNDIM [{display.name}] by {by} to {display.backlight.read_brightness()}")
+        elif idle.asleep:
+            self.out(f"{_stamp(now)} SLEEP [{display.name}] idle since {_stamp(idle.last_event_ts)[11:19]}")
+        else:
+            self.out(f"{_stamp(now)} WAKE  [{display.name}] by {by} after {_duration(now - idle.asleep_since)} asleep")
+
+    def _display_settled(self, display):
+        pass
+
+    def wall_time(self):
+        return self.clock.now
+
+    def _arm_schedule(self, when):
+        if self._schedule_call:
+            self._schedule_call.cancel()
+            self._schedule_call = None
+        if when is not None:
+            self._schedule_call = self.loop.call_at(when, self._on_schedule_call)
+
+    def _profile_changed(self, name, until, following):
+        self.out(f"{_stamp(self.clock.now)} PROFILE {name or '(none)'}")
+
+    def restart(self, t):
+        """A daemon (re)start in the log: fresh displays lit at t, no devices."""
+        for display in self.displays:
+            display.close()
+        for fd in list(self.device_displays):
+            self.device_displays.pop(fd)
+            self.monotonic_fds.discard(fd)
+        self._session.clear()
+        self.clock.set(max(t, self.clock.now))
+        self.displays = [self._make_display(dc) for dc in self.config.display_configs()]
+        for display in self.displays:
+            display.start()
+        self.out(f"{_stamp(self.clock.now)} START displays={','.join(d.name for d in self.displays)}")
+        self.start_schedule()
+
+    def feed(self, record):
+        t, index, kind, count, payload = record
+        self.loop.run_until(t, self.clock.set)
+        if kind == START:
+            if payload.endswith(b"S") or not self.displays:
+                self.restart(t)
+            return
+        dev = self._session.get(index)
+        if kind == DEVICE:
+            dev = SimDevice(self._next_fd, payload.decode(errors="replace"))
+            self._next_fd += 1
+            self._session[index] = dev
+        elif dev is None:
+            return  # device registered in a file that is not replayed
+        if kind in (DEVICE, PHYS):
+            if kind == PHYS:
+                dev.phys = payload.decode(errors="replace")
+            self.monotonic_fds.add(dev.fd)
+            self.device_displays[dev.fd] = self.displays_for(dev)
+        elif kind == GONE:
+            del self._session[index]
+            self.device_displays.pop(dev.fd, None)
+            self.monotonic_fds.discard(dev.fd)
+        elif kind == ACTIVITY:
+            self._waker = dev
+            self.on_activity(dev, t)
+            self._waker = None
+
+    def finish(self, t):
+        """Run the pending timers up to t (e.g. the sleep after the last activity)."""
+        self.loop.run_until(t, self.clock.set)
+        for display in self.displays:
+            display.close()
+        self.loop.mux.close()
+
+def replay(config, paths, out=print):
+    """Replay the logs in order (oldest first, e.g. activity.log.1 activity.log); returns a summary dict."""
+    daemon = ReplayDaemon(config, out)
+    t0 = time.perf_counter()
+    records = 0
+    first = last = None
+    for path in paths:
+        for record in read_records(path):
+            if first is None:
+                first = record[0]
+                daemon.clock.set(first)
+            last = record[0]
+            records += 1
+            daemon.feed(record)
+    if last is not None:
+        daemon.finish(last + max(dc.idle_seconds for dc in daemon.config.display_configs()) + 1.0)
+    return {"records": records, "decisions": daemon.decisions, "simulated_seconds": (last - first) if records else 0.0,
+            "replay_seconds": time.perf_counter() - t0}
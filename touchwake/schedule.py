@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Time-of-day schedule profiles ([profile:NAME] sections).
+- times = comma-separated windows "[DAYS] HH:MM-HH:MM" or just "DAYS" (whole
+  days); DAYS is a day or range (mon-fri, sat, sun-mon), none = daily. A window
+  ending at or before its start runs past midnight (22:00-07:00)
+- The first profile in file order whose window contains the local time is active;
+  none = the plain [touchwake] / [display:NAME] settings
+- next_change() computes the next instant the active profile changes, from local
+  calendar dates via mktime(), so DST shifts land on the right wall-clock time.
+  The daemon arms one timer for it (timerfd.py: woken early if the clock is set)
+"""
+
+import time
+
+DAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+MODES = ("auto", "on", "off")  # idle timer as usual / always on / always off
+_LOOKAHEAD_DAYS = 8            # every weekly window recurs within this span
+
+def _minutes(text):
+    hours, _, minutes = text.partition(":")
+    if not (hours.isdigit() and minutes.isdigit() and len(minutes) == 2):
+        raise ValueError
+    value = int(hours) * 60 + int(minutes)
+    if int(minutes) > 59 or value > 24 * 60:
+        raise ValueError
+    return value
+
+def _days(text):
+    first, _, last = text.partition("-")
+    start = DAYS.index(first)
+    end = DAYS.index(last) if last else start
+    return frozenset(DAYS[(start + i) % 7] for i in range((end - start) % 7 + 1))
+
+def parse_times(text, key="times"):
+    """'mon-fri 08:00-18:00, sun' -> [(days, start minute, end minute)]; ValueError if malformed or empty."""
+    windows = []
+    for item in (text or "").split(","):
+        item = item.strip().lower()
+        if not item:
+            continue
+        try:
+            words = item.split()
+            days = frozenset(DAYS)
+            if words and words[0][0].isalpha():
+                days = _days(words.pop(0))
+            if len(words) > 1:
+                raise ValueError
+            start, end = (0, 24 * 60) if not words else map(_minutes, words[0].split("-", 1))
+            if start == end or start == 24 * 60:
+                raise ValueError
+        except ValueError:
+            raise ValueError(f"{key} item '{item}' is not one of: [DAYS] HH:MM-HH:MM, DAYS "
+                             "(DAYS like mon, mon-fri)") from None
+        windows.append((days, start, end))
+    if not windows:
+        raise ValueError(f"{key} needs at least one window, e.g. mon-fri 08:00-18:00")
+    return windows
+
+def _local(year, month, day, minute):
+    # mktime normalizes day/minute overflow; isdst=-1 lets it pick the offset valid on that date
+    return time.mktime((year, month, day, minute // 60, minute % 60, 0, 0, 0, -1))
+
+class Schedule:
+    """profiles = [(name, windows)] in priority order."""
+
+    def __init__(self, profiles):
+        self.profiles = list(profiles)
+
+    def _intervals(self, t, days_before=1, days_after=_LOOKAHEAD_DAYS):
+        """(start, end, priority, name) of every window occurrence on the local dates around t."""
+        lt = time.localtime(t)
+        out = []
+        for offset in range(-days_before, days_after + 1):
+            # Noon of the date keeps the weekday lookup clear of DST hours
+            day = time.localtime(_local(lt.tm_year, lt.tm_mon, lt.tm_mday + offset, 12 * 60))
+            weekday = DAYS[day.tm_wday]
+            for prio, (name, windows) in enumerate(self.profiles):
+                for days, start, end in windows:
+                    if weekday not in days:
+                        continue
+                    if end <= start:
+                        end += 24 * 60
+                    out.append((_local(day.tm_year, day.tm_mon, day.tm_mday, start),
+                                _local(day.tm_year, day.tm_mon, day.tm_mday, end), prio, name))
+        return out
+
+    @staticmethod
+    def _active(intervals, t):
+        best = None
+        for start, end, prio, name in intervals:
+            if start <= t < end and (best is None or prio < best[0]):
+                best = (prio, name)
+        return best[1] if best else None
+
+    def active(self, t):
+        """Name of the profile active at epoch t, or None."""
+        return self._active(self._intervals(t, days_after=0), t)
+
+    def next_change(self, t):
+        """(epoch of the next profile change after t, profile from then on), or (None, None) if it never changes."""
+        intervals = self._intervals(t)
+        current = self._active(intervals, t)
+        horizon = t + 7 * 86400 + 3600  # the schedule repeats weekly (plus DST slack)
+        for edge in sorted({e for start, end, _p, _n in intervals for e in (start, end) if t < e <= horizon}):
+            name = self._active(intervals, edge)
+            if name != current:
+                return edge, name
+        return None, None
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+systemd notification protocol (sd_notify) without libsystemd.
+- READY=1 / STOPPING=1 / STATUS=... datagrams to $NOTIFY_SOCKET (Type=notify)
+- WATCHDOG=1 pings; interval derived from $WATCHDOG_USEC (half of WatchdogSec)
+No-op when not started by systemd; socket is imported only when needed.
+"""
+
+import os
+
+class Notifier:
+    def __init__(self, environ=os.environ):
+        addr = environ.get("NOTIFY_SOCKET", "")
+        if addr.startswith("@"):
+            addr = "\0" + addr[1:]  # abstract namespace
+        self.addr = addr
+        self._sock = None
+        self.watchdog_interval = None
+        usec = environ.get("WATCHDOG_USEC")
+        pid = environ.get("WATCHDOG_PID")
+        if usec and usec.isdigit() and int(usec) > 0 and (not pid or pid == str(os.getpid())):
+            self.watchdog_interval = int(usec) / 2e6  # seconds; ping twice per period
+
+    @property
+    def enabled(self):
+        return bool(self.addr)
+
+    def notify(self, *fields):
+        """Send e.g. notify("READY=1", "STATUS=running"); returns False if not under systemd."""
+        if not self.addr:
+            return False
+        try:
+            if self._sock is None:
+                import socket
+                self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM | socket.SOCK_CLOEXEC)
+            self._sock.sendto("\n".join(fields).encode(), self.addr)
+            return True
+        except OSError:
+            return False
+
+    def close(self):
+        if self._sock:
+            self._sock.close()
+            self._sock = None
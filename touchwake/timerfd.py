@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+Minimal timerfd binding via ctypes (no third-party dependency) for one absolute
+wall-clock deadline. Armed with TFD_TIMER_CANCEL_ON_SET: a clock step (NTP,
+manual date change) makes the descriptor readable early, so the owner recomputes
+instead of firing at a stale instant. It also fires after a suspend that spans
+the deadline. The descriptor is non-blocking and meant to be registered in a poll set.
+"""
+
+import ctypes, errno, os
+
+_CLOCK_REALTIME = 0
+_TFD_TIMER_ABSTIME = 1
+_TFD_TIMER_CANCEL_ON_SET = 2
+
+class _Timespec(ctypes.Structure):
+    _fields_ = [("tv_sec", ctypes.c_long), ("tv_nsec", ctypes.c_long)]
+
+class _Itimerspec(ctypes.Structure):
+    _fields_ = [("it_interval", _Timespec), ("it_value", _Timespec)]
+
+class RealtimeTimer:
+    """Raises OSError if the kernel/libc lacks timerfd support."""
+
+    def __init__(self):
+        try:
+            libc = ctypes.CDLL(None, use_errno=True)
+            self._settime = libc.timerfd_settime
+            fd = libc.timerfd_create(_CLOCK_REALTIME, os.O_NONBLOCK | os.O_CLOEXEC)
+        except (OSError, AttributeError) as e:
+            raise OSError(f"timerfd unavailable: {e}") from e
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"timerfd_create failed: {os.strerror(err)}")
+        self._settime.argtypes = (ctypes.c_int, ctypes.c_int, ctypes.POINTER(_Itimerspec), ctypes.c_void_p)
+        self.fd = fd
+
+    def fileno(self):
+        return self.fd
+
+    def set(self, when):
+        """Fire once at epoch `when` (or right away if it has passed); None disarms."""
+        spec = _Itimerspec()
+        if when is not None:
+            sec = int(when)
+            spec.it_value.tv_sec = sec
+            spec.it_value.tv_nsec = max(1, int((when - sec) * 1e9))  # all zero would disarm
+        if self._settime(self.fd, _TFD_TIMER_ABSTIME | _TFD_TIMER_CANCEL_ON_SET, ctypes.byref(spec), None) < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"timerfd_settime failed: {os.strerror(err)}")
+
+    def read(self):
+        """Drain the descriptor; 'fired', 'clock-set' (the wall clock was changed) or None (spurious)."""
+        try:
+            os.read(self.fd, 8)
+        except BlockingIOError:
+            return None
+        except OSError as e:
+            if e.errno == errno.ECANCELED:
+                return "clock-set"
+            raise
+        return "fired"
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+Wake latency tracing (trace_wakes): where the time goes between a touch and
+a lit panel, per wake of a display.
+- Timestamps (CLOCK_MONOTONIC seconds): event = kernel timestamp of the newest
+  input event of the batch that woke the display, read = the daemon drained it,
+  power = bl_power write completed, brightness = first brightness write of the
+  wake completed. A stage without a write (already powered/lit) is NaN
+- Records go into a preallocated ring (one array per column, no allocation per
+  wake); the oldest are overwritten
+- Dumped as JSON or as Chrome trace-event JSON (Perfetto / chrome://tracing,
+  one track per display) with p50/p95/p99 per stage
+"""
+
+import math
+from array import array
+
+TRACE_SIZE = 256
+STAGES = ("event", "read", "power", "brightness")
+# (name, from stage, to stage); brightness is measured from read so it is
+# comparable on panels without bl_power
+INTERVALS = (
+    ("event_to_read", "event", "read"),         # kernel queue + daemon scheduling
+    ("read_to_power", "read", "power"),         # bl_power write
+    ("read_to_brightness", "read", "brightness"),  # first brightness write (after bl_power)
+    ("event_to_brightness", "event", "brightness"),  # end to end
+)
+PERCENTILES = (50, 95, 99)
+_NAN = float("nan")
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an ascending list (None if empty)."""
+    if not sorted_values:
+        return None
+    return sorted_values[max(0, math.ceil(p / 100.0 * len(sorted_values)) - 1)]
+
+class WakeTrace:
+    def __init__(self, size=TRACE_SIZE):
+        self.size = size
+        self.count = 0       # wakes recorded since start (count - size were overwritten)
+        self.displays = []   # display names; records keep the index
+        self._display = array("H", bytes(2 * size))
+        self._columns = {stage: array("d", [_NAN] * size) for stage in STAGES}
+
+    def record(self, display, event, read, power=_NAN, brightness=_NAN):
+        try:
+            index = self.displays.index(display)
+        except ValueError:
+            index = len(self.displays)
+            self.displays.append(display)
+        i = self.count % self.size
+        self._display[i] = index
+        cols = self._columns
+        cols["event"][i], cols["read"][i], cols["power"][i], cols["brightness"][i] = event, read, power, brightness
+        self.count += 1
+
+    def _slots(self):
+        """Ring slots, oldest first."""
+        n = min(self.count, self.size)
+        first = self.count - n
+        return [(first + k) % self.size for k in range(n)]
+
+    def records(self):
+        cols = self._columns
+        out = []
+        for i in self._slots():
+            rec = {"display": self.displays[self._display[i]]}
+            for stage in STAGES:
+                t = cols[stage][i]
+                rec[stage] = None if math.isnan(t) else round(t, 6)
+            out.append(rec)
+        return out
+
+    def summary(self):
+        """{interval: {count, p50, p95, p99, max}} in milliseconds."""
+        cols = self._columns
+        slots = self._slots()
+        out = {}
+        for name, start, end in INTERVALS:
+            values = sorted((cols[end][i] - cols[start][i]) * 1000.0 for i in slots
+                            if not math.isnan(cols[end][i] - cols[start][i]))
+            stats = {"count": len(values)}
+            for p in PERCENTILES:
+                v = percentile(values, p)
+                stats[f"p{p}"] = None if v is None else round(v, 3)
+            stats["max"] = round(values[-1], 3) if values else None
+            out[name] = stats
+        return out
+
+    def as_json(self):
+        return {"clock": "monotonic", "wakes": self.count, "size": self.size,
+                "summary": self.summary(), "records": self.records()}
+
+    def trace_events(self):
+        """Chrome trace-event format: one complete ("X") slice per stage, one thread per display."""
+        events = [{"ph": "M", "name": "thread_name", "pid": 1, "tid": tid, "args": {"name": name}}
+                  for tid, name in enumerate(self.displays)]
+        cols = self._columns
+        for i in self._slots():
+            tid = self._display[i]
+            t = [cols[stage][i] for stage in STAGES]
+            start = t[0] if not math.isnan(t[0]) else t[1]
+            events.append({"ph": "X", "name": "wake", "cat": "wake", "pid": 1, "tid": tid,
+                           "ts": round(start * 1e6, 1),
+                           "dur": round((max(x for x in t if not math.isnan(x)) - start) * 1e6, 1)})
+            prev = None  # stages without a write are skipped
+            for k, stage in enumerate(STAGES):
+                if math.isnan(t[k]):
+                    continue
+                if prev is not None:
+                    events.append({"ph": "X", "name": f"{STAGES[prev]}->{stage}", "cat": "stage", "pid": 1,
+                                   "tid": tid, "ts": round(t[prev] * 1e6, 1), "dur": round((t[k] - t[prev]) * 1e6, 1)})
+                prev = k
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming wake filter between the evdev reader and the idle logic: rejects
+spurious activity (noisy panels, ghost touches, palms, a vibrating mouse).
+- Rules per state: wake_filter applies while a display of the device sleeps,
+  awake_filter while one is awake (keeps it awake); empty = every relevant event
+  counts, and the reader's batch fast path is used
+- Events are judged per frame (up to SYN_REPORT):
+  key press (keyboard, mouse button) -> always counts
+  contact frame (BTN_TOUCH down or released) -> contact=MS: only once the touch
+    has lasted MS (single-frame ghosts never do); palm=N: contacts reporting
+    MT_TOOL_PALM or ABS_MT_TOUCH_MAJOR above N never count
+  motion frame (REL / ABS without a contact) -> touch: ABS motion never counts;
+    travel=N[/MS]: only after moving N units (ABS_X/Y or summed REL_X/Y) within
+    an MS window (default 250), so jitter that cancels out is ignored
+- no_wake_devices: devices that keep displays awake but never wake them
+State is a fixed set of slots per device (O(1)); frames are judged from
+columns the reader fills per batch, nothing is allocated per event.
+codes() lists the event codes the rules read, so the daemon can widen the
+device's kernel event mask (evio.MASK_RELEVANT drops touch size and tool type).
+"""
+
+import fnmatch
+
+EV_SYN, EV_KEY, EV_REL, EV_ABS = 0x00, 0x01, 0x02, 0x03
+SYN_REPORT, SYN_DROPPED = 0, 3
+BTN_TOUCH = 0x14a
+REL_X, REL_Y = 0x00, 0x01
+ABS_X, ABS_Y = 0x00, 0x01
+ABS_MT_TOUCH_MAJOR = 0x30
+ABS_MT_TOOL_TYPE = 0x37
+MT_TOOL_PALM = 2
+
+DEFAULT_WINDOW_MS = 250
+
+class FilterRules:
+    __slots__ = ("travel", "window", "contact", "touch", "palm")
+
+    def __init__(self, travel=0, window=DEFAULT_WINDOW_MS / 1000.0, contact=0.0, touch=False, palm=0):
+        self.travel = travel    # units
+        self.window = window    # seconds
+        self.contact = contact  # seconds
+        self.touch = touch
+        self.palm = palm        # 0 off, -1 MT_TOOL_PALM only, N also touch major above N
+
+def parse_filter(text, key="wake_filter"):
+    """'travel=N[/MS], contact=MS, touch, palm[=N]' -> FilterRules, or None if empty; ValueError if malformed."""
+    items = [item.strip().lower() for item in (text or "").split(",") if item.strip()]
+    if not items:
+        return None
+    rules = FilterRules()
+    for item in items:
+        name, _, value = item.partition("=")
+        try:
+            if name == "travel" and value:
+                units, _, window = value.partition("/")
+                rules.travel = int(units)
+                if window:
+                    rules.window = int(window.removesuffix("ms")) / 1000.0
+                if rules.travel <= 0 or rules.window <= 0:
+                    raise ValueError
+            elif name == "contact" and value:
+                rules.contact = int(value.removesuffix("ms")) / 1000.0
+                if rules.contact <= 0:
+                    raise ValueError
+            elif name == "touch" and not value:
+                rules.touch = True
+            elif name == "palm":
+                rules.palm = int(value) if value else 0
+                if rules.palm < 0:
+                    raise ValueError
+                rules.palm = rules.palm or -1  # palm without threshold: tool type only
+            else:
+                raise ValueError
+        except ValueError:
+            raise ValueError(f"{key} item '{item}' is not one of: travel=UNITS[/MS], contact=MS, touch, palm[=MAJOR]") from None
+    return rules
+
+def device_matches(patterns, dev):
+    fields = (getattr(dev, "name", "") or "").lower(), (getattr(dev, "phys", "") or "").lower()
+    return any(fnmatch.fnmatchcase(f, p) for p in patterns for f in fields)
+
+class WakeFilter:
+    """Per-device frame state. feed() sets wake_ts / awake_ts to the newest frame accepted by each rule set."""
+    __slots__ = ("wake_rules", "awake_rules", "wake_allowed", "check_wake", "check_awake", "wake_ts", "awake_ts",
+                 "frames", "rejected", "stale", "_major", "_window",
+                 "_key", "_abs", "_rel", "_palm", "_dropped", "_touch_changed",
+                 "_down", "_since", "_contact_palm", "_x", "_y", "_ax", "_ay", "_at")
+
+    def __init__(self, wake_rules=None, awake_rules=None, wake_allowed=True):
+        self.wake_rules = wake_rules
+        self.awake_rules = awake_rules
+        self.wake_allowed = wake_allowed
+        self.frames = 0     # frames judged (metrics)
+        self.rejected = 0   # frames rejected by the active rule sets
+        rule_sets = [r for r in (wake_rules, awake_rules) if r is not None]
+        self._major = min([r.palm for r in rule_sets if r.palm > 0], default=0)  # touch major that marks a palm
+        self._window = max([r.window for r in rule_sets if r.travel], default=DEFAULT_WINDOW_MS / 1000.0)
+        self.reset()
+
+    def codes(self):
+        """{type: codes} the rules read, in the evio mask format (None = all codes of the type)."""
+        # Any key or relative event counts; absolute activity and travel come from ABS_X/Y
+        abs_codes = [ABS_X, ABS_Y]
+        if any(r.palm for r in (self.wake_rules, self.awake_rules) if r is not None):
+            abs_codes.append(ABS_MT_TOOL_TYPE)
+        if self._major:
+            abs_codes.append(ABS_MT_TOUCH_MAJOR)
+        return {EV_KEY: None, EV_REL: None, EV_ABS: tuple(abs_codes)}
+
+    def reset(self):
+        """Forget frame and contact state (events were read unfiltered in between)."""
+        self.stale = False
+        self.check_wake = self.check_awake = False
+        self.wake_ts = self.awake_ts = None
+        self._key = self._abs = self._rel = self._palm = self._dropped = self._touch_changed = False
+        self._down = self._contact_palm = False
+        self._since = 0.0
+        self._x = self._y = self._ax = self._ay = 0
+        self._at = None  # start of the travel window (None: no position yet)
+
+    def needed(self, asleep, awake):
+        """Select the rule sets for this drain; False if no filtering is needed (reader fast path)."""
+        if not (asleep and (self.wake_rules is not None or not self.wake_allowed)
+                or awake and self.awake_rules is not None):
+            self.stale = True
+            return False
+        if self.stale:
+            self.reset()
+        # Once filtering, both states are judged (a state without rules accepts every frame)
+        self.check_wake, self.check_awake = asleep, awake
+        self.wake_ts = self.awake_ts = None
+        return True
+
+    def feed(self, count, secs, usecs, types, codes, values):
+        """Judge `count` events (reader columns, as lists)."""
+        for i in range(count):
+            t, c, v = types[i], codes[i], values[i]
+            if t == EV_SYN:
+                if c == SYN_REPORT:
+                    self._frame(secs[i] + usecs[i] * 1e-6)
+                elif c == SYN_DROPPED:
+                    self._dropped = True
+            elif t == EV_ABS:
+                self._abs = True
+                if c == ABS_X:
+                    self._x = v
+                elif c == ABS_Y:
+                    self._y = v
+                elif c == ABS_MT_TOOL_TYPE:
+                    self._palm = self._palm or v == MT_TOOL_PALM
+                elif c == ABS_MT_TOUCH_MAJOR:
+                    self._palm = self._palm or 0 < self._major < v
+            elif t == EV_REL:
+                self._rel = True
+                if c == REL_X:
+                    self._x += v
+                elif c == REL_Y:
+                    self._y += v
+            elif t == EV_KEY:
+                if c == BTN_TOUCH:
+                    self._down = v == 1
+                    self._touch_changed = True
+                elif v in (1, 2):
+                    self._key = True
+
+    def _frame(self, ts):
+        if self._dropped:
+            # Kernel queue overflow: the frame is incomplete, judge the next one
+            self._dropped = self._key = self._abs = self._rel = self._palm = self._touch_changed = False
+            return
+        contact = self._down or self._touch_changed
+        if self._touch_changed and self._down:
+            self._since = ts
+            self._contact_palm = False
+        self._contact_palm = self._contact_palm or (contact and self._palm)
+        if self._abs or self._rel:
+            if self._at is None or ts - self._at > self._window:
+                self._at, self._ax, self._ay = ts, self._x, self._y
+        if self._key or contact or self._abs or self._rel:
+            self.frames += 1
+            rejected = False
+            if self.check_wake:
+                if self.wake_allowed and self._accept(self.wake_rules, ts, contact):
+                    self.wake_ts = ts
+                else:
+                    rejected = True
+            if self.check_awake:
+                if self._accept(self.awake_rules, ts, contact):
+                    self.awake_ts = ts
+                else:
+                    rejected = True
+            self.rejected += rejected
+        self._key = self._abs = self._rel = self._palm = self._touch_changed = False
+
+    def _accept(self, rules, ts, contact):
+        if rules is None or self._key:
+            return True
+        if contact:
+            if rules.palm and self._contact_palm:
+                return False
+            return not rules.contact or ts - self._since >= rules.contact
+        if rules.touch and self._abs:
+            return False
+        if rules.travel:
+            return ts - self._at <= rules.window and max(abs(self._x - self._ax), abs(self._y - self._ay)) >= rules.travel
+        return True